@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Chrome Performance Capture
+Optional per-run DevTools data for diagnosing slow runs: the Chrome trace
+(timeline, V8, loading categories via chromedriver's perfLoggingPrefs), the
+DevTools network log, and a Performance.getMetrics snapshot (JS heap, layout
+and style recalc counts, script/layout/task durations, DOM nodes) plus
+network timing at the end of every pipeline stage.
+
+Artifacts are gzip-compressed next to the run's span trace:
+
+    traces/run_<timestamp>_<pid>.perf/trace.json.gz        chrome://tracing / Perfetto
+    traces/run_<timestamp>_<pid>.perf/devtools_log.json.gz raw Network.* / Page.* events
+    traces/run_<timestamp>_<pid>.perf/metrics.json.gz      per-stage snapshots and deltas
+
+Enable with TradeTrendsAutomation(perf_trace=True) or run_automation.py --perf-trace.
+"""
+
+import os
+import sys
+import gzip
+import json
+import argparse
+import functools
+from datetime import datetime
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PERF_DIR = os.path.join(project_root, "traces")
+
+TRACE_CATEGORIES = "devtools.timeline,disabled-by-default-devtools.timeline,v8,blink.user_timing,loading,latencyInfo"
+
+# Performance.getMetrics values worth a delta per stage (the rest are stored as-is)
+DELTA_METRICS = ("LayoutCount", "RecalcStyleCount", "ScriptDuration", "LayoutDuration",
+                 "RecalcStyleDuration", "TaskDuration")
+
+NAVIGATION_TIMING_JS = """
+    var nav = performance.getEntriesByType('navigation')[0];
+    var resources = performance.getEntriesByType('resource');
+    return {
+        url: location.href,
+        dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd : null,
+        load_ms: nav ? nav.loadEventEnd : null,
+        response_end_ms: nav ? nav.responseEnd : null,
+        resources: resources.length,
+        resource_bytes: resources.reduce(function (sum, r) { return sum + (r.transferSize || 0); }, 0)
+    };
+"""
+
+
+def enable_performance_logging(chrome_options, trace_categories=TRACE_CATEGORIES):
+    """Ask chromedriver for the DevTools performance log and a trace of `trace_categories`"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    chrome_options.add_experimental_option('perfLoggingPrefs', {
+        'enableNetwork': True,
+        'enablePage': True,
+        'traceCategories': trace_categories,
+    })
+    return chrome_options
+
+
+def _write_gzip_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+class ChromePerfRecorder:
+    """Collects DevTools data from a driver started with enable_performance_logging()"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.trace_events = []
+        self.devtools_log = []
+        self.snapshots = []
+        self._previous = {}
+        self._pending_requests = {}
+        self._stage_network = self._empty_network()
+        self.driver.execute_cdp_cmd('Performance.enable', {'timeDomain': 'timeTicks'})
+
+    @staticmethod
+    def _empty_network():
+        return {'requests': 0, 'failed': 0, 'encoded_bytes': 0, 'max_latency_ms': 0.0}
+
+    def drain(self):
+        """Move buffered performance-log entries into trace events / devtools log (reading clears the buffer)"""
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            return
+        network = self._stage_network
+        for entry in entries:
+            message = json.loads(entry['message'])['message']
+            method, params = message.get('method', ''), message.get('params', {})
+            if method == 'Tracing.dataCollected':
+                # chromedriver logs one entry per trace event, with the event itself as params;
+                # a raw CDP chunk ({'value': [...]}) is flattened as a fallback
+                if isinstance(params.get('value'), list):
+                    self.trace_events.extend(params['value'])
+                else:
+                    self.trace_events.append(params)
+                continue
+            if method == 'Tracing.bufferUsage':
+                continue
+            self.devtools_log.append(message)
+            if method == 'Network.requestWillBeSent':
+                network['requests'] += 1
+                self._pending_requests[params.get('requestId')] = params.get('timestamp')
+            elif method == 'Network.loadingFinished':
+                network['encoded_bytes'] += int(params.get('encodedDataLength') or 0)
+                started = self._pending_requests.pop(params.get('requestId'), None)
+                if started is not None and params.get('timestamp') is not None:
+                    network['max_latency_ms'] = max(network['max_latency_ms'],
+                                                     round((params['timestamp'] - started) * 1000, 1))
+            elif method == 'Network.loadingFailed':
+                network['failed'] += 1
+                self._pending_requests.pop(params.get('requestId'), None)
+
+    def snapshot(self, stage):
+        """Performance.getMetrics + navigation timing + network since the last snapshot; returns the snapshot"""
+        self.drain()
+        try:
+            metrics = {m['name']: m['value']
+                       for m in self.driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']}
+        except Exception as e:
+            metrics = {'error': str(e)}
+        try:
+            navigation = self.driver.execute_script(NAVIGATION_TIMING_JS)
+        except Exception:
+            navigation = None
+
+        deltas = {name: round(metrics[name] - self._previous.get(name, 0), 6)
+                  for name in DELTA_METRICS if isinstance(metrics.get(name), (int, float))}
+        self._previous = {k: v for k, v in metrics.items() if isinstance(v, (int, float))}
+        record = {
+            'stage': stage,
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'metrics': metrics,
+            'deltas': deltas,
+            'network': self._stage_network,
+            'navigation': navigation,
+        }
+        self._stage_network = self._empty_network()
+        self.snapshots.append(record)
+        return record
+
+    def summary(self, record):
+        """Compact attributes for the stage's tracing span"""
+        metrics = record['metrics']
+        summary = {
+            'js_heap_mb': round(metrics.get('JSHeapUsedSize', 0) / 1e6, 2),
+            'dom_nodes': metrics.get('Nodes'),
+            'requests': record['network']['requests'],
+            'network_kb': round(record['network']['encoded_bytes'] / 1024, 1),
+        }
+        for name, key in (('LayoutCount', 'layouts'), ('ScriptDuration', 'script_s'), ('TaskDuration', 'task_s')):
+            if name in record['deltas']:
+                summary[key] = record['deltas'][name]
+        return summary
+
+    def save(self, output_dir):
+        """Write trace.json.gz, devtools_log.json.gz and metrics.json.gz; returns the paths"""
+        self.drain()
+        os.makedirs(output_dir, exist_ok=True)
+        paths = {
+            'trace': os.path.join(output_dir, "trace.json.gz"),
+            'devtools_log': os.path.join(output_dir, "devtools_log.json.gz"),
+            'metrics': os.path.join(output_dir, "metrics.json.gz"),
+        }
+        _write_gzip_json(paths['trace'], {'traceEvents': self.trace_events,
+                                          'metadata': {'trace-categories': TRACE_CATEGORIES}})
+        _write_gzip_json(paths['devtools_log'], self.devtools_log)
+        _write_gzip_json(paths['metrics'], {'snapshots': self.snapshots})
+        return paths
+
+
+def perf_output_dir(trace_path=None, perf_dir=DEFAULT_PERF_DIR):
+    """traces/run_x.jsonl -> traces/run_x.perf; a timestamped directory when the run has no trace file"""
+    if trace_path:
+        return os.path.splitext(trace_path)[0] + ".perf"
+    return os.path.join(perf_dir, f"perf_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+
+
+def perf_stage(stage):
+    """Method decorator: snapshot self.perf (if recording) after the stage returns or raises"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                if getattr(self, 'perf', None) is not None:
+                    self.record_perf_stage(stage)
+        return wrapper
+    return decorator
+
+
+def load_metrics(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)['snapshots']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-stage Chrome metrics from a --perf-trace run')
+    parser.add_argument('perf_dir', help='traces/run_<timestamp>_<pid>.perf directory')
+    args = parser.parse_args()
+
+    snapshots = load_metrics(os.path.join(args.perf_dir, "metrics.json.gz"))
+    print(f"{'stage':<26} {'heap MB':>8} {'nodes':>7} {'layouts':>8} {'script s':>9} {'task s':>8} "
+          f"{'reqs':>5} {'KB':>8} {'max ms':>8}")
+    for record in snapshots:
+        metrics, deltas, network = record['metrics'], record['deltas'], record['network']
+        print(f"{record['stage']:<26} {metrics.get('JSHeapUsedSize', 0) / 1e6:>8.1f} "
+              f"{int(metrics.get('Nodes', 0)):>7} {deltas.get('LayoutCount', 0):>8.0f} "
+              f"{deltas.get('ScriptDuration', 0):>9.3f} {deltas.get('TaskDuration', 0):>8.3f} "
+              f"{network['requests']:>5} {network['encoded_bytes'] / 1024:>8.1f} {network['max_latency_ms']:>8.1f}")
+    trace_path = os.path.join(args.perf_dir, "trace.json.gz")
+    if os.path.exists(trace_path):
+        print(f"🧭 Open {trace_path} in chrome://tracing or https://ui.perfetto.dev")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
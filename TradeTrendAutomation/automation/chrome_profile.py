@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Persistent Chrome Profiles
+Chrome runs with a --user-data-dir kept under chrome_profile/ (a mounted
+volume), so the monitor.paas AngularJS bundle, icon fonts and chart libraries
+come from the HTTP / code cache instead of the network on every run.
+
+A profile can only be used by one Chrome at a time. Each one is held with an
+fcntl lock on chrome_profile/<name>.lock for the whole browser session:
+'primary' first, then worker_1..worker_N. A worker slot is cloned from the
+primary the first time it is used and is kept afterwards. When every slot is
+busy, the run gets a throwaway clone that is deleted on release.
+
+On release (after driver.quit()) a profile larger than MAX_PROFILE_BYTES
+loses its cache directories first; if it is still too large, it is removed.
+Chrome's own HTTP cache is capped separately with --disk-cache-size.
+When the browser starts, clear_session_state() drops all cookies and the
+site storage (localStorage, IndexedDB, service workers, ...) of the XFlush
+origins, keeping only the caches. Every run therefore goes through the normal
+login form, in the default UI language. sessionStorage does not survive a
+browser restart, so it needs no clearing.
+"""
+
+import os
+import sys
+import time
+import fcntl
+import shutil
+import argparse
+from urllib.parse import urlparse
+
+from pipeline_logging import get_logger
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PROFILE_ROOT = os.path.join(project_root, "chrome_profile")
+
+PRIMARY = "primary"
+MAX_WORKER_SLOTS = 4
+MAX_PROFILE_BYTES = 400 * 1024 * 1024
+DISK_CACHE_BYTES = 200 * 1024 * 1024
+
+# Dropped first when a profile outgrows MAX_PROFILE_BYTES; Chrome rebuilds them
+CACHE_DIRS = (
+    os.path.join("Default", "Cache"),
+    os.path.join("Default", "Code Cache"),
+    os.path.join("Default", "GPUCache"),
+    os.path.join("Default", "Service Worker", "CacheStorage"),
+    os.path.join("Default", "Service Worker", "ScriptCache"),
+    "GrShaderCache",
+    "GraphiteDawnCache",
+    "ShaderCache",
+)
+# Chrome's own single-instance markers. They embed the hostname, so one left behind by a crashed
+# container makes the next container's Chrome refuse the profile; our lock already guarantees exclusivity
+SINGLETON_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+# Storage.clearDataForOrigin types holding session / UI state; cache_storage and shader_cache are kept
+SESSION_STORAGE_TYPES = "cookies,file_systems,indexeddb,local_storage,websql,service_workers"
+
+logger = get_logger(__name__)
+
+
+def directory_size(path):
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _try_lock(lock_path):
+    """Open file holding an exclusive lock on `lock_path`, or None when another process has it"""
+    lock_file = open(lock_path, 'a')
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def clear_session_state(driver, urls):
+    """Forget logins and per-site settings from earlier runs while keeping the cached assets"""
+    driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+    origins = {f"{parts.scheme}://{parts.netloc}" for parts in map(urlparse, urls) if parts.netloc}
+    for origin in sorted(origins):
+        driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': SESSION_STORAGE_TYPES})
+
+
+class ProfileLease:
+    """One profile directory, held until release()"""
+
+    def __init__(self, profiles, name, lock_file, ephemeral=False):
+        self.profiles = profiles
+        self.name = name
+        self.path = os.path.join(profiles.root, name)
+        self.lock_file = lock_file
+        self.ephemeral = ephemeral
+
+    def chrome_arguments(self):
+        return [f'--user-data-dir={self.path}', f'--disk-cache-size={self.profiles.disk_cache_bytes}']
+
+    def release(self):
+        """Call after the browser has quit; prunes the profile, then unlocks it"""
+        if self.lock_file is None:
+            return
+        try:
+            if self.ephemeral:
+                shutil.rmtree(self.path, ignore_errors=True)
+            else:
+                self.profiles.prune(self.path)
+        finally:
+            fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+            self.lock_file.close()
+            self.lock_file = None
+            if self.ephemeral:
+                try:
+                    os.remove(f"{self.path}.lock")
+                except FileNotFoundError:
+                    pass
+
+
+class ChromeProfiles:
+    def __init__(self, root=None, max_workers=MAX_WORKER_SLOTS, max_bytes=MAX_PROFILE_BYTES,
+                 disk_cache_bytes=DISK_CACHE_BYTES):
+        self.root = root or DEFAULT_PROFILE_ROOT
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.disk_cache_bytes = disk_cache_bytes
+
+    def slot_names(self):
+        return [PRIMARY] + [f"worker_{i}" for i in range(1, self.max_workers + 1)]
+
+    def _clone_primary(self, target):
+        """Copy the primary profile (minus Chrome's singleton markers) into `target`"""
+        primary = os.path.join(self.root, PRIMARY)
+        if not os.path.isdir(primary):
+            os.makedirs(target, exist_ok=True)
+            return
+        # The primary may be in use; a torn copy of a cache entry is just a cache miss
+        shutil.copytree(primary, target, symlinks=True, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns(*SINGLETON_FILES),
+                        ignore_dangling_symlinks=True,
+                        copy_function=self._copy_if_present)
+
+    @staticmethod
+    def _copy_if_present(src, dst):
+        try:
+            shutil.copy2(src, dst)
+        except FileNotFoundError:
+            pass
+
+    def _sweep_ephemeral(self):
+        """Remove throwaway clones left behind by runs that died before release()"""
+        for name in os.listdir(self.root):
+            if not name.startswith("tmp_") or name.endswith(".lock"):
+                continue
+            lock_file = _try_lock(os.path.join(self.root, f"{name}.lock"))
+            if lock_file is None:
+                continue
+            try:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+                os.remove(os.path.join(self.root, f"{name}.lock"))
+            finally:
+                lock_file.close()
+
+    def acquire(self):
+        """Lease the first free slot, cloning the primary into a new worker slot; never blocks"""
+        os.makedirs(self.root, exist_ok=True)
+        self._sweep_ephemeral()
+        for name in self.slot_names():
+            lock_file = _try_lock(os.path.join(self.root, f"{name}.lock"))
+            if lock_file is None:
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                if name == PRIMARY:
+                    os.makedirs(path, exist_ok=True)
+                elif not os.path.isdir(path):
+                    self._clone_primary(path)
+                for marker in SINGLETON_FILES:
+                    if os.path.lexists(os.path.join(path, marker)):
+                        os.remove(os.path.join(path, marker))
+            except BaseException:
+                lock_file.close()
+                raise
+            return ProfileLease(self, name, lock_file)
+
+        name = f"tmp_{os.getpid()}_{int(time.time() * 1000)}"
+        lock_file = _try_lock(os.path.join(self.root, f"{name}.lock"))
+        try:
+            self._clone_primary(os.path.join(self.root, name))
+        except BaseException:
+            lock_file.close()
+            raise
+        logger.info("🧳 All %s Chrome profiles busy; using a throwaway clone", len(self.slot_names()))
+        return ProfileLease(self, name, lock_file, ephemeral=True)
+
+    def prune(self, path):
+        """Drop cache directories, then the whole profile, while it is over max_bytes; returns bytes freed"""
+        size = directory_size(path)
+        if size <= self.max_bytes:
+            return 0
+        before = size
+        for cache_dir in CACHE_DIRS:
+            shutil.rmtree(os.path.join(path, cache_dir), ignore_errors=True)
+        size = directory_size(path)
+        if size > self.max_bytes:
+            shutil.rmtree(path, ignore_errors=True)
+            size = 0
+        logger.info("🧹 Chrome profile %s pruned: %.1f MB -> %.1f MB",
+                    os.path.basename(path), before / 2**20, size / 2**20)
+        return before - size
+
+    def status(self):
+        """[(name, bytes, in use)] for every profile directory under the root"""
+        if not os.path.isdir(self.root):
+            return []
+        rows = []
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(path):
+                continue
+            lock_file = _try_lock(f"{path}.lock")
+            if lock_file is not None:
+                lock_file.close()
+            rows.append((name, directory_size(path), lock_file is None))
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect / prune the persistent Chrome profiles')
+    parser.add_argument('--prune', action='store_true', help='Apply the size limit to every idle profile now')
+    parser.add_argument('--clear', action='store_true', help='Delete every idle profile (next run starts cold)')
+    args = parser.parse_args()
+
+    profiles = ChromeProfiles()
+    for name, size, in_use in profiles.status():
+        if in_use or not (args.prune or args.clear):
+            print(f"{'🔒' if in_use else '  '} {name}: {size / 2**20:.1f} MB")
+            continue
+        path = os.path.join(profiles.root, name)
+        lock_file = _try_lock(f"{path}.lock")
+        if lock_file is None:
+            continue
+        try:
+            if args.clear:
+                shutil.rmtree(path, ignore_errors=True)
+                print(f"🗑️ {name}: removed ({size / 2**20:.1f} MB)")
+            else:
+                freed = profiles.prune(path)
+                print(f"   {name}: {size / 2**20:.1f} MB, {freed / 2**20:.1f} MB freed")
+        finally:
+            lock_file.close()
+    print(f"🗂️  Chrome profiles in {profiles.root} (limit {profiles.max_bytes / 2**20:.0f} MB each)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,6 +22,10 @@ credentials_dir = os.path.join(project_root, "credentials")
 sys.path.insert(0, credentials_dir)
 
 from credentials_loader import get_dingtalk_credentials
+from pipeline_logging import get_logger, add_logging_arguments, configure_from_args
+from screenshot_retention import enforce_retention
+
+logger = get_logger(__name__)
 
 class XFlushCompleteAutomation:
     def __init__(self, credentials=None):
@@ -33,6 +37,10 @@ class XFlushCompleteAutomation:
         self.client_secret = credentials['client_secret']
         self.webhook_url = credentials['webhook_url']
         self.webhook_secret = credentials['webhook_secret']
+        self.token_url = credentials['token_url']
+        self.media_upload_url = credentials['media_upload_url']
+        self.media_delete_url = credentials['media_delete_url']
+        self.media_download_url = credentials['media_download_url']
         
         # Set screenshots directory relative to project root
         self.screenshots_dir = os.path.join(project_root, "screenshots")
@@ -42,7 +50,7 @@ class XFlushCompleteAutomation:
         
     def get_access_token(self):
         """Get enterprise access token"""
-        url = "https://oapi.dingtalk.com/gettoken"
+        url = self.token_url
         params = {
             'appkey': self.client_id,
             'appsecret': self.client_secret
@@ -63,15 +71,15 @@ class XFlushCompleteAutomation:
             command = ['python3', 'trade_trends_final.py']
             
             if capture_type == "statistics":
-                print("📊 Capturing Trade Trends Statistics Info...")
+                logger.info("📊 Capturing Trade Trends Statistics Info...")
                 command.append('--statistics-only')
                 pattern = "statistics_info_"
             elif capture_type == "chart":
-                print("📈 Capturing Trade Trends chart...")
+                logger.info("📈 Capturing Trade Trends chart...")
                 command.append('--chart-only')
                 pattern = "trade_trends_chart_"
             else:
-                print("📸 Capturing Trade Trends full interface...")
+                logger.info("📸 Capturing Trade Trends full interface...")
                 pattern = "trade_trends_with_timerange_"
             
             # Add unique id to filename via env var
@@ -80,9 +88,9 @@ class XFlushCompleteAutomation:
             
             if headless:
                 command.append('--headless')
-                print("🖥️  Running in headless mode")
+                logger.info("🖥️  Running in headless mode")
             else:
-                print("🖥️  Running in visible mode")
+                logger.info("🖥️  Running in visible mode")
             
             # Run the working trade trends automation
             result = subprocess.run(command, capture_output=True, text=True, 
@@ -92,7 +100,7 @@ class XFlushCompleteAutomation:
             expected_filename = f"{pattern}{unique_id}.png"
             expected_path = os.path.join(self.screenshots_dir, expected_filename)
             if result.returncode == 0 and os.path.exists(expected_path):
-                print(f"✅ Screenshot captured: {expected_path}")
+                logger.info("✅ Screenshot captured: %s", expected_path)
                 return expected_path
             else:
                 # Fallback: find most recent matching file
@@ -101,18 +109,18 @@ class XFlushCompleteAutomation:
                 if screenshot_files:
                     screenshot_files.sort(key=lambda x: os.path.getctime(os.path.join(self.screenshots_dir, x)), reverse=True)
                     latest_screenshot = os.path.join(self.screenshots_dir, screenshot_files[0])
-                    print(f"📁 Latest screenshot: {latest_screenshot}")
+                    logger.info("📁 Latest screenshot: %s", latest_screenshot)
                     return latest_screenshot
-                print("❌ Screenshot file not found!")
-                print(f"Error: {result.stderr}")
+                logger.error("❌ Screenshot file not found!")
+                logger.error("Error: %s", result.stderr)
                 return None
         except Exception as e:
-            print(f"❌ Screenshot capture error: {e}")
+            logger.error("❌ Screenshot capture error: %s", e)
             return None
     
     def upload_media(self, image_path, access_token):
         """Upload image to DingTalk media API"""
-        url = "https://oapi.dingtalk.com/media/upload"
+        url = self.media_upload_url
         params = {'access_token': access_token, 'type': 'image'}
         
         with open(image_path, 'rb') as f:
@@ -137,7 +145,7 @@ class XFlushCompleteAutomation:
         
         if result.get('errcode') == 0:
             media_id = result['media_id']
-            print(f"✅ Image uploaded! Media ID: {media_id}")
+            logger.info("✅ Image uploaded! Media ID: %s", media_id)
             return media_id
         else:
             raise Exception(f"Upload failed: {result}")
@@ -145,10 +153,10 @@ class XFlushCompleteAutomation:
     def delete_media(self, media_id, access_token):
         """Delete image from DingTalk media storage"""
         try:
-            print(f"🗑️ Cleaning up media storage...")
+            logger.info("🗑️ Cleaning up media storage...")
             
             # DingTalk media delete API
-            url = "https://oapi.dingtalk.com/media/delete"
+            url = self.media_delete_url
             params = {
                 'access_token': access_token,
                 'media_id': media_id
@@ -158,15 +166,15 @@ class XFlushCompleteAutomation:
             result = response.json()
             
             if result.get('errcode') == 0:
-                print(f"✅ Media {media_id} deleted from DingTalk storage")
+                logger.info("✅ Media %s deleted from DingTalk storage", media_id)
                 return True
             else:
-                print(f"⚠️ Media deletion warning: {result}")
+                logger.warning("⚠️ Media deletion warning: %s", result)
                 # Don't fail the whole process if deletion fails
                 return False
                 
         except Exception as e:
-            print(f"⚠️ Media deletion error: {e}")
+            logger.warning("⚠️ Media deletion error: %s", e)
             # Don't fail the whole process if deletion fails
             return False
     
@@ -190,7 +198,7 @@ class XFlushCompleteAutomation:
         """Send image with clean display (no buttons)"""
         try:
             current_time = time.strftime("%Y-%m-%d %H:%M:%S")
-            download_url = f"https://oapi.dingtalk.com/media/downloadFile?access_token={access_token}&media_id={media_id}"
+            download_url = f"{self.media_download_url}?access_token={access_token}&media_id={media_id}"
             
             # Clean ActionCard with no click functionality - just displays image beautifully
             payload = {
@@ -210,40 +218,38 @@ class XFlushCompleteAutomation:
            
         }
             
-            print("📨 Sending clean image display...")
+            logger.info("📨 Sending clean image display...")
             result = self.send_webhook_message(payload)
             
             if result.get('errcode') == 0:
-                print("✅ Image sent successfully!")
+                logger.info("✅ Image sent successfully!")
                 return True
             else:
-                print(f"❌ Failed to send image: {result}")
+                logger.error("❌ Failed to send image: %s", result)
                 return False
                 
         except Exception as e:
-            print(f"❌ Send image error: {e}")
+            logger.error("❌ Send image error: %s", e)
             return False
     
     def run_complete_automation(self, cleanup_media=True, capture_type="full", headless=False):
         """Run the complete automation with optional media cleanup and capture type"""
         try:
             if capture_type == "statistics":
-                print("🚀 Starting Complete XFlush Statistics Automation...")
+                logger.info("🚀 Starting Complete XFlush Statistics Automation...")
             else:
-                print("🚀 Starting Complete XFlush Automation...")
-            print(f"⏰ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"📊 Capture type: {capture_type}")
-            print(f"🖥️  Browser mode: {'Headless' if headless else 'Visible'}")
-            print(f"🗑️ Media cleanup: {'Enabled' if cleanup_media else 'Disabled'}")
-            print("-" * 50)
+                logger.info("🚀 Starting Complete XFlush Automation...")
+            logger.info("⏰ Time: %s", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            logger.info("📊 Capture type: %s", capture_type)
+            logger.info("🖥️  Browser mode: %s", 'Headless' if headless else 'Visible')
+            logger.info("🗑️ Media cleanup: %s", 'Enabled' if cleanup_media else 'Disabled')
             
             # Step 1: Capture screenshot with specified type
             screenshot_path = self.capture_screenshot(capture_type, headless)
             if not screenshot_path:
-                print("💥 Automation failed at screenshot capture step")
+                logger.error("💥 Automation failed at screenshot capture step")
                 return False
             
-            print("-" * 30)
 
             automation = TradeTrendsAutomation(headless=headless)
 
@@ -257,13 +263,13 @@ class XFlushCompleteAutomation:
                 # Then:
                 # tps_data = automation.extract_statistics_and_calculate_tps(statistics_text)
 
-                print(f"✅ Statistics screenshot saved at: {statistics_screenshot_path}")
+                logger.info("✅ Statistics screenshot saved at: %s", statistics_screenshot_path)
             else:
-                print("❌ Failed to capture statistics info")
+                logger.error("❌ Failed to capture statistics info")
 
             statistics_screenshot_path, statistics_text = automation.capture_statistics_info()
             tps_data = automation.extract_statistics_and_calculate_tps(statistics_text)
-            print(tps_data)
+            logger.debug("TPS data: %s", tps_data)
 
 
             
@@ -274,32 +280,30 @@ class XFlushCompleteAutomation:
             # Step 3: Send to DingTalk
             success = self.send_clean_image(screenshot_path, access_token, media_id)
             if not success:
-                print("💥 Automation failed at DingTalk sending step")
+                logger.error("💥 Automation failed at DingTalk sending step")
                 return False
             
-            print("-" * 30)
             
             # Step 4: Optional media cleanup
             if cleanup_media:
                 # Wait a bit to ensure message is delivered before deleting
-                print("⏳ Waiting 5 seconds before cleanup...")
+                logger.info("⏳ Waiting 5 seconds before cleanup...")
                 #time.sleep(3)
                 self.delete_media(media_id, access_token)
             else:
-                print("ℹ️ Media cleanup skipped - image remains in DingTalk storage")
+                logger.info("ℹ️ Media cleanup skipped - image remains in DingTalk storage")
             
-            print("-" * 50)
-            print("🎉 COMPLETE AUTOMATION SUCCESS!")
-            print("📱 Check your DingTalk group chat:")
-            print("   👀 You'll see the clean Trade Trends image")
-            print("   🖼️ Perfect display with no buttons or clutter")
+            logger.info("🎉 COMPLETE AUTOMATION SUCCESS!")
+            logger.info("📱 Check your DingTalk group chat:")
+            logger.info("   👀 You'll see the clean Trade Trends image")
+            logger.info("   🖼️ Perfect display with no buttons or clutter")
             if cleanup_media:
-                print("   🗑️ Media automatically cleaned up from DingTalk storage")
+                logger.info("   🗑️ Media automatically cleaned up from DingTalk storage")
             
             return True
             
         except Exception as e:
-            print(f"💥 Complete automation error: {e}")
+            logger.error("💥 Complete automation error: %s", e)
             return False
     
     def run_statistics_automation(self, cleanup_media=True, headless=False):
@@ -310,8 +314,11 @@ def main():
     parser = argparse.ArgumentParser(description="Complete XFlush Trade Trends Automation with Media Cleanup")
     parser.add_argument("--no-cleanup", action="store_true", help="Don't delete media from DingTalk storage")
     parser.add_argument("--test", help="Test mode - use existing screenshot file")
+    add_logging_arguments(parser)
     
     args = parser.parse_args()
+    configure_from_args(args)
+    enforce_retention()
     
     automation = XFlushCompleteAutomation(
         'dingih5yqjdxxw8ghaqe',
@@ -320,7 +327,7 @@ def main():
     
     if args.test:
         # Test mode with existing screenshot
-        print("🧪 Running in test mode...")
+        logger.info("🧪 Running in test mode...")
         try:
             access_token = automation.get_access_token()
             media_id = automation.upload_media(args.test, access_token)
@@ -330,16 +337,16 @@ def main():
                 #time.sleep(3)
                 automation.delete_media(media_id, access_token)
                 
-            print("✅ Test completed!")
+            logger.info("✅ Test completed!")
         except Exception as e:
-            print(f"❌ Test failed: {e}")
+            logger.error("❌ Test failed: %s", e)
     else:
         # Full automation
         success = automation.run_complete_automation(cleanup_media=not args.no_cleanup)
         if success:
-            print("\n✨ Automation completed successfully!")
+            logger.info("✨ Automation completed successfully!")
         else:
-            print("\n💥 Automation failed!")
+            logger.error("💥 Automation failed!")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Debug Artifacts
+DOM and screenshot of the browser when a pipeline step fails (or when a
+sampled run asks for one), stored compressed and content-addressed so an
+identical page or screenshot is kept once however many captures reference it.
+Layout:
+
+    debug/blobs/<sha256[:2]>/<sha256>.html.zst   DOM (zstd, or .html.gz without zstandard)
+    debug/blobs/<sha256[:2]>/<sha256>.png        screenshot (PNG is already deflated)
+    debug/index.json                             captures + blob sizes
+
+The store is bounded by MAX_DEBUG_BYTES / MAX_DEBUG_CAPTURES: the oldest
+captures are dropped first, then every blob no remaining capture references.
+Index updates (and the blob writes / deletes they record) happen under a flock
+on index.json.lock, so parallel workers never drop each other's captures.
+Sampling: TRADETREND_DEBUG_SAMPLE=0.05 captures 5% of healthy runs as well.
+zstd needs the optional zstandard package (pip install zstandard).
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import hashlib
+import argparse
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from pipeline_logging import get_logger
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DEBUG_DIR = os.path.join(project_root, "debug")
+
+# Rotation bounds (stored bytes, i.e. after compression and deduplication)
+MAX_DEBUG_BYTES = 100 * 1024 * 1024
+MAX_DEBUG_CAPTURES = 200
+
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+
+logger = get_logger(__name__)
+
+
+def sample_rate_from_env(default=0.0):
+    try:
+        return min(max(float(os.environ.get("TRADETREND_DEBUG_SAMPLE", default)), 0.0), 1.0)
+    except ValueError:
+        return default
+
+
+def compress(data):
+    """(codec, payload) - zstd when available, gzip otherwise"""
+    if zstandard is not None:
+        return 'zst', zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return 'gz', gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def decompress(codec, payload):
+    if codec == 'zst':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read this capture: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == 'gz':
+        return gzip.decompress(payload)
+    return payload
+
+
+class DebugArtifactStore:
+    def __init__(self, root=None, max_bytes=MAX_DEBUG_BYTES, max_captures=MAX_DEBUG_CAPTURES, sample_rate=None):
+        self.root = root or DEFAULT_DEBUG_DIR
+        self.max_bytes = max_bytes
+        self.max_captures = max_captures
+        self.sample_rate = sample_rate_from_env() if sample_rate is None else sample_rate
+        self.index_file = os.path.join(self.root, "index.json")
+
+    def should_sample(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'captures': {}, 'blobs': {}}
+
+    def _locked(self):
+        """Exclusive lock around load -> put -> rotate -> save of the index"""
+        from history_store import locked
+
+        return locked(self.index_file)
+
+    def _save_index(self, index):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_file, self.index_file)
+
+    def _put_blob(self, index, data, ext, compressible=True):
+        """Store data under its sha256 unless an identical blob exists; returns the asset entry"""
+        digest = hashlib.sha256(data).hexdigest()
+        blob = index['blobs'].get(digest)
+        if blob is None or not os.path.exists(os.path.join(self.root, blob['path'])):
+            codec, payload = compress(data) if compressible else ('raw', data)
+            relative = os.path.join("blobs", digest[:2], f"{digest}.{ext}" + (f".{codec}" if codec != 'raw' else ""))
+            path = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            blob = {'path': relative, 'codec': codec, 'bytes': len(data), 'stored_bytes': len(payload)}
+            index['blobs'][digest] = blob
+            deduplicated = False
+        else:
+            deduplicated = True
+        return {'sha256': digest, 'bytes': blob['bytes'], 'deduplicated': deduplicated}
+
+    def capture(self, driver, stage, reason='failure', error=None, trace_id=None):
+        """
+        Store the driver's DOM and screenshot; returns the capture id, or None when nothing could be read.
+        Never raises - a broken debug capture must not hide the original failure.
+        """
+        if driver is None:
+            return None
+        try:
+            assets = {}
+            try:
+                assets['dom'] = (driver.page_source.encode('utf-8'), 'html', True)
+            except Exception as e:
+                logger.debug("DOM not captured for %s: %s", stage, e)
+            try:
+                assets['screenshot'] = (driver.get_screenshot_as_png(), 'png', False)
+            except Exception as e:
+                logger.debug("Screenshot not captured for %s: %s", stage, e)
+            if not assets:
+                return None
+            try:
+                url = driver.current_url
+            except Exception:
+                url = None
+
+            with self._locked():
+                index = self._load_index()
+                capture_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{stage}"
+                while capture_id in index['captures']:
+                    capture_id += "_"
+                entry = {
+                    'stage': stage,
+                    'reason': reason,
+                    'error': str(error) if error else None,
+                    'url': url,
+                    'trace_id': trace_id,
+                    'captured_at': time.time(),
+                    'assets': {name: self._put_blob(index, data, ext, compressible)
+                               for name, (data, ext, compressible) in assets.items()},
+                }
+                index['captures'][capture_id] = entry
+                self._rotate(index, keep=capture_id)
+                self._save_index(index)
+
+            reused = [name for name, asset in entry['assets'].items() if asset['deduplicated']]
+            logger.info("🐞 Debug capture %s saved (%s)%s", capture_id, ", ".join(entry['assets']),
+                        f", reused: {', '.join(reused)}" if reused else "")
+            return capture_id
+        except Exception as e:
+            logger.warning("⚠️ Debug capture for %s failed: %s", stage, e)
+            return None
+
+    def _rotate(self, index, keep=None):
+        """Drop the oldest captures (never `keep`) until both bounds hold, then delete unreferenced blobs"""
+        captures, blobs = index['captures'], index['blobs']
+
+        def referenced():
+            return {asset['sha256'] for entry in captures.values() for asset in entry['assets'].values()}
+
+        def stored_bytes(digests):
+            return sum(blobs[digest]['stored_bytes'] for digest in digests if digest in blobs)
+
+        live = referenced()
+        total = stored_bytes(live)
+        for capture_id in sorted(captures, key=lambda c: captures[c]['captured_at']):
+            if len(captures) <= self.max_captures and total <= self.max_bytes:
+                break
+            if capture_id == keep:
+                continue
+            del captures[capture_id]
+            live = referenced()
+            total = stored_bytes(live)
+            logger.info("🗑️ Rotated debug capture %s", capture_id)
+
+        for digest in set(blobs) - live:
+            try:
+                os.remove(os.path.join(self.root, blobs.pop(digest)['path']))
+            except OSError:
+                pass
+
+    def captures(self):
+        return self._load_index()['captures']
+
+    def extract(self, capture_id, output_dir):
+        """Decompress a capture's assets into output_dir; returns the written paths"""
+        index = self._load_index()
+        entry = index['captures'].get(capture_id)
+        if entry is None:
+            raise KeyError(f"Unknown debug capture: {capture_id}")
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for name, asset in entry['assets'].items():
+            blob = index['blobs'][asset['sha256']]
+            with open(os.path.join(self.root, blob['path']), 'rb') as f:
+                data = decompress(blob['codec'], f.read())
+            path = os.path.join(output_dir, f"{capture_id}_{name}.{'png' if name == 'screenshot' else 'html'}")
+            with open(path, 'wb') as f:
+                f.write(data)
+            paths.append(path)
+        return paths
+
+    def stats(self):
+        index = self._load_index()
+        logical = sum(asset['bytes'] for entry in index['captures'].values() for asset in entry['assets'].values())
+        stored = sum(blob['stored_bytes'] for blob in index['blobs'].values())
+        return {'captures': len(index['captures']), 'blobs': len(index['blobs']),
+                'logical_bytes': logical, 'stored_bytes': stored}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Failure-time DOM / screenshot captures')
+    parser.add_argument('--dir', default=None, help=f'Debug store (default: {DEFAULT_DEBUG_DIR})')
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('list', help='List captures (default)')
+    extract = sub.add_parser('extract', help='Write a capture back out as .html / .png')
+    extract.add_argument('capture_id')
+    extract.add_argument('--output', default='.', help='Output directory (default: current directory)')
+    prune = sub.add_parser('prune', help='Apply the rotation bounds now')
+    prune.add_argument('--max-mb', type=float, default=MAX_DEBUG_BYTES / 2**20)
+    prune.add_argument('--max-captures', type=int, default=MAX_DEBUG_CAPTURES)
+    args = parser.parse_args()
+
+    store = DebugArtifactStore(args.dir)
+    if args.command == 'extract':
+        for path in store.extract(args.capture_id, args.output):
+            print(f"📄 {path}")
+        return 0
+    if args.command == 'prune':
+        store.max_bytes, store.max_captures = int(args.max_mb * 2**20), args.max_captures
+        with store._locked():
+            index = store._load_index()
+            store._rotate(index)
+            store._save_index(index)
+
+    for capture_id, entry in sorted(store.captures().items(), key=lambda item: item[1]['captured_at']):
+        print(f"{capture_id:<40} {entry['reason']:<8} {', '.join(entry['assets']):<16} {entry.get('error') or ''}")
+    stats = store.stats()
+    print(f"🗂️  {stats['captures']} captures, {stats['blobs']} blobs: {stats['logical_bytes'] / 2**20:.1f} MB "
+          f"captured, {stats['stored_bytes'] / 2**20:.1f} MB stored in {store.root}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
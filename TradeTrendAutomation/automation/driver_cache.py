@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Cached chromedriver Resolution
+webdriver.Chrome() without a service path runs Selenium Manager on every start,
+which probes the installed browser, looks up matching driver versions and may
+go to the network. The driver is resolved once instead (at image build via
+`driver_cache.py --resolve`, or on the first run) and recorded in
+cache/chromedriver.json with its version and the Chrome binary it matches.
+
+Startup validation is two os.stat() calls and a small JSON read: the driver
+must still be the same file, and the Chrome binary must be unchanged. Only
+when Chrome's file changed is `chrome --version` run; the driver is
+rediscovered only if Chrome's major version moved.
+
+Order of discovery: TRADETREND_CHROMEDRIVER (used as-is, never cached), a
+chromedriver on PATH whose major version matches Chrome, then Selenium Manager.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+
+from pipeline_logging import get_logger
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_FILE = os.path.join(project_root, "cache", "chromedriver.json")
+DRIVER_ENV = "TRADETREND_CHROMEDRIVER"
+CHROME_ENV = "TRADETREND_CHROME_BINARY"
+
+CHROME_NAMES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser")
+VERSION_TIMEOUT_SECONDS = 10
+
+_VERSION = re.compile(r'(\d+)\.\d+\.\d+(?:\.\d+)?')
+
+logger = get_logger(__name__)
+
+
+def _file_signature(path):
+    """(inode, size, mtime_ns) of the file behind `path`; None when it is gone"""
+    try:
+        stat = os.stat(os.path.realpath(path))
+    except OSError:
+        return None
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+def binary_version(path):
+    """'120.0.6099.109' from `path --version`, or None"""
+    try:
+        result = subprocess.run([path, '--version'], capture_output=True, text=True,
+                                timeout=VERSION_TIMEOUT_SECONDS, check=False)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION.search(result.stdout)
+    return match.group(0) if match else None
+
+
+def major(version):
+    return int(version.split('.')[0]) if version else None
+
+
+def find_chrome():
+    """Chrome binary path: TRADETREND_CHROME_BINARY, else the first CHROME_NAMES on PATH"""
+    if os.environ.get(CHROME_ENV):
+        return os.environ[CHROME_ENV]
+    for name in CHROME_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def _selenium_manager_driver():
+    """Driver path from Selenium Manager (the lookup webdriver.Chrome() would do on every start)"""
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+    return SeleniumManager().driver_location(Options())
+
+
+class ChromeDriverCache:
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_CACHE_FILE
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, entry):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_file, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def validate(self, entry):
+        """
+        True when the cached driver can be used as-is. A changed Chrome file with the same
+        major version only refreshes the recorded signature (one `chrome --version`).
+        """
+        if not entry or _file_signature(entry['driver_path']) != entry['driver_signature']:
+            return False
+        if not os.access(entry['driver_path'], os.X_OK):
+            return False
+        chrome_path = entry.get('chrome_path')
+        if chrome_path is None or _file_signature(chrome_path) == entry['chrome_signature']:
+            return True
+        version = binary_version(chrome_path)
+        if version is None or major(version) != major(entry['chrome_version']):
+            logger.info("🔄 Chrome changed (%s -> %s); rediscovering chromedriver", entry['chrome_version'], version)
+            return False
+        entry.update(chrome_version=version, chrome_signature=_file_signature(chrome_path))
+        self._save(entry)
+        return True
+
+    def discover(self):
+        """Find a driver for the installed Chrome and record it; returns the cache entry"""
+        chrome_path = find_chrome()
+        chrome_version = binary_version(chrome_path) if chrome_path else None
+
+        driver_path, source = shutil.which('chromedriver'), 'path'
+        driver_version = binary_version(driver_path) if driver_path else None
+        if driver_path is None or (chrome_version and major(driver_version) != major(chrome_version)):
+            if driver_path:
+                logger.info("chromedriver on PATH is %s, Chrome is %s; asking Selenium Manager",
+                            driver_version, chrome_version)
+            driver_path, source = _selenium_manager_driver(), 'selenium-manager'
+            driver_version = binary_version(driver_path)
+
+        entry = {
+            'driver_path': os.path.abspath(driver_path),
+            'driver_version': driver_version,
+            'driver_signature': _file_signature(driver_path),
+            'chrome_path': chrome_path,
+            'chrome_version': chrome_version,
+            'chrome_signature': _file_signature(chrome_path) if chrome_path else None,
+            'source': source,
+            'resolved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        self._save(entry)
+        logger.info("🧩 chromedriver %s (%s) for Chrome %s cached in %s",
+                    driver_version, driver_path, chrome_version, self.path)
+        return entry
+
+    def resolve(self, refresh=False):
+        """(driver path, how it was found: 'env' | 'cache' | 'path' | 'selenium-manager')"""
+        if os.environ.get(DRIVER_ENV):
+            return os.environ[DRIVER_ENV], 'env'
+        if not refresh:
+            entry = self._load()
+            if self.validate(entry):
+                return entry['driver_path'], 'cache'
+        entry = self.discover()
+        return entry['driver_path'], entry['source']
+
+
+CHROMEDRIVER = ChromeDriverCache()
+
+
+def resolve_chromedriver(refresh=False):
+    """
+    Driver path for webdriver.Chrome's Service, or (None, 'unresolved') when discovery
+    fails - Selenium then falls back to its own per-start lookup. Never raises.
+    """
+    try:
+        return CHROMEDRIVER.resolve(refresh=refresh)
+    except Exception as e:
+        logger.warning("⚠️ chromedriver resolution failed, leaving it to Selenium Manager: %s", e)
+        return None, 'unresolved'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resolve and cache the chromedriver matching the installed Chrome')
+    parser.add_argument('--resolve', action='store_true', help='Rediscover now (e.g. at image build) and cache it')
+    parser.add_argument('--clear', action='store_true', help='Forget the cached driver')
+    args = parser.parse_args()
+
+    cache = ChromeDriverCache()
+    if args.clear:
+        cache.clear()
+        print(f"🗑️ chromedriver cache cleared: {cache.path}")
+        return 0
+    if args.resolve:
+        entry = cache.discover()
+    else:
+        entry = cache._load()
+        if not cache.validate(entry):
+            print(f"ℹ️ No valid cached chromedriver in {cache.path}; run with --resolve")
+            return 1
+    print(f"🧩 chromedriver {entry['driver_version']}: {entry['driver_path']} ({entry['source']}, {entry['resolved_at']})")
+    print(f"   Chrome {entry['chrome_version']}: {entry['chrome_path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
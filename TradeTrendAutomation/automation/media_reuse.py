@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+DingTalk Media Reuse
+Skips the chart upload when the new screenshot looks the same as one uploaded
+recently. Each upload is recorded with a 64-bit perceptual hash (DCT pHash of
+the 32x32 grayscale image), a 128x64 grayscale thumbnail, the image size, the
+DingTalk media_id and an expiry. A later chart reuses that media_id when its
+pHash is within PHASH_THRESHOLD bits of a live entry and no thumbnail pixel
+differs by more than MAX_PIXEL_DELTA.
+
+The thumbnail check is needed because the pHash alone is too coarse for these
+charts: captures minutes apart, with a visibly moved line and new axis labels,
+can hash 0-2 bits apart. Rendering noise (antialiasing, recompression) moves a
+box-filtered thumbnail pixel by at most ~5 levels; a changed chart by 20+.
+
+Cache file: cache/media_reuse.json (newest MAX_ENTRIES uploads).
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+import argparse
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_FILE = os.path.join(project_root, "cache", "media_reuse.json")
+
+# pHash prefilter: bits out of 64 that may differ
+PHASH_THRESHOLD = 6
+# Thumbnail verification: largest allowed per-pixel difference (0-255)
+MAX_PIXEL_DELTA = 10
+THUMBNAIL_SIZE = (128, 64)
+
+# Uploaded media is temporary on DingTalk's side; only reuse ids well inside their lifetime
+MEDIA_TTL_SECONDS = 24 * 60 * 60
+EXPIRY_MARGIN_SECONDS = 10 * 60
+MAX_ENTRIES = 20
+
+HASH_SIZE = 8
+SAMPLE_SIZE = 32
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis, so dct(x) = M @ x"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT = _dct_matrix(SAMPLE_SIZE)
+
+
+def perceptual_hash(image):
+    """pHash of a PIL image as 16 hex chars"""
+    from PIL import Image
+
+    pixels = np.asarray(image.convert('L').resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.LANCZOS), dtype=np.float64)
+    coefficients = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    # The DC term only says how bright the image is; leave it out of the median
+    bits = coefficients > np.median(coefficients[1:])
+    return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}"
+
+
+def thumbnail(image, size=THUMBNAIL_SIZE):
+    """Box-filtered grayscale thumbnail as a uint8 array"""
+    from PIL import Image
+
+    return np.asarray(image.convert('L').resize(size, Image.BOX), dtype=np.uint8)
+
+
+def _encode_thumbnail(pixels):
+    return base64.b64encode(pixels.tobytes()).decode('ascii')
+
+
+def _decode_thumbnail(data, size=THUMBNAIL_SIZE):
+    return np.frombuffer(base64.b64decode(data), dtype=np.uint8).reshape(size[1], size[0])
+
+
+def hamming(hash_a, hash_b):
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
+
+
+class MediaReuseCache:
+    def __init__(self, path=None, threshold=PHASH_THRESHOLD, max_pixel_delta=MAX_PIXEL_DELTA,
+                 ttl=MEDIA_TTL_SECONDS, margin=EXPIRY_MARGIN_SECONDS, max_entries=MAX_ENTRIES):
+        self.path = path or DEFAULT_CACHE_FILE
+        self.threshold = threshold
+        self.max_pixel_delta = max_pixel_delta
+        self.ttl = ttl
+        self.margin = margin
+        self.max_entries = max_entries
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _save(self, entries):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_file, self.path)
+
+    @staticmethod
+    def fingerprint(image_path):
+        """{'phash', 'thumbnail', 'size', 'sha256'} of an image file - needs Pillow"""
+        from PIL import Image
+
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        with Image.open(image_path) as image:
+            return {
+                'phash': perceptual_hash(image),
+                'thumbnail': _encode_thumbnail(thumbnail(image)),
+                'size': list(image.size),
+                'sha256': hashlib.sha256(data).hexdigest(),
+            }
+
+    def matches(self, entry, fingerprint):
+        """(matched, pHash distance, largest thumbnail pixel delta)"""
+        if entry['size'] != fingerprint['size']:
+            return False, None, None
+        if entry['sha256'] == fingerprint['sha256']:
+            return True, 0, 0
+        distance = hamming(entry['phash'], fingerprint['phash'])
+        if distance > self.threshold:
+            return False, distance, None
+        delta = int(np.abs(_decode_thumbnail(entry['thumbnail']).astype(np.int16)
+                           - _decode_thumbnail(fingerprint['thumbnail'])).max())
+        return delta <= self.max_pixel_delta, distance, delta
+
+    def lookup(self, fingerprint, now=None):
+        """Closest live matching entry, with its 'distance' and 'pixel_delta'; else None"""
+        now = now or time.time()
+        best = None
+        for entry in self._load():
+            if entry['expires_at'] - self.margin <= now:
+                continue
+            matched, distance, delta = self.matches(entry, fingerprint)
+            if matched and (best is None or (distance, delta) < (best['distance'], best['pixel_delta'])):
+                best = dict(entry, distance=distance, pixel_delta=delta)
+        return best
+
+    def record(self, fingerprint, media_id, now=None):
+        """Remember an upload; expired and surplus entries are dropped"""
+        now = now or time.time()
+        entries = [entry for entry in self._load()
+                   if entry['expires_at'] > now and entry['media_id'] != media_id]
+        entries.append(dict(fingerprint, media_id=media_id, uploaded_at=now, expires_at=now + self.ttl))
+        self._save(entries[-self.max_entries:])
+
+    def invalidate(self, media_id):
+        """Forget a media_id DingTalk no longer accepts"""
+        self._save([entry for entry in self._load() if entry['media_id'] != media_id])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perceptual hashes of chart screenshots / DingTalk media reuse cache')
+    parser.add_argument('images', nargs='*', help='Print the pHash of these images and their best cache match')
+    parser.add_argument('--forget', metavar='MEDIA_ID', help='Stop reusing one media_id (e.g. it no longer renders)')
+    parser.add_argument('--clear', action='store_true', help='Forget every recorded upload')
+    args = parser.parse_args()
+
+    cache = MediaReuseCache()
+    if args.clear:
+        cache._save([])
+        print(f"🗑️ Media reuse cache cleared: {cache.path}")
+        return 0
+    if args.forget:
+        cache.invalidate(args.forget)
+        print(f"🗑️ Forgot media {args.forget}")
+        return 0
+    for image in args.images:
+        fingerprint = cache.fingerprint(image)
+        match = cache.lookup(fingerprint)
+        print(f"{fingerprint['phash']}  {image}  "
+              + (f"-> {match['media_id']} ({match['distance']} bits, max pixel delta {match['pixel_delta']})"
+                 if match else "-> no match"))
+    if not args.images:
+        entries = cache._load()
+        now = time.time()
+        for entry in entries:
+            print(f"{entry['phash']}  {entry['media_id']}  expires in {(entry['expires_at'] - now) / 3600:.1f} h")
+        print(f"🗂️  {len(entries)} recorded uploads in {cache.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
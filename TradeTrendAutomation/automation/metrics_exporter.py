@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Prometheus Exporter
+Latest per-metric TPS figures plus pipeline timings (step durations, capture
+failures, DingTalk send latency) in the classic Prometheus text format, which
+is what node_exporter's textfile collector parses. Batch runs write a
+textfile-collector file; tps_service.py serves the same data on /metrics.
+State is persisted next to the .prom file so counters and histograms stay
+cumulative across batch runs; parallel runs merge it under a file lock.
+persist() moves the not-yet-persisted counts into that state, so it can be
+called repeatedly (e.g. by a long-lived process) without counting twice.
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TEXTFILE = os.path.join(project_root, "metrics", "tradetrend.prom")
+
+# Step durations range from sub-second parsing to 30s+ browser stages
+STEP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+SEND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+
+
+def _label_key(labels):
+    return json.dumps(sorted(labels.items()))
+
+
+def _format_labels(label_key, extra=None):
+    pairs = json.loads(label_key) + (extra or [])
+    if not pairs:
+        return ""
+    escaped = []
+    for key, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _merge(metric, into, samples, overwrite_gauges=True):
+    """Fold `samples` of `metric` into the samples dict `into`: counters / histograms add up, gauges replace"""
+    for key, value in samples.items():
+        if key not in into:
+            into[key] = json.loads(json.dumps(value))
+        elif isinstance(metric, Gauge):
+            if overwrite_gauges:
+                into[key] = value
+        elif isinstance(metric, Counter):
+            into[key] += value
+        elif isinstance(metric, Histogram) and len(value['buckets']) == len(into[key]['buckets']):
+            current = into[key]
+            current['buckets'] = [a + b for a, b in zip(current['buckets'], value['buckets'])]
+            current['sum'] += value['sum']
+            current['count'] += value['count']
+    return into
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, registry):
+        self.name = name
+        self.documentation = documentation
+        self.samples = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def render(self, samples=None):
+        samples = self.samples if samples is None else samples
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for label_key in sorted(samples):
+            lines.append(f"{self.name}{_format_labels(label_key)} {_format_value(samples[label_key])}")
+        return lines
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self.samples[_label_key(labels)] = float(value)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            key = _label_key(labels)
+            self.samples[key] = self.samples.get(key, 0.0) + amount
+
+    def render(self, samples=None):
+        # Classic text format: the family is named after its samples, <name>_total
+        samples = self.samples if samples is None else samples
+        family = f"{self.name}_total"
+        lines = [f"# HELP {family} {self.documentation}", f"# TYPE {family} counter"]
+        for label_key in sorted(samples):
+            lines.append(f"{family}{_format_labels(label_key)} {_format_value(samples[label_key])}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, registry, buckets=STEP_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, registry)
+
+    def observe(self, value, **labels):
+        with self._lock:
+            key = _label_key(labels)
+            sample = self.samples.setdefault(key, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    sample['buckets'][i] += 1
+            sample['sum'] += value
+            sample['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self, samples=None):
+        samples = self.samples if samples is None else samples
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_key in sorted(samples):
+            sample = samples[label_key]
+            for bound, count in zip(self.buckets, sample['buckets']):
+                lines.append(f"{self.name}_bucket{_format_labels(label_key, [['le', _format_value(bound)]])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(label_key, [['le', '+Inf']])} {sample['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(label_key)} {_format_value(sample['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(label_key)} {sample['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.samples = {}
+
+    def render(self, state=None):
+        """Exposition of the live samples, or of `state` ({metric name: samples}) when given"""
+        lines = []
+        for metric in self.metrics:
+            samples = metric.samples if state is None else state.get(metric.name, {})
+            if samples:
+                lines.extend(metric.render(samples))
+        return "\n".join(lines) + "\n"
+
+    def state_file(self, textfile):
+        return os.path.splitext(textfile)[0] + "_state.json"
+
+    def read_state(self, textfile=DEFAULT_TEXTFILE):
+        try:
+            with open(self.state_file(textfile), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load_state(self, textfile=DEFAULT_TEXTFILE):
+        """Merge persisted samples into the live ones (live gauges win); used to serve the batch state"""
+        state = self.read_state(textfile)
+        for metric in self.metrics:
+            with metric._lock:
+                _merge(metric, metric.samples, state.get(metric.name, {}), overwrite_gauges=False)
+
+    def write_textfile(self, textfile=DEFAULT_TEXTFILE, state=None):
+        """Persist state (default: the live samples) and atomically write the textfile-collector output"""
+        os.makedirs(os.path.dirname(textfile), exist_ok=True)
+        if state is None:
+            state = {metric.name: metric.samples for metric in self.metrics}
+        for path, content in ((self.state_file(textfile), json.dumps(state)), (textfile, self.render(state))):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+    def _take_pending(self):
+        """{name: samples} to persist: counters / histograms are moved out (so they are added once), gauges copied"""
+        pending = {}
+        for metric in self.metrics:
+            with metric._lock:
+                if isinstance(metric, Gauge):
+                    pending[metric.name] = dict(metric.samples)
+                else:
+                    pending[metric.name], metric.samples = metric.samples, {}
+        return pending
+
+    def persist(self, textfile=None):
+        """
+        Add the counts gathered since the last persist() to the saved state and write it back as
+        one step under `<textfile>.lock`, so concurrent batch runs do not lose each other's
+        increments. Counters and histograms restart from zero in memory afterwards.
+        """
+        from history_store import locked
+
+        textfile = textfile or DEFAULT_TEXTFILE
+        with locked(textfile):
+            pending = self._take_pending()
+            try:
+                state = self.read_state(textfile)
+                for metric in self.metrics:
+                    _merge(metric, state.setdefault(metric.name, {}), pending[metric.name])
+                self.write_textfile(textfile, state)
+            except BaseException:
+                # Not written: hand the counts back so a later persist() still records them
+                for metric in self.metrics:
+                    if not isinstance(metric, Gauge):
+                        with metric._lock:
+                            _merge(metric, metric.samples, pending[metric.name])
+                raise
+
+
+REGISTRY = Registry()
+
+TPS = Gauge("tradetrend_tps", "Latest TPS per metric", REGISTRY)
+MAX = Gauge("tradetrend_max", "Latest per-bucket max per metric", REGISTRY)
+AVERAGE = Gauge("tradetrend_average", "Latest per-bucket average per metric", REGISTRY)
+COUNT = Gauge("tradetrend_count", "Bucket count of the latest capture per metric", REGISTRY)
+LAST_CAPTURE = Gauge("tradetrend_last_capture_timestamp_seconds", "Unix time of the latest capture", REGISTRY)
+STEP_DURATION = Histogram("tradetrend_step_duration_seconds", "Duration of each pipeline step", REGISTRY)
+CAPTURE_FAILURES = Counter("tradetrend_capture_failures", "Pipeline failures by stage", REGISTRY)
+DINGTALK_SEND = Histogram("tradetrend_dingtalk_send_duration_seconds", "DingTalk API call latency",
+                          REGISTRY, buckets=SEND_BUCKETS)
+MEDIA_UPLOADS = Counter("tradetrend_media_uploads", "Chart images uploaded vs. reused (media_reuse.py)", REGISTRY)
+
+
+def record_tps(tps_data, capture_time=None):
+    """Set the per-metric gauges from extract_statistics_and_calculate_tps() output"""
+    for item in tps_data or []:
+        metric = item.get('metric', 'Unknown')
+        for gauge, field in ((TPS, 'tps'), (MAX, 'max'), (AVERAGE, 'average'), (COUNT, 'count')):
+            if item.get(field) is not None:
+                gauge.set(item[field], metric=metric)
+    if tps_data:
+        LAST_CAPTURE.set(capture_time or time.time())
+
+
+def record_latest_from_history(history):
+    """Set the per-metric gauges from the newest capture in the history store"""
+    for metric in history.captures.metrics():
+        columns = history.captures.columns(metric, ['timestamp', 'tps', 'max', 'average', 'count'])
+        if len(columns['timestamp']) == 0:
+            continue
+        item = {'metric': metric}
+        item.update({field: values[-1].item() for field, values in columns.items() if field != 'timestamp'})
+        record_tps([item], columns['timestamp'][-1].item())
+
+
+_snapshot_lock = threading.Lock()
+
+
+def render_snapshot(history, textfile=DEFAULT_TEXTFILE):
+    """Exposition for a long-running scraper: last batch state plus the newest history rows"""
+    with _snapshot_lock:
+        REGISTRY.reset()
+        REGISTRY.load_state(textfile)
+        record_latest_from_history(history)
+        return REGISTRY.render()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write TPS metrics in Prometheus textfile format')
+    parser.add_argument('--textfile', default=DEFAULT_TEXTFILE, help='Output .prom file')
+    parser.add_argument('--print', action='store_true', help='Print the exposition instead of writing it')
+    args = parser.parse_args()
+
+    from tps_retention import TieredTPSHistory
+
+    if args.print:
+        print(render_snapshot(TieredTPSHistory(), args.textfile), end="")
+    else:
+        record_latest_from_history(TieredTPSHistory())
+        REGISTRY.persist(args.textfile)
+        print(f"📈 Metrics written to {args.textfile}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Pipeline Logging
+Levelled logging for the automation modules in place of bare print() calls.
+All pipeline loggers live under the "tradetrend" logger and write to stdout
+(Jenkins console) as text or JSON lines.
+
+    logger = get_logger(__name__)
+    logger.info("✅ Chart captured: %s", filename)
+    logger.debug("Trying selector: %s", selector)   # formatted only at DEBUG
+
+Per-selector attempts and per-row parse output are DEBUG, so the default
+INFO level skips their formatting entirely. Level and format come from
+configure_logging() (run_automation.py --verbose / --log-format) or the
+TRADETREND_LOG_LEVEL / TRADETREND_LOG_FORMAT environment variables.
+"""
+
+import os
+import sys
+import json
+import logging
+from datetime import datetime
+
+ROOT_LOGGER = "tradetrend"
+DEFAULT_LEVEL = "INFO"
+DEFAULT_FORMAT = "text"
+FORMATS = ("text", "json")
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class TextFormatter(logging.Formatter):
+    """`09:30:01 INFO    message` - close to the old print() output, plus time and level"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(message)s", datefmt="%H:%M:%S")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra` fields and the active tracing span are included"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        span = _current_span()
+        if span is not None:
+            entry['trace_id'] = span.trace_id
+            entry['span'] = span.name
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _current_span():
+    tracing = sys.modules.get('tracing')
+    if tracing is None:
+        return None
+    span = tracing.current_span()
+    return span if isinstance(span, tracing.Span) else None
+
+
+class StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at emit time, so redirect_stdout() still captures it"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """
+    (Re)configure the "tradetrend" logger; returns it
+    level: name or number (default TRADETREND_LOG_LEVEL or INFO)
+    fmt: "text" or "json" (default TRADETREND_LOG_FORMAT or text)
+    stream: fixed stream instead of the current sys.stdout
+    """
+    level = level or os.environ.get("TRADETREND_LOG_LEVEL", DEFAULT_LEVEL)
+    fmt = (fmt or os.environ.get("TRADETREND_LOG_FORMAT", DEFAULT_FORMAT)).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown log format '{fmt}' (expected one of {', '.join(FORMATS)})")
+
+    handler = logging.StreamHandler(stream) if stream is not None else StdoutHandler()
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    for old in list(logger.handlers):
+        logger.removeHandler(old)
+    logger.addHandler(handler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    return logger
+
+
+def get_logger(name):
+    """Logger under "tradetrend"; configures the defaults on first use"""
+    if not logging.getLogger(ROOT_LOGGER).handlers:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def add_logging_arguments(parser):
+    """--verbose / --log-level / --log-format shared by the pipeline entry points"""
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='DEBUG logging: every selector attempt and parsed row')
+    parser.add_argument('--log-level', default=None,
+                        help=f'Log level (default: TRADETREND_LOG_LEVEL or {DEFAULT_LEVEL})')
+    parser.add_argument('--log-format', choices=FORMATS, default=None,
+                        help=f'Log format (default: TRADETREND_LOG_FORMAT or {DEFAULT_FORMAT})')
+    return parser
+
+
+def configure_from_args(args):
+    return configure_logging("DEBUG" if args.verbose else args.log_level, args.log_format)
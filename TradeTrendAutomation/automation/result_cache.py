@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Read-Through Result Cache
+Statistics and screenshots for time ranges that can no longer change, keyed by
+(dashboard, metric set, normalised range) and evicted LRU on disk.
+Layout: cache/results/<key>/{result.json,chart.png,statistics.png} + index.json
+Index updates (and the entry directory swaps / evictions they record) happen
+under a flock on index.json.lock, so parallel runs never drop each other's entries.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+
+from screenshot_retention import register_screenshot, screenshot_dir
+from pipeline_logging import get_logger
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(project_root, "cache", "results")
+
+# A range is only cached once it ended at least this long ago (late-arriving data settles)
+SETTLE_DELAY_SECONDS = 15 * 60
+
+# LRU bounds
+MAX_CACHE_ENTRIES = 500
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+logger = get_logger(__name__)
+
+
+class ResultCache:
+    def __init__(self, root=None, settle_delay=SETTLE_DELAY_SECONDS,
+                 max_entries=MAX_CACHE_ENTRIES, max_bytes=MAX_CACHE_BYTES):
+        self.root = root or DEFAULT_CACHE_DIR
+        self.settle_delay = settle_delay
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(self.root, "index.json")
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def key_for(dashboard, time_range, metrics=None):
+        """Stable key for a dashboard URL, metric set and (start, end) range"""
+        start, end = time_range
+        payload = {
+            'dashboard': dashboard,
+            'metrics': sorted(metrics) if metrics else '*',
+            'range': [start.replace(microsecond=0).isoformat(), end.replace(microsecond=0).isoformat()],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+    def is_cacheable(self, time_range, now=None):
+        """Only closed ranges that ended before the settle delay can be served from cache"""
+        if not time_range:
+            return False
+        now = now or datetime.now()
+        return time_range[1] + timedelta(seconds=self.settle_delay) <= now
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _locked(self):
+        """Exclusive lock around load -> change -> save of the index"""
+        from history_store import locked
+
+        return locked(self.index_file)
+
+    def _save_index(self, index):
+        tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_file, self.index_file)
+
+    def get(self, key, output_dir=None):
+        """
+        Return the cached result or None. Screenshots are copied to output_dir
+        (default: the managed screenshots directory) so callers may delete them after sending.
+        """
+        entry_dir = os.path.join(self.root, key)
+        result_file = os.path.join(entry_dir, "result.json")
+        if not os.path.exists(result_file):
+            return None
+        try:
+            with open(result_file, 'r') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        output_dir = output_dir or screenshot_dir()
+        os.makedirs(output_dir, exist_ok=True)
+        stamp = int(time.time())
+        for name, prefix in (('chart', 'trade_trends_chart'), ('statistics', 'statistics_info')):
+            cached_file = os.path.join(entry_dir, f"{name}.png")
+            if os.path.exists(cached_file):
+                target = os.path.join(output_dir, f"{prefix}_{stamp}.png")
+                shutil.copyfile(cached_file, target)
+                register_screenshot(target)
+                result[f'{name}_path'] = target
+            else:
+                result[f'{name}_path'] = None
+
+        with self._locked():
+            index = self._load_index()
+            if key in index:
+                index[key]['last_used'] = time.time()
+                self._save_index(index)
+        return result
+
+    def put(self, key, chart_path, stats_path, tps_data, statistics_text=None, meta=None):
+        """Store a result and evict least-recently-used entries beyond the bounds"""
+        entry_dir = os.path.join(self.root, key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        if chart_path and os.path.exists(chart_path):
+            shutil.copyfile(chart_path, os.path.join(tmp_dir, "chart.png"))
+        if stats_path and os.path.exists(stats_path):
+            shutil.copyfile(stats_path, os.path.join(tmp_dir, "statistics.png"))
+        with open(os.path.join(tmp_dir, "result.json"), 'w') as f:
+            json.dump(dict(meta or {}, tps_data=tps_data, statistics_text=statistics_text,
+                           cached_at=datetime.now().isoformat()), f, indent=2)
+
+        size = sum(os.path.getsize(os.path.join(tmp_dir, name)) for name in os.listdir(tmp_dir))
+        with self._locked():
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            index = self._load_index()
+            index[key] = {'last_used': time.time(), 'bytes': size}
+            self._evict(index)
+            self._save_index(index)
+
+    def _evict(self, index):
+        """Drop least-recently-used entries until both bounds hold"""
+        total = sum(entry['bytes'] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]['last_used']):
+            if len(index) <= self.max_entries and total <= self.max_bytes:
+                break
+            total -= index.pop(key)['bytes']
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            logger.info("🗑️ Evicted cached result %s", key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Result cache for closed historical ranges')
+    parser.add_argument('--clear', action='store_true', help='Remove every cached result')
+    args = parser.parse_args()
+
+    cache = ResultCache()
+    if args.clear:
+        shutil.rmtree(cache.root, ignore_errors=True)
+        print(f"🗑️ Result cache cleared: {cache.root}")
+        return
+
+    index = cache._load_index()
+    total = sum(entry['bytes'] for entry in index.values())
+    print(f"🗂️  {len(index)} cached results, {total / 1024 / 1024:.1f} MB in {cache.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Screenshot Retention
+Keeps the mounted screenshots/ volume bounded: per-pattern max files and max
+age, plus a total byte cap across every managed file (oldest deleted first).
+
+Only files the pipeline registered as it wrote them (register_screenshot) are
+managed; their sizes and mtimes live in screenshots/.retention.json. Anything
+else in the directory - including the screenshots tracked in git - is never
+deleted. Registered files are only re-stat'ed when the directory mtime moved
+(to drop ones removed by hand), so the startup pass is two stats + one small
+JSON read on a quiet volume; a full re-stat happens every FULL_SCAN_INTERVAL.
+Every read -> change -> save of the index holds a flock on .retention.json.lock
+and replaces the file atomically, so parallel runs never drop registrations.
+
+debug_before_stat_* snapshots are never touched: the replay server and the
+parser benchmark read them.
+"""
+
+import os
+import sys
+import json
+import time
+import fnmatch
+import argparse
+
+from pipeline_logging import get_logger
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SCREENSHOT_DIR = os.path.join(project_root, "screenshots")
+INDEX_NAME = ".retention.json"
+# Version 1 indexes also listed unregistered files found in the directory; they are discarded
+INDEX_VERSION = 2
+
+DAY = 24 * 60 * 60
+
+# pattern -> (max files, max age in seconds); the first matching pattern applies
+POLICIES = {
+    'trade_trends_with_timerange_*.png': (20, 7 * DAY),
+    'trade_trends_chart_*.png': (50, 7 * DAY),
+    'statistics_info_*.png': (50, 7 * DAY),
+}
+PROTECTED_PATTERNS = ('debug_before_stat_*', INDEX_NAME, f"{INDEX_NAME}.*")
+MAX_TOTAL_BYTES = 200 * 1024 * 1024
+
+# Files younger than this are left alone: another run may still be uploading them
+MIN_AGE_SECONDS = 10 * 60
+FULL_SCAN_INTERVAL = 6 * 60 * 60
+
+logger = get_logger(__name__)
+
+
+class ScreenshotRetention:
+    def __init__(self, directory=None, policies=None, max_total_bytes=MAX_TOTAL_BYTES,
+                 protected=PROTECTED_PATTERNS, min_age=MIN_AGE_SECONDS):
+        self.directory = directory or DEFAULT_SCREENSHOT_DIR
+        self.policies = POLICIES if policies is None else policies
+        self.max_total_bytes = max_total_bytes
+        self.protected = protected
+        self.min_age = min_age
+        self.index_file = os.path.join(self.directory, INDEX_NAME)
+
+    def policy_for(self, name):
+        """The (max files, max age) policy of a file name, or None for protected / unmanaged files"""
+        if any(fnmatch.fnmatch(name, pattern) for pattern in self.protected):
+            return None
+        for pattern in self.policies:
+            if fnmatch.fnmatch(name, pattern):
+                return pattern
+        return None
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+            if index.get('version') == INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+        return {'version': INDEX_VERSION, 'full_scan_at': 0, 'files': {}}
+
+    def _locked(self):
+        """Exclusive lock around load -> change -> save of the index"""
+        from history_store import locked
+
+        return locked(self.index_file)
+
+    def _saved_dir_mtime(self):
+        """Directory mtime stamped on the index when it was saved; 0 if saved out of sync, None without an index"""
+        try:
+            return os.stat(self.index_file).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _in_sync(self):
+        """True when nothing in the directory changed since the index was last saved"""
+        try:
+            return self._saved_dir_mtime() == os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return False
+
+    def _save_index(self, index, in_sync=True):
+        """
+        Temp file + rename, so readers never see a torn index. The rename moves the directory
+        mtime, so it is read afterwards and stamped on the index file itself as its mtime
+        (utime does not touch the directory); an index saved out of sync gets mtime 0.
+        """
+        index.pop('dir_mtime_ns', None)  # version 2 indexes written before the mtime stamp
+        tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_file, self.index_file)
+        dir_mtime_ns = os.stat(self.directory).st_mtime_ns if in_sync else 0
+        os.utime(self.index_file, ns=(dir_mtime_ns, dir_mtime_ns))
+
+    def _update(self, change):
+        """
+        Apply change(index) for a file we just wrote or deleted. An index that was in sync
+        stays in sync (a concurrent unregistered change is caught by the periodic full scan).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with self._locked():
+            in_sync = self._saved_dir_mtime() not in (None, 0)
+            index = self._load_index()
+            change(index)
+            self._save_index(index, in_sync=in_sync)
+
+    def register(self, path):
+        """Record a screenshot just written into the directory"""
+        name = os.path.basename(path)
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.directory) or self.policy_for(name) is None:
+            return
+        stat = os.stat(path)
+
+        def change(index):
+            index['files'][name] = [stat.st_size, stat.st_mtime]
+        self._update(change)
+
+    def forget(self, path):
+        """Record that a screenshot was deleted by its owner"""
+        name = os.path.basename(path)
+
+        def change(index):
+            index['files'].pop(name, None)
+        self._update(change)
+
+    def refresh(self, now=None, full=False):
+        """Registered files still on disk; re-stat'ed only when the directory mtime moved (or a full scan is due)"""
+        now = now or time.time()
+        in_sync = self._in_sync()
+        index = self._load_index()
+        if not os.path.isdir(self.directory):
+            return index
+        full = full or now - index['full_scan_at'] >= FULL_SCAN_INTERVAL
+        if not full and in_sync:
+            return index
+
+        # Unregistered files are deliberately not picked up: they may be tracked in git or belong to someone else
+        files = {}
+        for name in index['files']:
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            files[name] = [stat.st_size, stat.st_mtime]
+        index['files'] = files
+        if full:
+            index['full_scan_at'] = now
+        return index
+
+    def select_expired(self, files, now=None):
+        """Names to delete from {name: [bytes, mtime]}: age, then per-pattern count, then total bytes"""
+        now = now or time.time()
+        doomed = set()
+        by_pattern = {}
+        for name in files:
+            by_pattern.setdefault(self.policy_for(name), []).append(name)
+
+        for pattern, names in by_pattern.items():
+            if pattern is None:
+                continue
+            max_files, max_age = self.policies[pattern]
+            names.sort(key=lambda n: files[n][1], reverse=True)
+            for position, name in enumerate(names):
+                age = now - files[name][1]
+                if age < self.min_age:
+                    continue
+                if (max_age is not None and age > max_age) or (max_files is not None and position >= max_files):
+                    doomed.add(name)
+
+        total = sum(size for name, (size, _) in files.items() if name not in doomed)
+        for name in sorted(files, key=lambda n: files[n][1]):
+            if total <= self.max_total_bytes:
+                break
+            if name in doomed or now - files[name][1] < self.min_age:
+                continue
+            doomed.add(name)
+            total -= files[name][0]
+        return sorted(doomed, key=lambda n: files[n][1])
+
+    def enforce(self, now=None, full=False, dry_run=False):
+        """Delete whatever the policies expire; returns (deleted names, bytes freed)"""
+        if not os.path.isdir(self.directory):
+            return [], 0
+        if dry_run:
+            index = self.refresh(now, full)
+            doomed = self.select_expired(index['files'], now)
+            return doomed, sum(index['files'][name][0] for name in doomed)
+
+        freed = 0
+        with self._locked():
+            index = self.refresh(now, full)
+            doomed = self.select_expired(index['files'], now)
+            for name in doomed:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+                freed += index['files'].pop(name)[0]
+            self._save_index(index)
+        return doomed, freed
+
+
+SCREENSHOTS = ScreenshotRetention()
+
+
+def screenshot_dir():
+    """Directory new screenshots are written to (the managed one), created on demand"""
+    os.makedirs(SCREENSHOTS.directory, exist_ok=True)
+    return SCREENSHOTS.directory
+
+
+def use_screenshot_dir(directory):
+    """Write and manage screenshots in `directory` from now on (scratch / replay runs)"""
+    global SCREENSHOTS, DEFAULT_SCREENSHOT_DIR
+    DEFAULT_SCREENSHOT_DIR = directory
+    SCREENSHOTS = ScreenshotRetention(directory)
+
+
+def register_screenshot(path):
+    try:
+        SCREENSHOTS.register(path)
+    except OSError as e:
+        logger.debug("Screenshot %s not registered for retention: %s", path, e)
+
+
+def forget_screenshot(path):
+    try:
+        SCREENSHOTS.forget(path)
+    except OSError as e:
+        logger.debug("Screenshot %s not removed from the retention index: %s", path, e)
+
+
+def enforce_retention():
+    """Startup pass for the pipeline entry points; never raises"""
+    try:
+        deleted, freed = SCREENSHOTS.enforce()
+        if deleted:
+            logger.info("🗑️ Screenshot retention removed %s files (%.1f MB)", len(deleted), freed / 2**20)
+    except Exception as e:
+        logger.warning("⚠️ Screenshot retention skipped: %s", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply the screenshot retention policies')
+    parser.add_argument('--dir', default=None, help=f'Screenshot directory (default: {DEFAULT_SCREENSHOT_DIR})')
+    parser.add_argument('--full', action='store_true', help='Re-stat every registered file instead of trusting the index')
+    parser.add_argument('--dry-run', action='store_true', help='Only list what would be deleted')
+    parser.add_argument('--watch', type=float, metavar='SECONDS', default=None,
+                        help='Keep running, enforcing every SECONDS (background / sidecar use)')
+    args = parser.parse_args()
+
+    retention = ScreenshotRetention(args.dir)
+    while True:
+        deleted, freed = retention.enforce(full=args.full, dry_run=args.dry_run)
+        for name in deleted:
+            print(f"🗑️ {'Would delete' if args.dry_run else 'Deleted'}: {name}")
+        index = retention.refresh()
+        total = sum(size for size, _ in index['files'].values())
+        print(f"🗂️  {len(index['files'])} managed screenshots, {total / 2**20:.1f} MB "
+              f"({freed / 2**20:.1f} MB {'reclaimable' if args.dry_run else 'freed'}) in {retention.directory}")
+        if args.watch is None:
+            return 0
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Statistics Popup Parser
+Pure, browser-independent parsing of the chart statistics table text:
+
+  Column          Max        Min        Average    Total         Count
+  Trade Success   47,673.00  26779.00   3.7e4      4485861.00    121
+
+Single pass over the lines with precompiled patterns. Accepts thousands
+separators, signs, exponents and blank cells ('', '-', '--', 'N/A'), and
+returns typed StatisticsRow records.
+
+Rows are recognised by structure (a name followed by five numeric cells), not
+by UI language. The header, when present, only fixes the column order, and
+Chinese headers and metric names are mapped to the English ones so history
+stays keyed consistently whichever language the dashboard renders in.
+"""
+
+import re
+import sys
+import math
+import argparse
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+DEFAULT_BUCKET_SECONDS = 60
+# Counts are stored in an int64 column (tps_columnar)
+MAX_COUNT = 2**63 - 1
+
+# Cells the dashboard renders when a series has no data in the range
+BLANK_CELLS = frozenset(('', '-', '--', '—', 'n/a', 'na', 'null', 'nan'))
+
+_NUMBER = r'[-+−]?(?:(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?'
+_CELL = rf'(?:{_NUMBER}|--?|—|N/?A|null|NaN)'
+_VALID_NUMBER = re.compile(rf'^{_NUMBER}$')
+_ROW = re.compile(rf'^(.+?)\s+({_CELL})\s+({_CELL})\s+({_CELL})\s+({_CELL})\s+({_CELL})\s*$', re.IGNORECASE)
+_HEADER_TOKENS = re.compile(r'\s+')
+
+VALUE_FIELDS = ('max', 'min', 'average', 'total', 'count')
+
+# Header label -> field, for the English and Chinese dashboard UI
+HEADER_ALIASES = {
+    'column': ('column', 'name', 'metric', '列', '列名', '名称', '指标'),
+    'max': ('max', 'maximum', '最大值', '最大'),
+    'min': ('min', 'minimum', '最小值', '最小'),
+    'average': ('average', 'avg', 'mean', '平均值', '平均'),
+    'total': ('total', 'sum', '总计', '总和', '合计'),
+    'count': ('count', '计数', '个数', '次数', '数量'),
+}
+_HEADER_LOOKUP = {alias: field for field, aliases in HEADER_ALIASES.items() for alias in aliases}
+
+# Chinese metric names -> the English names used in tps_data.json and the history store
+METRIC_ALIASES = {
+    '交易成功': 'Trade Success',
+    '支付申请': 'Payment Apply',
+    '创建订单': 'Create Order',
+    '收银台咨询': 'Cashier Consult',
+    '收银咨询': 'Cashier Consult',
+}
+
+# Words that identify the statistics popup in either language (used when locating it in the page)
+STATISTICS_KEYWORDS = (
+    'statistics', 'column', 'max', 'min', 'average', 'total', 'count',
+    '统计', '最大值', '最小值', '平均值', '总计', '计数',
+) + tuple(dict.fromkeys(name.lower() for name in METRIC_ALIASES.values())) + tuple(METRIC_ALIASES)
+
+
+@dataclass
+class StatisticsRow:
+    metric: str
+    max: Optional[float]
+    min: Optional[float]
+    average: Optional[float]
+    total: Optional[float]
+    count: Optional[int]
+    tps: Optional[float]
+    raw_data: str
+
+    def to_dict(self):
+        """Legacy dict shape used by tps_data.json and the report"""
+        return asdict(self)
+
+
+def parse_number(cell):
+    """
+    '1,234.00' / '-5' / '1.2e5' -> float; blank markers and values beyond float range -> None;
+    anything else raises ValueError
+    """
+    cell = cell.strip()
+    if cell.lower() in BLANK_CELLS:
+        return None
+    if not _VALID_NUMBER.match(cell):
+        raise ValueError(f"not a number: {cell!r}")
+    value = float(cell.replace(',', '').replace('−', '-'))
+    return value if math.isfinite(value) else None
+
+
+def parse_count(value):
+    """Float count cell -> int; raises ValueError for fractional, negative or beyond-int64 counts"""
+    if value is None:
+        return None
+    if not value.is_integer() or not 0 <= value <= MAX_COUNT:
+        raise ValueError(f"not a valid count: {value!r}")
+    return int(value)
+
+
+def _split_cells(line):
+    """(metric, [5 value cells]) or None; tab-separated text keeps empty cells in place"""
+    if '\t' in line:
+        cells = line.split('\t')
+        if len(cells) >= 6:
+            metric = ' '.join(cell.strip() for cell in cells[:-5]).strip()
+            if metric:
+                return metric, cells[-5:]
+        line = ' '.join(cell for cell in cells if cell.strip())
+    match = _ROW.match(line)
+    if match is None:
+        return None
+    return match.group(1).strip(), list(match.groups()[1:])
+
+
+def canonical_metric(name):
+    return METRIC_ALIASES.get(name, name)
+
+
+def header_columns(line):
+    """
+    Value field order from a header line ('Column Max Min ...' / '列 最大值 最小值 ...'),
+    or None when the line is not a header
+    """
+    fields = [_HEADER_LOOKUP.get(token.lower()) for token in _HEADER_TOKENS.split(line.strip()) if token]
+    order = tuple(field for field in fields if field in VALUE_FIELDS)
+    if len(order) < 3:
+        return None
+    return order if sorted(order) == sorted(VALUE_FIELDS) else VALUE_FIELDS
+
+
+def parse_row(line, bucket_seconds=DEFAULT_BUCKET_SECONDS, columns=VALUE_FIELDS):
+    """One data line -> StatisticsRow, or None when the line is not a statistics row"""
+    line = line.strip(' \r\n')  # keep tabs: trailing empty cells are still cells
+    split = _split_cells(line)
+    if split is None:
+        return None
+    metric, cells = split
+    try:
+        values = dict(zip(columns, (parse_number(cell) for cell in cells)))
+        count = parse_count(values['count'])
+    except ValueError:
+        return None
+    max_value = values['max']
+    return StatisticsRow(
+        metric=canonical_metric(metric),
+        max=max_value,
+        min=values['min'],
+        average=values['average'],
+        total=values['total'],
+        count=count,
+        tps=None if max_value is None else max_value / bucket_seconds,
+        raw_data=line.strip(),
+    )
+
+
+def parse_statistics(statistics_text, bucket_seconds=DEFAULT_BUCKET_SECONDS, skipped=None) -> List[StatisticsRow]:
+    """
+    Parse the statistics popup text into typed rows
+    A header line (any language) sets the column order; without one the dashboard's
+    default order is assumed. Unparseable lines inside the table, and row-shaped lines whose
+    values are rejected (e.g. a fractional or out-of-range count), are appended to `skipped`.
+    """
+    rows = []
+    columns = VALUE_FIELDS
+    in_table = False
+    for line in statistics_text.splitlines():
+        if not line.strip():
+            continue
+        row = parse_row(line, bucket_seconds, columns)
+        if row is not None:
+            rows.append(row)
+            in_table = True
+            continue
+        header = header_columns(line)
+        if header is not None:
+            columns = header
+            in_table = True
+        elif skipped is not None and (in_table or _split_cells(line.strip(' \r\n')) is not None):
+            skipped.append(line)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse statistics popup text into TPS records')
+    parser.add_argument('file', nargs='?', help='Text file to parse (default: stdin)')
+    parser.add_argument('--bucket-seconds', type=float, default=DEFAULT_BUCKET_SECONDS,
+                        help='Bucket width used for TPS = Max / bucket')
+    args = parser.parse_args()
+
+    text = open(args.file, encoding='utf-8').read() if args.file else sys.stdin.read()
+    skipped = []
+    for row in parse_statistics(text, args.bucket_seconds, skipped):
+        tps = "-" if row.tps is None else f"{row.tps:.2f}"
+        print(f"📊 {row.metric}: Max={row.max}, Count={row.count}, TPS={tps}")
+    for line in skipped:
+        print(f"⚠️ Could not parse: {line}")
+
+
+if __name__ == "__main__":
+    main()
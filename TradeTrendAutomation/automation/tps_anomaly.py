@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+TPS Anomaly Detection
+Vectorised baselines over the stored history (EWMA, z-score and seasonal
+same-hour / same-weekday comparisons) run between statistics extraction
+and the DingTalk report.
+"""
+
+import time
+import argparse
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from tps_columnar import to_epoch
+from tps_retention import TieredTPSHistory, bucket_start
+
+# Detection settings
+EWMA_ALPHA = 0.3
+Z_THRESHOLD = 3.0
+SEASONAL_THRESHOLD = 3.5
+MIN_SAMPLES = 5
+ZSCORE_WINDOW_DAYS = 14
+
+# Scale factor turning a median absolute deviation into a standard deviation estimate
+MAD_SCALE = 1.4826
+
+
+def ewma_baseline(values, alpha=EWMA_ALPHA):
+    """Exponentially weighted mean and std of a series, newest sample weighted highest"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.nan, np.nan
+    weights = (1.0 - alpha) ** np.arange(len(values) - 1, -1, -1, dtype=np.float64)
+    weights /= weights.sum()
+    mean = float(np.dot(weights, values))
+    std = float(np.sqrt(np.dot(weights, (values - mean) ** 2)))
+    return mean, std
+
+
+def zscore(value, values):
+    """Plain z-score of `value` against a window of samples"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) < MIN_SAMPLES:
+        return None
+    std = values.std()
+    if std == 0:
+        return None
+    return float((value - values.mean()) / std)
+
+
+def robust_zscore(value, values):
+    """Median/MAD z-score, used for the seasonal comparisons where a few spikes are expected"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) < MIN_SAMPLES:
+        return None
+    median = np.median(values)
+    mad = np.median(np.abs(values - median)) * MAD_SCALE
+    if mad == 0:
+        return None
+    return float((value - median) / mad)
+
+
+def local_offsets(timestamps):
+    """Local UTC offset in seconds of every epoch timestamp, DST changes included"""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if len(timestamps) == 0:
+        return np.zeros(0)
+    # One localtime() per day boundary; only days whose offset changes are converted sample by sample
+    days = np.floor(timestamps / 86400)
+    unique_days = np.unique(days)
+    bounds = np.append(unique_days, unique_days[-1] + 1) * 86400
+    bound_offsets = np.array([time.localtime(t).tm_gmtoff for t in bounds], dtype=np.float64)
+    offsets = bound_offsets[np.searchsorted(unique_days, days)]
+    switching = np.isin(days, unique_days[bound_offsets[:-1] != bound_offsets[1:]])
+    offsets[switching] = [time.localtime(t).tm_gmtoff for t in timestamps[switching]]
+    return offsets
+
+
+def seasonal_masks(timestamps, reference):
+    """Boolean masks for same-hour-of-day and same-weekday-and-hour samples (local time)"""
+    ref = datetime.fromtimestamp(reference)
+    # Shift epoch seconds into local wall-clock time, then use integer arithmetic
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    local = timestamps + local_offsets(timestamps)
+    hours = (local // 3600).astype(np.int64) % 24
+    # 1970-01-01 was a Thursday (weekday 3)
+    weekdays = ((local // 86400).astype(np.int64) + 3) % 7
+    same_hour = hours == ref.hour
+    return same_hour, same_hour & (weekdays == ref.weekday())
+
+
+def analyse_metric(history, metric, value, now, field='tps'):
+    """
+    Run every baseline for one metric; returns a dict of scores and reasons.
+    Rollups stop at the start of `now`'s hour: the capture being scored is usually already
+    folded into the current hourly bucket. Rollups are bucketed by capture time, so `now`
+    also picks the hour / weekday for the seasonal comparisons.
+    """
+    now_ts = to_epoch(now)
+    # window() ends are inclusive; stop just short of the current (open) hourly bucket
+    rollup_end = bucket_start(now_ts, 'hourly') - 1e-6
+    reasons = []
+    scores = {}
+
+    # Recent raw captures: EWMA and z-score
+    recent = history.captures.window(metric, now_ts - ZSCORE_WINDOW_DAYS * 86400, now_ts - 1e-6,
+                                     fields=['timestamp', field])[field]
+    if len(recent) < MIN_SAMPLES:
+        recent = history.tiers['hourly'].window(metric, now_ts - ZSCORE_WINDOW_DAYS * 86400, rollup_end,
+                                                fields=['timestamp', field])[field]
+
+    mean, std = ewma_baseline(recent)
+    if len(recent) >= MIN_SAMPLES and std > 0:
+        scores['ewma'] = (value - mean) / std
+        if abs(scores['ewma']) > Z_THRESHOLD:
+            reasons.append(f"{abs(value / mean - 1) * 100:.0f}% {'above' if value > mean else 'below'} EWMA baseline")
+
+    scores['zscore'] = zscore(value, recent)
+    if scores['zscore'] is not None and abs(scores['zscore']) > Z_THRESHOLD:
+        reasons.append(f"z-score {scores['zscore']:+.1f}")
+
+    # Hourly rollups: same hour of day, same weekday and hour
+    hourly = history.tiers['hourly'].window(metric, None, rollup_end, fields=['timestamp', field])
+    if len(hourly['timestamp']):
+        same_hour, same_weekday = seasonal_masks(hourly['timestamp'], now_ts)
+        values = np.asarray(hourly[field])
+        scores['same_hour'] = robust_zscore(value, values[same_hour])
+        scores['same_weekday'] = robust_zscore(value, values[same_weekday])
+        if scores['same_hour'] is not None and abs(scores['same_hour']) > SEASONAL_THRESHOLD:
+            reasons.append(f"unusual for this hour (score {scores['same_hour']:+.1f})")
+        if scores['same_weekday'] is not None and abs(scores['same_weekday']) > SEASONAL_THRESHOLD:
+            reasons.append(f"unusual for this weekday/hour (score {scores['same_weekday']:+.1f})")
+
+    return {
+        'metric': metric,
+        'value': value,
+        'baseline': None if np.isnan(mean) else mean,
+        'scores': {k: (None if v is None else round(float(v), 2)) for k, v in scores.items()},
+        'is_anomaly': bool(reasons),
+        'reasons': reasons,
+    }
+
+
+def detect_anomalies(tps_data, history=None, now=None, field='tps'):
+    """
+    Score every metric of a capture against its stored history.
+    Only history strictly before `now` is used, so pass the time the capture started.
+    Adds an 'anomaly' entry to each item and returns the list of flagged metrics,
+    or None when there is not enough history to score any metric.
+    """
+    if not tps_data:
+        return None
+    history = history or TieredTPSHistory()
+    now = now or datetime.now()
+
+    anomalies = []
+    scored = False
+    for item in tps_data:
+        value = item.get(field)
+        if value is None:
+            continue
+        result = analyse_metric(history, item['metric'], float(value), now, field)
+        item['anomaly'] = result
+        scored = scored or any(score is not None for score in result['scores'].values())
+        if result['is_anomaly']:
+            anomalies.append(result)
+    return anomalies if scored else None
+
+
+def benchmark(days=365, metrics=4):
+    """Time detection against a year of synthetic hourly history"""
+    with tempfile.TemporaryDirectory() as root:
+        history = TieredTPSHistory(root, raw_retention_days=days, tier_retention_days={'hourly': days})
+        now = datetime.now().replace(minute=0, second=0, microsecond=0)
+        hours = np.arange(days * 24, 0, -1)
+        timestamps = now.timestamp() - hours * 3600.0
+        rng = np.random.default_rng(0)
+        names = [f"Metric {i}" for i in range(metrics)]
+        for name in names:
+            base = 800 + 200 * np.sin(2 * np.pi * (timestamps % 86400) / 86400)
+            tps = base + rng.normal(0, 20, len(timestamps))
+            rows = [{'timestamp': ts, 'range_start': np.nan, 'range_end': np.nan, 'max': v * 60,
+                     'min': 0.0, 'average': v * 45, 'total': v * 3600, 'count': 60, 'tps': v}
+                    for ts, v in zip(timestamps, tps)]
+            history.captures.append_rows(name, rows)
+            history.tiers['hourly'].append_rows(name, rows)
+
+        tps_data = [{'metric': name, 'tps': 5000.0} for name in names]
+        started = time.perf_counter()
+        anomalies = detect_anomalies(tps_data, history, now)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"⏱️  {metrics} metrics x {len(timestamps)} hourly samples analysed in {elapsed_ms:.1f} ms")
+    print(f"🚨 Anomalies flagged: {len(anomalies or [])}/{metrics}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TPS anomaly detection')
+    parser.add_argument('--benchmark', action='store_true', help='Time detection on a year of synthetic history')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    # Score the latest stored capture against everything before it
+    history = TieredTPSHistory()
+    for metric in history.captures.metrics():
+        cols = history.captures.columns(metric, ['timestamp', 'tps'])
+        if len(cols['tps']) == 0:
+            continue
+        result = analyse_metric(history, metric, float(cols['tps'][-1]), cols['timestamp'][-1])
+        status = "🚨" if result['is_anomaly'] else "✅"
+        print(f"{status} {metric}: TPS={result['value']:.2f} {', '.join(result['reasons'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Columnar TPS History
+One fixed-width NumPy array per field per metric, opened with np.memmap
+Layout: tps_history/captures/<metric>/<field>.bin  (+ metrics.json index)
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY_DIR = os.path.join(project_root, "tps_history", "captures")
+DEFAULT_TPS_FILE = os.path.join(project_root, "tps_data.json")
+
+# Fixed-width column layout. 'timestamp' is the sorted index column (epoch seconds).
+# range_start/range_end hold the dashboard data window, NaN when the default range was used.
+FIELDS = {
+    'timestamp': np.dtype('<f8'),
+    'range_start': np.dtype('<f8'),
+    'range_end': np.dtype('<f8'),
+    'max': np.dtype('<f8'),
+    'min': np.dtype('<f8'),
+    'average': np.dtype('<f8'),
+    'total': np.dtype('<f8'),
+    'count': np.dtype('<i8'),
+    'tps': np.dtype('<f8'),
+}
+
+
+def to_epoch(value):
+    """Convert an ISO string, datetime or number to epoch seconds (NaN for None)"""
+    if value is None:
+        return np.nan
+    if isinstance(value, (int, float, np.floating, np.integer)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+def metric_slug(metric):
+    """Filesystem-safe directory name for a metric"""
+    slug = re.sub(r'[^\w]+', '_', metric.strip().lower(), flags=re.UNICODE).strip('_')
+    return slug or 'unknown'
+
+
+def rolling_max(values, window):
+    """Vectorised rolling max over the last `window` samples (NaN until the window is full)"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if window <= 0 or len(values) < window:
+        return out
+    view = np.lib.stride_tricks.sliding_window_view(values, window)
+    out[window - 1:] = view.max(axis=1)
+    return out
+
+
+class ColumnarTPSHistory:
+    def __init__(self, root=None):
+        self.root = root or DEFAULT_HISTORY_DIR
+        self.index_file = os.path.join(self.root, "metrics.json")
+        os.makedirs(self.root, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        """Load the slug -> metric name index"""
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def _save_index(self):
+        tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self._index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def _metric_dir(self, metric):
+        return os.path.join(self.root, metric_slug(metric))
+
+    def _column_path(self, metric, field):
+        return os.path.join(self._metric_dir(metric), f"{field}.bin")
+
+    def metrics(self):
+        """All metric names stored in this history"""
+        return sorted(self._index.values())
+
+    def __len__(self):
+        return sum(self.row_count(metric) for metric in self.metrics())
+
+    def row_count(self, metric):
+        """Number of complete rows for a metric (shortest column wins after a partial write)"""
+        counts = []
+        for field, dtype in FIELDS.items():
+            path = self._column_path(metric, field)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            counts.append(size // dtype.itemsize)
+        return min(counts) if counts else 0
+
+    def version(self, metric):
+        """Cheap change token for a metric (mtime and size of its index column)"""
+        try:
+            stat = os.stat(self._column_path(metric, 'timestamp'))
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def column(self, metric, field):
+        """Read-only memory-mapped view of one column"""
+        rows = self.row_count(metric)
+        dtype = FIELDS[field]
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._column_path(metric, field), dtype=dtype, mode='r', shape=(rows,))
+
+    def columns(self, metric, fields=None):
+        """Dict of memory-mapped columns for a metric"""
+        return {field: self.column(metric, field) for field in (fields or FIELDS)}
+
+    def window(self, metric, start=None, end=None, fields=None):
+        """Columns for rows whose timestamp falls in [start, end], located via the sorted index"""
+        timestamps = self.column(metric, 'timestamp')
+        lo = 0 if start is None else int(np.searchsorted(timestamps, to_epoch(start), side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, to_epoch(end), side='right'))
+        return {field: self.column(metric, field)[lo:hi] for field in (fields or FIELDS)}
+
+    def percentiles(self, metric, field='tps', q=(50, 95, 99), start=None, end=None):
+        """Percentiles of a column over a time window"""
+        values = self.window(metric, start, end, fields=[field])[field]
+        if len(values) == 0:
+            return {p: None for p in q}
+        return dict(zip(q, np.nanpercentile(values, q).tolist()))
+
+    def append(self, timestamp, tps_data, time_range=None):
+        """Append one capture (list of TPS dicts) as one row per metric"""
+        if not tps_data:
+            return 0
+        range_start, range_end = (time_range or (None, None))
+        ts = to_epoch(timestamp)
+        rows = {}
+        for item in tps_data:
+            rows.setdefault(item['metric'], []).append({
+                'timestamp': ts,
+                'range_start': to_epoch(range_start),
+                'range_end': to_epoch(range_end),
+                'max': item.get('max'),
+                'min': item.get('min'),
+                'average': item.get('average'),
+                'total': item.get('total'),
+                'count': item.get('count') or 0,
+                'tps': item.get('tps'),
+            })
+        for metric, metric_rows in rows.items():
+            self.append_rows(metric, metric_rows)
+        return len(tps_data)
+
+    def import_records(self, records):
+        """Populate from tps_data.json style records, sorted by capture time"""
+        by_metric = {}
+        for record in sorted(records, key=lambda r: r.get('timestamp', '')):
+            ts = to_epoch(record.get('timestamp'))
+            time_range = record.get('time_range') or {}
+            for item in record.get('tps_calculations') or []:
+                by_metric.setdefault(item['metric'], []).append({
+                    'timestamp': ts,
+                    'range_start': to_epoch(time_range.get('start')),
+                    'range_end': to_epoch(time_range.get('end')),
+                    'max': item.get('max'),
+                    'min': item.get('min'),
+                    'average': item.get('average'),
+                    'total': item.get('total'),
+                    'count': item.get('count') or 0,
+                    'tps': item.get('tps'),
+                })
+        for metric, metric_rows in by_metric.items():
+            self.append_rows(metric, metric_rows)
+        return sum(len(rows) for rows in by_metric.values())
+
+    def _rows_to_arrays(self, rows):
+        arrays = {}
+        for field, dtype in FIELDS.items():
+            values = [np.nan if row[field] is None else row[field] for row in rows]
+            if dtype.kind == 'i':
+                values = [0 if v is None or v != v else v for v in values]
+            arrays[field] = np.asarray(values, dtype=dtype)
+        return arrays
+
+    def append_rows(self, metric, rows):
+        """Append rows to every column; falls back to a sorted rewrite for out-of-order timestamps"""
+        slug = metric_slug(metric)
+        if self._index.get(slug) != metric:
+            self._index[slug] = metric
+            self._save_index()
+        os.makedirs(self._metric_dir(metric), exist_ok=True)
+
+        new = self._rows_to_arrays(rows)
+        order = np.argsort(new['timestamp'], kind='stable')
+        new = {field: values[order] for field, values in new.items()}
+
+        existing_ts = self.column(metric, 'timestamp')
+        if len(existing_ts) and new['timestamp'][0] < existing_ts[-1]:
+            merged = {field: np.concatenate([np.array(self.column(metric, field)), new[field]])
+                      for field in FIELDS}
+            order = np.argsort(merged['timestamp'], kind='stable')
+            self.rewrite(metric, {field: values[order] for field, values in merged.items()})
+            return
+
+        rows_before = len(existing_ts)
+        for field, values in new.items():
+            path = self._column_path(metric, field)
+            with open(path, 'ab') as f:
+                # Drop any torn tail left by an interrupted write before appending
+                f.truncate(rows_before * FIELDS[field].itemsize)
+                f.write(values.tobytes())
+
+    def write_row(self, metric, index, row):
+        """Overwrite a single row in place through a writable memmap"""
+        rows = self.row_count(metric)
+        for field, dtype in FIELDS.items():
+            column = np.memmap(self._column_path(metric, field), dtype=dtype, mode='r+', shape=(rows,))
+            value = row[field]
+            column[index] = 0 if dtype.kind == 'i' and (value is None or value != value) else value
+            column.flush()
+            del column
+
+    def prune(self, metric, before):
+        """Drop rows older than `before`; returns the number of rows removed"""
+        timestamps = self.column(metric, 'timestamp')
+        cut = int(np.searchsorted(timestamps, to_epoch(before), side='left'))
+        if cut == 0:
+            return 0
+        self.rewrite(metric, {field: np.array(self.column(metric, field)[cut:]) for field in FIELDS})
+        return cut
+
+    def rewrite(self, metric, arrays):
+        """Replace all columns of a metric (temp file + rename per column)"""
+        os.makedirs(self._metric_dir(metric), exist_ok=True)
+        for field, dtype in FIELDS.items():
+            path = self._column_path(metric, field)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(np.asarray(arrays[field], dtype=dtype).tobytes())
+            os.replace(tmp_path, path)
+
+
+def build_from_tps_file(tps_file=None, root=None):
+    """(Re)build the columnar history from the JSON TPS records"""
+    tps_file = tps_file or DEFAULT_TPS_FILE
+    history = ColumnarTPSHistory(root)
+    for metric in history.metrics():
+        history.rewrite(metric, {field: np.empty(0, dtype=dtype) for field, dtype in FIELDS.items()})
+
+    records = []
+    if os.path.exists(tps_file):
+        with open(tps_file, 'r') as f:
+            records = json.load(f)
+    rows = history.import_records(records)
+    return history, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Columnar TPS history (np.memmap)')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the columnar store from tps_data.json')
+    parser.add_argument('--tps-file', default=None, help='Path to tps_data.json')
+    parser.add_argument('--root', default=None, help='Columnar history directory')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        history, rows = build_from_tps_file(args.tps_file, args.root)
+        print(f"✅ Columnar history rebuilt: {rows} rows in {history.root}")
+    else:
+        history = ColumnarTPSHistory(args.root)
+
+    for metric in history.metrics():
+        cols = history.columns(metric, ['max', 'tps'])
+        if len(cols['max']) == 0:
+            continue
+        pct = history.percentiles(metric, 'tps')
+        print(f"📊 {metric}: rows={len(cols['max'])}, max={cols['max'].max():.0f}, "
+              f"p50={pct[50]:.2f}, p95={pct[95]:.2f}, p99={pct[99]:.2f} TPS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Period-over-Period TPS Comparison
+Day-over-day and week-over-week deltas looked up from the stored capture
+history (never from a new browser capture). Per-metric index arrays are
+cached in memory and keyed on the column file version, so repeated
+lookups cost a searchsorted.
+"""
+
+import os
+import argparse
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from tps_columnar import ColumnarTPSHistory, to_epoch
+import tps_retention
+
+# Comparison periods: name -> shift in seconds
+PERIODS = {
+    'dod': 86400,
+    'wow': 7 * 86400,
+}
+
+# How far a stored capture may drift from the shifted target and still count as a match
+MATCH_TOLERANCE_SECONDS = 3600
+
+
+@lru_cache(maxsize=64)
+def _load_index(root, metric, version):
+    """Load the small index columns of one metric into memory; `version` invalidates the cache"""
+    store = ColumnarTPSHistory(root)
+    cols = store.columns(metric, ['timestamp', 'range_start', 'range_end', 'max', 'tps'])
+    return {field: np.array(values) for field, values in cols.items()}
+
+
+def load_index(metric, root=None):
+    """Cached index for a metric, reloaded only when its timestamp column changes on disk"""
+    root = root or os.path.join(tps_retention.HISTORY_ROOT, "captures")
+    return _load_index(root, metric, ColumnarTPSHistory(root).version(metric))
+
+
+def find_previous(index, capture_ts, shift, time_range=None, tolerance=MATCH_TOLERANCE_SECONDS):
+    """
+    Index of the stored capture matching the window `shift` seconds earlier, or None.
+    Explicit ranges match on the shifted data window; default-range captures match on
+    capture time. The latest capture wins when several match.
+    """
+    timestamps = index['timestamp']
+    if len(timestamps) == 0:
+        return None
+
+    if time_range:
+        start = to_epoch(time_range[0]) - shift
+        end = to_epoch(time_range[1]) - shift
+        matches = np.flatnonzero((np.abs(index['range_start'] - start) <= tolerance) &
+                                 (np.abs(index['range_end'] - end) <= tolerance))
+        return int(matches[-1]) if len(matches) else None
+
+    target = capture_ts - shift
+    lo = int(np.searchsorted(timestamps, target - tolerance, side='left'))
+    hi = int(np.searchsorted(timestamps, target + tolerance, side='right'))
+    if lo >= hi:
+        return None
+    candidates = np.arange(lo, hi)
+    # Only compare default-range captures with each other
+    candidates = candidates[np.isnan(index['range_start'][lo:hi])]
+    if len(candidates) == 0:
+        return None
+    return int(candidates[np.argmin(np.abs(timestamps[candidates] - target))])
+
+
+def percent_delta(current, previous):
+    if previous is None or previous == 0 or np.isnan(previous):
+        return None
+    return (current - previous) / previous * 100
+
+
+def add_period_deltas(tps_data, capture_time=None, time_range=None, root=None, field='tps'):
+    """
+    Attach {'dod': pct, 'wow': pct} under item['deltas'] for every metric.
+    time_range: (start, end) of the data window, or None for the dashboard default.
+    """
+    if not tps_data:
+        return tps_data
+    capture_ts = to_epoch(capture_time or datetime.now())
+    for item in tps_data:
+        index = load_index(item['metric'], root)
+        deltas = {}
+        for period, shift in PERIODS.items():
+            previous = find_previous(index, capture_ts, shift, time_range)
+            if previous is None or item.get(field) is None:
+                deltas[period] = None
+            else:
+                deltas[period] = percent_delta(float(item[field]), float(index[field][previous]))
+        item['deltas'] = deltas
+    return tps_data
+
+
+def format_deltas(deltas):
+    """Short report suffix such as 'DoD +3.2% · WoW -1.0%'"""
+    if not deltas:
+        return ""
+    parts = []
+    for period, label in (('dod', 'DoD'), ('wow', 'WoW')):
+        value = deltas.get(period)
+        parts.append(f"{label} {value:+.1f}%" if value is not None else f"{label} n/a")
+    return " · ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Day-over-day / week-over-week TPS deltas from history')
+    parser.add_argument('--root', default=None, help='Columnar captures directory')
+    args = parser.parse_args()
+
+    store = ColumnarTPSHistory(args.root or os.path.join(tps_retention.HISTORY_ROOT, "captures"))
+    for metric in store.metrics():
+        index = load_index(metric, args.root)
+        if len(index['timestamp']) == 0:
+            continue
+        latest = len(index['timestamp']) - 1
+        time_range = None
+        if not np.isnan(index['range_start'][latest]):
+            time_range = (index['range_start'][latest], index['range_end'][latest])
+        item = {'metric': metric, 'tps': float(index['tps'][latest])}
+        add_period_deltas([item], index['timestamp'][latest], time_range, args.root)
+        print(f"📊 {metric}: TPS={item['tps']:.0f}  {format_deltas(item['deltas'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Columnar Export of TPS History
+Streams the history store into Parquet or Arrow IPC files for analysts:
+  exports/<format>/<tier>/date=YYYY-MM-DD/dashboard=<name>/part-<n>.<ext>
+Typed columns (timestamps, float64 statistics, int64 counts) are kept as-is.
+A manifest records the last exported timestamp per metric, so repeated runs
+only append rows captured since the previous export. Rollup tiers only export
+closed buckets: the current hour/day/week is still being updated by ingest()
+and is picked up by the first export after it closes.
+Requires pyarrow (optional dependency: pip install pyarrow).
+"""
+
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from tps_columnar import FIELDS, to_epoch
+from tps_retention import TieredTPSHistory, TIER_WIDTHS, bucket_start
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_EXPORT_DIR = os.path.join(project_root, "exports")
+DEFAULT_DASHBOARD = "trade_trends"
+FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is required for export: pip install pyarrow")
+
+
+def arrow_schema():
+    """Arrow schema mirroring the columnar store dtypes"""
+    require_pyarrow()
+    columns = [pa.field('metric', pa.dictionary(pa.int32(), pa.string()), nullable=False)]
+    for field, dtype in FIELDS.items():
+        if field in ('timestamp', 'range_start', 'range_end'):
+            columns.append(pa.field(field, pa.timestamp('ms'), nullable=field != 'timestamp'))
+        elif dtype == '<i8':
+            columns.append(pa.field(field, pa.int64()))
+        else:
+            columns.append(pa.field(field, pa.float64()))
+    return pa.schema(columns)
+
+
+def _to_arrow(metric, columns, schema):
+    arrays = []
+    length = len(columns['timestamp'])
+    for field in schema:
+        if field.name == 'metric':
+            arrays.append(pa.DictionaryArray.from_arrays(np.zeros(length, dtype=np.int32), [metric]))
+            continue
+        values = np.asarray(columns[field.name])
+        if pa.types.is_timestamp(field.type):
+            mask = np.isnan(values)
+            millis = np.where(mask, 0, np.round(values * 1000)).astype(np.int64)
+            arrays.append(pa.array(millis, type=field.type, mask=mask))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _day_slices(timestamps):
+    """Yield (YYYY-MM-DD, start, stop) for contiguous local-date runs of sorted timestamps"""
+    if len(timestamps) == 0:
+        return
+    days = [datetime.fromtimestamp(ts).strftime('%Y-%m-%d') for ts in timestamps]
+    start = 0
+    for i in range(1, len(days) + 1):
+        if i == len(days) or days[i] != days[start]:
+            yield days[start], start, i
+            start = i
+
+
+class TPSExporter:
+    def __init__(self, history=None, output_dir=None, fmt='parquet', tier='captures', dashboard=DEFAULT_DASHBOARD):
+        require_pyarrow()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+        self.history = history or TieredTPSHistory()
+        self.fmt = fmt
+        self.tier = tier
+        self.dashboard = dashboard
+        self.root = os.path.join(output_dir or DEFAULT_EXPORT_DIR, fmt, tier)
+        self.manifest_file = os.path.join(self.root, "manifest.json")
+        self.schema = arrow_schema()
+
+    def _store(self):
+        return self.history.captures if self.tier == 'captures' else self.history.store(self.tier)
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'watermarks': {}, 'files': []}
+
+    def _save_manifest(self, manifest):
+        tmp_file = f"{self.manifest_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+
+    def _write(self, table, day):
+        partition = os.path.join(self.root, f"date={day}", f"dashboard={self.dashboard}")
+        os.makedirs(partition, exist_ok=True)
+        part = len([name for name in os.listdir(partition) if name.startswith('part-')])
+        path = os.path.join(partition, f"part-{part:05d}.{FORMATS[self.fmt]}")
+        tmp_path = f"{path}.tmp"
+        if self.fmt == 'parquet':
+            pq.write_table(table, tmp_path, compression='zstd')
+        else:
+            feather.write_feather(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+        return path
+
+    def export(self, now=None):
+        """
+        Append rows newer than the manifest watermarks (closed buckets only for rollups); returns the files written.
+        `now` (datetime, ISO string or epoch seconds; default: the current time) decides which bucket is still open.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        manifest = self._load_manifest()
+        store = self._store()
+        written = []
+        open_bucket = None if self.tier == 'captures' else bucket_start(time.time() if now is None else to_epoch(now), self.tier)
+
+        for metric in store.metrics():
+            timestamps = store.column(metric, 'timestamp')
+            watermark = manifest['watermarks'].get(metric)
+            first = 0 if watermark is None else int(np.searchsorted(timestamps, watermark, side='right'))
+            stop = len(timestamps) if open_bucket is None else int(np.searchsorted(timestamps, open_bucket, side='left'))
+            if first >= stop:
+                continue
+
+            # Memmap slices per day keep memory flat regardless of history length
+            columns = store.columns(metric)
+            new_timestamps = np.asarray(timestamps[first:stop])
+            for day, day_start, day_stop in _day_slices(new_timestamps):
+                chunk = {field: values[first + day_start:first + day_stop] for field, values in columns.items()}
+                path = self._write(_to_arrow(metric, chunk, self.schema), day)
+                written.append(path)
+                manifest['files'].append(os.path.relpath(path, self.root))
+            manifest['watermarks'][metric] = float(new_timestamps[-1])
+            # Persist after each metric so an interrupted export resumes instead of duplicating
+            self._save_manifest(manifest)
+
+        return written
+
+    def read(self, metric=None):
+        """Load the exported dataset as one Arrow table (optionally filtered to a metric)"""
+        require_pyarrow()
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(self.root, format='parquet' if self.fmt == 'parquet' else 'ipc',
+                             partitioning='hive', exclude_invalid_files=True)
+        table = dataset.to_table(filter=(ds.field('metric') == metric) if metric else None)
+        return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export TPS history to Parquet / Arrow IPC')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='parquet', help='Output file format')
+    parser.add_argument('--tier', choices=['captures'] + list(TIER_WIDTHS), default='captures',
+                        help='Raw captures or a rollup tier')
+    parser.add_argument('--output', default=DEFAULT_EXPORT_DIR, help='Export root directory')
+    parser.add_argument('--dashboard', default=DEFAULT_DASHBOARD, help='Dashboard partition name')
+    parser.add_argument('--root', default=None, help='History root (default: tps_history/)')
+    args = parser.parse_args()
+
+    exporter = TPSExporter(TieredTPSHistory(args.root), args.output, args.format, args.tier, args.dashboard)
+    written = exporter.export()
+    if written:
+        print(f"📦 Exported {len(written)} partition files to {exporter.root}")
+    else:
+        print(f"✅ Export up to date: {exporter.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Tiered TPS History Retention
+Raw captures are kept for a configurable window; hourly, daily and weekly
+rollups are updated incrementally on every capture and kept much longer.
+Layout: tps_history/{captures,hourly,daily,weekly}/<metric>/<field>.bin
+"""
+
+import os
+import json
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from tps_columnar import ColumnarTPSHistory, FIELDS, to_epoch, project_root
+
+HISTORY_ROOT = os.path.join(project_root, "tps_history")
+
+# Retention settings (days)
+RAW_RETENTION_DAYS = 14
+TIER_RETENTION_DAYS = {
+    'hourly': 90,
+    'daily': 730,
+    'weekly': 3650,
+}
+
+# Tier name -> bucket width in seconds, finest first
+TIER_WIDTHS = {
+    'hourly': 3600,
+    'daily': 86400,
+    'weekly': 7 * 86400,
+}
+
+# Target number of points when a query does not ask for a resolution
+DEFAULT_QUERY_POINTS = 500
+
+
+def bucket_start(ts, tier):
+    """Start of the local-time bucket containing epoch `ts`"""
+    dt = datetime.fromtimestamp(ts)
+    if tier == 'hourly':
+        dt = dt.replace(minute=0, second=0, microsecond=0)
+    elif tier == 'daily':
+        dt = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif tier == 'weekly':
+        dt = dt.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=dt.weekday())
+    else:
+        raise ValueError(f"Unknown tier: {tier}")
+    return dt.timestamp()
+
+
+def merge_rollup(current, sample):
+    """Fold one capture row into a rollup row (max of max, sum of totals, count-weighted average)"""
+    old_count = int(current['count'] or 0)
+    new_count = int(sample['count'] or 0)
+    weights = (old_count, new_count) if old_count + new_count else (1, 1)
+    averages = (current['average'], sample['average'])
+    if np.isnan(averages[0]):
+        average = averages[1]
+    elif np.isnan(averages[1]):
+        average = averages[0]
+    else:
+        average = (averages[0] * weights[0] + averages[1] * weights[1]) / (weights[0] + weights[1])
+    return {
+        'timestamp': current['timestamp'],
+        'range_start': np.fmin(current['range_start'], sample['range_start']),
+        'range_end': np.fmax(current['range_end'], sample['range_end']),
+        'max': np.fmax(current['max'], sample['max']),
+        'min': np.fmin(current['min'], sample['min']),
+        'average': average,
+        'total': np.nansum([current['total'], sample['total']]),
+        'count': old_count + new_count,
+        'tps': np.fmax(current['tps'], sample['tps']),
+    }
+
+
+def prune_raw_records(records, raw_retention_days=RAW_RETENTION_DAYS, now=None):
+    """Keep only tps_data.json records inside the raw retention window"""
+    now = now or datetime.now()
+    cutoff = (now - timedelta(days=raw_retention_days)).isoformat()
+    return [record for record in records if record.get('timestamp', '') >= cutoff]
+
+
+class TieredTPSHistory:
+    def __init__(self, root=None, raw_retention_days=RAW_RETENTION_DAYS, tier_retention_days=None):
+        self.root = root or HISTORY_ROOT
+        self.raw_retention_days = raw_retention_days
+        self.tier_retention_days = dict(TIER_RETENTION_DAYS, **(tier_retention_days or {}))
+        self.captures = ColumnarTPSHistory(os.path.join(self.root, "captures"))
+        self.tiers = {tier: ColumnarTPSHistory(os.path.join(self.root, tier)) for tier in TIER_WIDTHS}
+
+    def ingest(self, timestamp, tps_data, time_range=None, now=None, store_capture=True):
+        """Store a capture (unless store_capture=False), roll it up into every tier and apply retention"""
+        if not tps_data:
+            return
+        if store_capture:
+            self.captures.append(timestamp, tps_data, time_range)
+        ts = to_epoch(timestamp)
+        range_start, range_end = (time_range or (None, None))
+        for item in tps_data:
+            sample = {
+                'timestamp': ts,
+                'range_start': to_epoch(range_start),
+                'range_end': to_epoch(range_end),
+                'max': np.nan if item.get('max') is None else item['max'],
+                'min': np.nan if item.get('min') is None else item['min'],
+                'average': np.nan if item.get('average') is None else item['average'],
+                'total': np.nan if item.get('total') is None else item['total'],
+                'count': item.get('count') or 0,
+                'tps': np.nan if item.get('tps') is None else item['tps'],
+            }
+            for tier in TIER_WIDTHS:
+                self._rollup(tier, item['metric'], sample)
+        self.apply_retention(now)
+
+    def _rollup(self, tier, metric, sample):
+        """Incrementally update the bucket row that `sample` falls into"""
+        store = self.tiers[tier]
+        bucket = bucket_start(sample['timestamp'], tier)
+        timestamps = store.column(metric, 'timestamp')
+        index = int(np.searchsorted(timestamps, bucket, side='left'))
+
+        if index < len(timestamps) and timestamps[index] == bucket:
+            current = {field: store.column(metric, field)[index] for field in FIELDS}
+            store.write_row(metric, index, merge_rollup(current, sample))
+        else:
+            # New bucket; append() re-sorts if it lands before the last row
+            row = dict(sample, timestamp=bucket)
+            store.append_rows(metric, [row])
+
+    def apply_retention(self, now=None):
+        """Drop raw captures and rollup rows that fell out of their windows"""
+        now = now or datetime.now()
+        removed = self._prune(self.captures, now - timedelta(days=self.raw_retention_days))
+        for tier, store in self.tiers.items():
+            removed += self._prune(store, now - timedelta(days=self.tier_retention_days[tier]))
+        return removed
+
+    def _prune(self, store, cutoff):
+        removed = 0
+        cutoff = cutoff.timestamp()
+        for metric in store.metrics():
+            timestamps = store.column(metric, 'timestamp')
+            if len(timestamps) and timestamps[0] < cutoff:
+                removed += store.prune(metric, cutoff)
+        return removed
+
+    def choose_tier(self, start, end=None, resolution=None, now=None):
+        """Coarsest tier whose buckets fit `resolution` and whose retention still covers `start`"""
+        now = now or datetime.now()
+        start_ts = to_epoch(start)
+        end_ts = to_epoch(end) if end is not None else now.timestamp()
+        if resolution is None:
+            resolution = (end_ts - start_ts) / DEFAULT_QUERY_POINTS
+
+        raw_cutoff = (now - timedelta(days=self.raw_retention_days)).timestamp()
+        chosen = 'captures' if start_ts >= raw_cutoff else None
+        for tier, width in TIER_WIDTHS.items():
+            tier_cutoff = (now - timedelta(days=self.tier_retention_days[tier])).timestamp()
+            if start_ts < tier_cutoff:
+                continue
+            if width <= resolution or chosen is None:
+                chosen = tier
+        return chosen or 'weekly'
+
+    def store(self, tier):
+        return self.captures if tier == 'captures' else self.tiers[tier]
+
+    def query(self, metric, start, end=None, resolution=None, fields=None, now=None):
+        """Return (tier, columns) for a time range, served from the coarsest adequate tier"""
+        tier = self.choose_tier(start, end, resolution, now)
+        return tier, self.store(tier).window(metric, start, end, fields)
+
+    def backfill(self, records):
+        """
+        Ingest tps_data.json style records (oldest first) into captures and rollups. Records
+        whose timestamp is already in captures (e.g. mirrored there by an earlier version)
+        are only rolled up, so raw rows are never duplicated.
+        """
+        stored = {ts for metric in self.captures.metrics() for ts in self.captures.column(metric, 'timestamp')}
+        for record in sorted(records, key=lambda r: r.get('timestamp', '')):
+            time_range = record.get('time_range') or {}
+            self.ingest(record['timestamp'], record.get('tps_calculations'),
+                        (time_range.get('start'), time_range.get('end')) if time_range else None,
+                        store_capture=to_epoch(record['timestamp']) not in stored)
+        return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tiered TPS history retention')
+    parser.add_argument('--backfill', action='store_true', help='Ingest tps_data.json into an empty history')
+    parser.add_argument('--raw-days', type=int, default=RAW_RETENTION_DAYS, help='Raw capture retention window')
+    parser.add_argument('--root', default=None, help='History root directory')
+    parser.add_argument('--metric', default=None, help='Metric to query')
+    parser.add_argument('--since', default=None, help='Query start (YYYY-MM-DDTHH:MM:SS)')
+    args = parser.parse_args()
+
+    history = TieredTPSHistory(args.root, raw_retention_days=args.raw_days)
+
+    if args.backfill:
+        tps_file = os.path.join(project_root, "tps_data.json")
+        with open(tps_file, 'r') as f:
+            records = json.load(f)
+        history.backfill(records)
+        print(f"✅ Backfilled {len(records)} records into {history.root}")
+
+    if args.metric and args.since:
+        tier, cols = history.query(args.metric, args.since)
+        print(f"📊 {args.metric} since {args.since}: {len(cols['timestamp'])} rows from '{tier}' tier")
+        for ts, max_val, tps in zip(cols['timestamp'], cols['max'], cols['tps']):
+            print(f"   {datetime.fromtimestamp(ts).isoformat()}  Max={max_val:.0f}  TPS={tps:.2f}")
+    else:
+        for tier in ['captures'] + list(TIER_WIDTHS):
+            store = history.store(tier)
+            print(f"🗂️  {tier}: {len(store)} rows across {len(store.metrics())} metrics")
+
+
+if __name__ == "__main__":
+    main()
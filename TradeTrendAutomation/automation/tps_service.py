@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+TPS History Query Service
+Small embedded HTTP server over the history store so downstream teams can
+poll TPS numbers instead of triggering scrapes or downloading artifacts.
+
+  GET /latest[?metric=...]                          latest row per metric (finest tier with data)
+  GET /range?metric=...&start=...&end=...           rows from the coarsest adequate tier
+  GET /aggregate?metric=...&start=...&end=...       max / total / weighted average / percentiles
+  GET /metrics                                      Prometheus text exposition
+
+Add format=csv (or Accept: text/csv) for CSV. Responses carry an ETag derived
+from the store version and are kept in an in-process LRU cache.
+"""
+
+import io
+import os
+import csv
+import json
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from history_store import DEFAULT_TPS_FILE
+from metrics_exporter import DEFAULT_TEXTFILE, render_snapshot
+from tps_retention import TieredTPSHistory, TIER_WIDTHS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8088
+RESPONSE_CACHE_SIZE = 256
+
+
+class ResponseCache:
+    """Thread-safe LRU of rendered responses keyed by (store version, request)"""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def store_version(tps_file=DEFAULT_TPS_FILE):
+    """Change token for the whole store: every history write atomically replaces tps_data.json"""
+    try:
+        stat = os.stat(tps_file)
+        return f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}"
+    except OSError:
+        return "empty"
+
+
+def _iso(ts):
+    return None if ts is None or np.isnan(ts) else datetime.fromtimestamp(float(ts)).isoformat()
+
+
+def _rows(columns):
+    """Columnar dict -> list of JSON-friendly row dicts"""
+    rows = []
+    for i in range(len(columns['timestamp'])):
+        row = {}
+        for field, values in columns.items():
+            value = values[i].item()
+            if field in ('timestamp', 'range_start', 'range_end'):
+                value = _iso(value)
+            elif isinstance(value, float) and np.isnan(value):
+                value = None
+            row[field] = value
+        rows.append(row)
+    return rows
+
+
+def query_latest(history, metric=None):
+    """Newest row per metric from the finest tier that still has data (raw captures age out first)"""
+    tiers = ['captures'] + list(TIER_WIDTHS)
+    names = [metric] if metric else sorted({name for tier in tiers for name in history.store(tier).metrics()})
+    rows = []
+    for name in names:
+        for tier in tiers:
+            columns = history.store(tier).columns(name)
+            if len(columns['timestamp']):
+                latest = {field: values[-1:] for field, values in columns.items()}
+                rows.extend(dict(row, metric=name, tier=tier) for row in _rows(latest))
+                break
+    return rows
+
+
+def query_range(history, metric, start, end=None, resolution=None):
+    tier, columns = history.query(metric, start, end, float(resolution) if resolution else None)
+    return [dict(row, metric=metric, tier=tier) for row in _rows(columns)]
+
+
+def query_aggregate(history, metric, start, end=None):
+    tier, columns = history.query(metric, start, end)
+    count = np.asarray(columns['count'], dtype=np.float64)
+    result = {'metric': metric, 'tier': tier, 'start': start, 'end': end, 'rows': int(len(count))}
+    if len(count):
+        average = np.asarray(columns['average'], dtype=np.float64)
+        weighted = np.nansum(average * count) / count.sum() if count.sum() else float(np.nanmean(average))
+        p50, p95, p99 = np.nanpercentile(columns['tps'], [50, 95, 99])
+        result.update({
+            'max': float(np.nanmax(columns['max'])),
+            'min': float(np.nanmin(columns['min'])),
+            'total': float(np.nansum(columns['total'])),
+            'count': int(count.sum()),
+            'average': float(weighted),
+            'tps_max': float(np.nanmax(columns['tps'])),
+            'tps_p50': float(p50),
+            'tps_p95': float(p95),
+            'tps_p99': float(p99),
+        })
+    return [result]
+
+
+def render(rows, fmt):
+    """Rows -> (body bytes, content type)"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        fields = []
+        for row in rows:
+            fields.extend(key for key in row if key not in fields)
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode('utf-8'), 'text/csv; charset=utf-8'
+    return json.dumps(rows, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8'
+
+
+class TPSRequestHandler(BaseHTTPRequestHandler):
+    server_version = "TPSService/1.0"
+    routes = {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/metrics':
+            # Scraped every few seconds and cheap to build, so it bypasses the response cache
+            body = render_snapshot(self.server.history_factory(), self.server.metrics_textfile).encode('utf-8')
+            self._send(200, body, 'text/plain; version=0.0.4; charset=utf-8')
+            return
+
+        route = self.routes.get(url.path)
+        if route is None:
+            self._send(404, b'{"error": "not found"}', 'application/json')
+            return
+
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        fmt = params.pop('format', None) or ('csv' if 'text/csv' in self.headers.get('Accept', '') else 'json')
+        version = store_version(self.server.tps_file)
+        cache_key = (version, url.path, tuple(sorted(params.items())), fmt)
+
+        entry = self.server.response_cache.get(cache_key)
+        if entry is None:
+            try:
+                rows = route(self.server.history_factory(), **params)
+            except TypeError as e:
+                self._send(400, json.dumps({'error': f"bad parameters: {e}"}).encode('utf-8'), 'application/json')
+                return
+            except ValueError as e:
+                self._send(400, json.dumps({'error': str(e)}).encode('utf-8'), 'application/json')
+                return
+            body, content_type = render(rows, fmt)
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            entry = (body, content_type, etag)
+            self.server.response_cache.put(cache_key, entry)
+
+        body, content_type, etag = entry
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, b'', content_type, etag)
+        else:
+            self._send(200, body, content_type, etag)
+
+    def _send(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+TPSRequestHandler.routes = {
+    '/latest': query_latest,
+    '/range': query_range,
+    '/aggregate': query_aggregate,
+}
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, history_root=None, tps_file=DEFAULT_TPS_FILE, verbose=False):
+    server = ThreadingHTTPServer((host, port), TPSRequestHandler)
+    server.history_factory = lambda: TieredTPSHistory(history_root)
+    server.tps_file = tps_file
+    server.response_cache = ResponseCache()
+    server.metrics_textfile = DEFAULT_TEXTFILE
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TPS history query service')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Bind address')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Listen port')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, verbose=args.verbose)
+    print(f"🌐 TPS query service listening on http://{args.host}:{args.port} (/latest, /range, /aggregate, /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("🔄 Service stopped")
+
+
+if __name__ == "__main__":
+    main()
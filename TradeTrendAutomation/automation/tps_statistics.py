@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+TPS Statistics Engine
+Works on the per-bucket series behind the Trade Trends chart: detects the
+bucket width from the timestamps and reports true per-second peak, mean and
+p50/p95/p99 TPS. Long ranges go through a mergeable log-bucket quantile
+sketch instead of a full sort.
+"""
+
+import math
+import time
+import argparse
+
+import numpy as np
+
+from statistics_parser import canonical_metric
+
+# Bucket width assumed when no series is available (the dashboard's 1-minute buckets)
+DEFAULT_BUCKET_SECONDS = 60
+
+# Above this many samples percentiles come from the sketch rather than an exact sort
+EXACT_PERCENTILE_LIMIT = 1_000_000
+
+QUANTILES = (50, 95, 99)
+
+
+def detect_bucket_seconds(timestamps):
+    """Bucket width in seconds from the median timestamp step (accepts seconds or milliseconds)"""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if len(timestamps) < 2:
+        return None
+    steps = np.diff(np.sort(timestamps))
+    steps = steps[steps > 0]
+    if len(steps) == 0:
+        return None
+    step = float(np.median(steps))
+    # Highcharts and most JS sources use epoch milliseconds
+    if timestamps.max() > 1e11:
+        step /= 1000.0
+    return step
+
+
+class QuantileSketch:
+    """
+    Relative-error quantile sketch (DDSketch style): values are counted in
+    logarithmic buckets, so memory stays bounded and sketches merge by adding counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.counts = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+
+    def add(self, values):
+        """Add a batch of non-negative values (vectorised)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        if len(positive):
+            keys = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+            unique, counts = np.unique(keys, return_counts=True)
+            for key, count in zip(unique.tolist(), counts.tolist()):
+                self.counts[key] = self.counts.get(key, 0) + count
+        return self
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """Approximate q-th percentile (0-100), within relative_accuracy of the true value"""
+        if self.count == 0:
+            return None
+        rank = q / 100.0 * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+def series_statistics(timestamps, values, bucket_seconds=None, quantiles=QUANTILES):
+    """
+    Per-second TPS statistics of one per-bucket series.
+    Returns bucket_seconds, samples, tps_peak, tps_mean and tps_p<q> for each quantile.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    bucket_seconds = bucket_seconds or detect_bucket_seconds(timestamps) or DEFAULT_BUCKET_SECONDS
+    stats = {'bucket_seconds': bucket_seconds, 'samples': int(len(values))}
+    if len(values) == 0:
+        return stats
+
+    rates = values / bucket_seconds
+    stats['tps_peak'] = float(rates.max())
+    stats['tps_mean'] = float(rates.mean())
+    if len(rates) <= EXACT_PERCENTILE_LIMIT:
+        for q, value in zip(quantiles, np.percentile(rates, quantiles)):
+            stats[f'tps_p{q}'] = float(value)
+    else:
+        sketch = QuantileSketch().add(rates)
+        for q in quantiles:
+            stats[f'tps_p{q}'] = sketch.quantile(q)
+    return stats
+
+
+def streaming_statistics(chunks, bucket_seconds, quantiles=QUANTILES):
+    """Statistics over an iterable of value chunks without holding the whole range in memory"""
+    sketch = QuantileSketch()
+    for chunk in chunks:
+        sketch.add(np.asarray(chunk, dtype=np.float64) / bucket_seconds)
+    stats = {'bucket_seconds': bucket_seconds, 'samples': sketch.count}
+    if sketch.count == 0:
+        return stats
+    stats['tps_peak'] = sketch.max
+    stats['tps_mean'] = sketch.sum / sketch.count
+    for q in quantiles:
+        stats[f'tps_p{q}'] = sketch.quantile(q)
+    return stats
+
+
+def apply_series_statistics(tps_data, series):
+    """
+    Merge series statistics into parsed TPS records (matched by metric name) and
+    recompute 'tps' with the detected bucket width instead of a fixed 60 seconds.
+    series: {metric name: [[timestamp, value], ...]}
+    """
+    if not tps_data or not series:
+        return tps_data
+    normalised = {canonical_metric(name.strip()).lower(): points for name, points in series.items()}
+    for item in tps_data:
+        points = normalised.get(item['metric'].strip().lower())
+        if not points:
+            continue
+        data = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        stats = series_statistics(data[:, 0], data[:, 1])
+        item.update(stats)
+        if item.get('max') is not None:
+            item['tps'] = item['max'] / stats['bucket_seconds']
+    return tps_data
+
+
+def format_percentiles(item):
+    """Short report suffix such as 'p50/p95/p99: 610/790/845'"""
+    if 'tps_p50' not in item:
+        return ""
+    return f"p50/p95/p99: {item['tps_p50']:.0f}/{item['tps_p95']:.0f}/{item['tps_p99']:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TPS statistics engine')
+    parser.add_argument('--benchmark', type=int, default=0, metavar='N',
+                        help='Compare exact and sketch percentiles on N synthetic 1-minute buckets')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        rng = np.random.default_rng(0)
+        timestamps = np.arange(args.benchmark, dtype=np.float64) * 60_000
+        values = rng.gamma(9.0, 5000.0, args.benchmark)
+
+        started = time.perf_counter()
+        exact = series_statistics(timestamps, values)
+        exact_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        sketched = streaming_statistics(np.array_split(values, max(1, args.benchmark // 100_000)), 60)
+        sketch_ms = (time.perf_counter() - started) * 1000
+
+        print(f"⏱️  {args.benchmark} buckets: exact {exact_ms:.1f} ms, sketch {sketch_ms:.1f} ms")
+        for q in QUANTILES:
+            print(f"   p{q}: exact={exact[f'tps_p{q}']:.2f}  sketch={sketched[f'tps_p{q}']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
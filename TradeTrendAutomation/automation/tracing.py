@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Pipeline Span Tracing
+Nested timing spans around every pipeline stage (browser setup, login,
+navigation, captures, parsing, history write, DingTalk calls). Each finished
+span is written as one JSON line to traces/run_<timestamp>.jsonl; finish()
+prints a summary table of where the run's time went.
+
+    with span('click_trade_trends') as s:
+        s.set(selector=selector)
+
+    @traced('setup_driver')
+    def setup_driver(self): ...
+
+Spans nest per thread; attributes must be JSON-serialisable.
+
+traces/ is bounded when each run starts (prune_traces): at most
+MAX_TRACE_FILES run traces and MAX_PERF_DIRS --perf-trace directories,
+none older than MAX_TRACE_AGE_DAYS; the oldest go first.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import functools
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TRACE_DIR = os.path.join(project_root, "traces")
+
+# traces/ bounds; perf directories (chrome_perf.py) are several MB each, so fewer are kept
+MAX_TRACE_FILES = 200
+MAX_PERF_DIRS = 20
+MAX_TRACE_AGE_DAYS = 14
+# Entries younger than this may belong to a run that is still writing them
+MIN_TRACE_AGE_SECONDS = 10 * 60
+
+
+class Span:
+    def __init__(self, name, trace_id, parent, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.depth = parent.depth + 1 if parent else 0
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attributes):
+        """Attach attributes (selector matched, bytes uploaded, ...)"""
+        self.attributes.update(attributes)
+
+    def fail(self, error=None):
+        """Mark the span failed without raising (stages that report failure by return value)"""
+        self.status = "error"
+        if error is not None:
+            self.attributes['error'] = str(error)
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'depth': self.depth,
+            'start': datetime.fromtimestamp(self.start_time).isoformat(timespec='milliseconds'),
+            'duration_ms': round(self.duration * 1000, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+class _NoSpan:
+    """Returned by current_span() outside any span so callers never need to check"""
+
+    def set(self, **attributes):
+        pass
+
+    def fail(self, error=None):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.path = None
+        self.spans = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def start_run(self, trace_dir=DEFAULT_TRACE_DIR, path=None):
+        """Begin a new trace; spans are appended to `path` (default traces/run_<timestamp>.jsonl)"""
+        self.close()
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        if path is None and trace_dir:
+            try:
+                prune_traces(trace_dir)
+            except OSError:
+                pass  # a full or read-only traces/ must not stop the run
+            path = os.path.join(trace_dir, f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.jsonl")
+        self.path = path
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, 'a', encoding='utf-8')
+        return self.path
+
+    def current_span(self):
+        stack = self._stack()
+        return stack[-1] if stack else NO_SPAN
+
+    @contextmanager
+    def span(self, name, **attributes):
+        stack = self._stack()
+        current = Span(name, self.trace_id, stack[-1] if stack else None, attributes)
+        stack.append(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.fail(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            current.duration = time.perf_counter() - current._started
+            stack.pop()
+            self._emit(current)
+
+    def _emit(self, span):
+        with self._lock:
+            self.spans.append(span)
+            if self._file:
+                self._file.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def summary(self):
+        """Rows of (name, depth, calls, total seconds, failures) in first-start order, merged by path"""
+        by_id = {span.span_id: span for span in self.spans}
+        rows = {}
+        for span in sorted(self.spans, key=lambda s: (s.start_time, s.depth)):
+            path, parent = [span.name], by_id.get(span.parent_id)
+            while parent:
+                path.insert(0, parent.name)
+                parent = by_id.get(parent.parent_id)
+            row = rows.setdefault(tuple(path), [span.name, span.depth, 0, 0.0, 0])
+            row[2] += 1
+            row[3] += span.duration
+            row[4] += span.status != "ok"
+        return [tuple(row) for row in rows.values()]
+
+    def format_summary(self):
+        rows = self.summary()
+        if not rows:
+            return "No spans recorded"
+        total = sum(row[3] for row in rows if row[1] == 0) or 1e-9
+        lines = [f"{'span':<40} {'calls':>5} {'total s':>9} {'%run':>6} {'fail':>5}"]
+        for name, depth, calls, seconds, failures in rows:
+            label = ("  " * depth + name)[:40]
+            lines.append(f"{label:<40} {calls:>5} {seconds:>9.3f} {seconds / total:>6.1%} {failures or '':>5}")
+        return "\n".join(lines)
+
+    def finish(self):
+        """Close the trace file and log the summary table"""
+        from pipeline_logging import get_logger
+        logger = get_logger('tracing')
+        self.close()
+        logger.info("⏱️  Span summary:\n%s", self.format_summary())
+        if self.path:
+            logger.info("🧾 Spans written to: %s", self.path)
+
+
+TRACER = Tracer()
+
+
+def prune_traces(trace_dir=None, max_files=MAX_TRACE_FILES, max_perf_dirs=MAX_PERF_DIRS,
+                 max_age_days=MAX_TRACE_AGE_DAYS, now=None):
+    """Delete run traces (*.jsonl) and perf directories beyond the count / age bounds, oldest first; returns their names"""
+    trace_dir = trace_dir or DEFAULT_TRACE_DIR
+    now = now or time.time()
+    try:
+        names = os.listdir(trace_dir)
+    except FileNotFoundError:
+        return []
+
+    groups = {False: [], True: []}
+    for name in names:
+        path = os.path.join(trace_dir, name)
+        is_perf = name.endswith('.perf') or name.startswith('perf_')
+        if not is_perf and not name.endswith('.jsonl'):
+            continue
+        try:
+            groups[is_perf].append((os.stat(path).st_mtime, name))
+        except FileNotFoundError:
+            continue
+
+    removed = []
+    for is_perf, limit in ((False, max_files), (True, max_perf_dirs)):
+        for position, (mtime, name) in enumerate(sorted(groups[is_perf], reverse=True)):
+            age = now - mtime
+            if age < MIN_TRACE_AGE_SECONDS or (position < limit and age <= max_age_days * 86400):
+                continue
+            path = os.path.join(trace_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            removed.append(name)
+    return removed
+
+
+def span(name, **attributes):
+    return TRACER.span(name, **attributes)
+
+
+def current_span():
+    return TRACER.current_span()
+
+
+def traced(name=None):
+    """Decorator: run the function inside a span named `name` (default: the function name)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def load_spans(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarise a span trace (JSON lines)')
+    parser.add_argument('trace', nargs='?', help='Trace file (default: newest in traces/)')
+    parser.add_argument('--prune', action='store_true', help='Apply the traces/ count and age bounds now')
+    args = parser.parse_args()
+
+    if args.prune:
+        removed = prune_traces()
+        for name in removed:
+            print(f"🗑️ {name}")
+        print(f"🧹 {len(removed)} old traces removed from {DEFAULT_TRACE_DIR}")
+        return 0
+
+    path = args.trace
+    if not path:
+        traces = sorted(os.listdir(DEFAULT_TRACE_DIR)) if os.path.isdir(DEFAULT_TRACE_DIR) else []
+        if not traces:
+            print(f"❌ No traces in {DEFAULT_TRACE_DIR}")
+            return 1
+        path = os.path.join(DEFAULT_TRACE_DIR, traces[-1])
+
+    tracer = Tracer()
+    for record in load_spans(path):
+        restored = Span(record['name'], record['trace_id'], None, record['attributes'])
+        restored.span_id, restored.parent_id = record['span_id'], record['parent_id']
+        restored.depth, restored.status = record['depth'], record['status']
+        restored.start_time = datetime.fromisoformat(record['start']).timestamp()
+        restored.duration = record['duration_ms'] / 1000.0
+        tracer.spans.append(restored)
+    print(f"🧾 {path}")
+    print(tracer.format_summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
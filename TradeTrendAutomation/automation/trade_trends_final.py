@@ -5,12 +5,7 @@ import argparse
 import os
 import sys
 import json
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import logging
 
 # Add credentials directory to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -18,11 +13,75 @@ credentials_dir = os.path.join(project_root, "credentials")
 sys.path.insert(0, credentials_dir)
 
 from credentials_loader import get_xflush_credentials
+from statistics_parser import parse_statistics, STATISTICS_KEYWORDS
+from tracing import traced, span, current_span
+from pipeline_logging import get_logger, add_logging_arguments, configure_from_args
+from chrome_perf import ChromePerfRecorder, enable_performance_logging, perf_output_dir, perf_stage
+from debug_artifacts import DebugArtifactStore
+from screenshot_retention import register_screenshot, enforce_retention, screenshot_dir
+from driver_cache import resolve_chromedriver
+from chrome_profile import ChromeProfiles, clear_session_state
+
+logger = get_logger(__name__)
+
+# Selenium names, bound by _load_selenium() when a browser stage first runs, so
+# parse-only / send-only / history callers of this module never import Selenium
+webdriver = By = Options = Service = WebDriverWait = EC = TimeoutException = NoSuchElementException = None
+
+
+def _load_selenium():
+    global webdriver, By, Options, Service, WebDriverWait, EC, TimeoutException, NoSuchElementException
+    if webdriver is not None:
+        return
+    from selenium import webdriver as selenium_webdriver
+    from selenium.webdriver.common.by import By as by
+    from selenium.webdriver.chrome.options import Options as options
+    from selenium.webdriver.chrome.service import Service as service
+    from selenium.webdriver.support.ui import WebDriverWait as wait
+    from selenium.webdriver.support import expected_conditions
+    from selenium.common.exceptions import TimeoutException as timeout, NoSuchElementException as no_such_element
+    webdriver, By, Options, Service = selenium_webdriver, by, options, service
+    WebDriverWait, EC = wait, expected_conditions
+    TimeoutException, NoSuchElementException = timeout, no_such_element
+
+def parse_time_range(time_range_str, now=None):
+    """
+    Parse a --time-range value into (start, end) datetimes
+    Accepts "today" or "2025-11-05 00:00:00,2025-11-05 23:59:59"; raises ValueError otherwise
+    """
+    from datetime import datetime
+    
+    if time_range_str.strip().lower() == "today":
+        # Use today's date from 00:00:00 to 23:59:59
+        today = (now or datetime.now()).replace(microsecond=0)
+        return (today.replace(hour=0, minute=0, second=0),
+                today.replace(hour=23, minute=59, second=59))
+    
+    # Parse custom range: "2025-11-05 00:00:00,2025-11-05 23:59:59"
+    parts = time_range_str.split(',')
+    if len(parts) != 2:
+        raise ValueError("expected 'start,end'")
+    
+    start_dt = datetime.strptime(parts[0].strip(), "%Y-%m-%d %H:%M:%S")
+    end_dt = datetime.strptime(parts[1].strip(), "%Y-%m-%d %H:%M:%S")
+    
+    # Validate: end must be after start
+    if end_dt <= start_dt:
+        raise ValueError("end time must be after start time")
+    
+    return start_dt, end_dt
 
 class TradeTrendsAutomation:
-    def __init__(self, headless=False, credentials=None):
+    def __init__(self, headless=False, credentials=None, perf_trace=False, persistent_profile=True):
         self.driver = None
         self.headless = headless
+        self.perf_trace = perf_trace  # record a DevTools trace + per-stage Performance.getMetrics
+        self.perf = None
+        self.persistent_profile = persistent_profile  # reuse a cached Chrome profile (automation/chrome_profile.py)
+        self.profile = None
+        self.debug_artifacts = DebugArtifactStore()  # DOM + screenshot on failure / sampled runs
+        self.time_range = None  # (start, end) datetimes once set_time_range() succeeds
+        self.chart_series = None  # {series name: [[timestamp_ms, value], ...]} from the chart
         
         # Load XFlush credentials from file
         if credentials is None:
@@ -35,9 +94,15 @@ class TradeTrendsAutomation:
         self.window_size = credentials['browser_window_size']
         self.wait_timeout = credentials['browser_wait_timeout']
         self.screenshot_wait = credentials['screenshot_wait_time']
+        # The parser reads the Chinese UI too, so the English switch is opt-in
+        self.switch_to_english = credentials.get('switch_to_english', False)
         
+    @traced('setup_driver')
+    @perf_stage('setup_driver')
     def setup_driver(self):
         """Setup Chrome driver with optimized settings"""
+        current_span().set(headless=self.headless, window_size=self.window_size)
+        _load_selenium()
         chrome_options = Options()
         chrome_options.add_argument(f'--window-size={self.window_size}')
         chrome_options.add_argument('--no-sandbox')
@@ -47,89 +112,172 @@ class TradeTrendsAutomation:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
         
+        if self.perf_trace:
+            enable_performance_logging(chrome_options)
+        
+        if self.persistent_profile and self.profile is None:
+            try:
+                self.profile = ChromeProfiles().acquire()
+                current_span().set(chrome_profile=self.profile.name)
+            except Exception as e:
+                logger.warning("⚠️ Persistent Chrome profile unavailable, starting with an empty one: %s", e)
+        if self.profile is not None:
+            for argument in self.profile.chrome_arguments():
+                chrome_options.add_argument(argument)
+        
         if self.headless:
             chrome_options.add_argument('--headless')
-            print("🚀 Starting Chrome browser (headless mode)...")
+            logger.info("🚀 Starting Chrome browser (headless mode)...")
         else:
-            print("🚀 Starting Chrome browser (visible mode)...")
+            logger.info("🚀 Starting Chrome browser (visible mode)...")
             
-        self.driver = webdriver.Chrome(options=chrome_options)
+        # An explicit driver path skips Selenium Manager's per-start lookup (automation/driver_cache.py)
+        driver_path, driver_source = resolve_chromedriver()
+        current_span().set(chromedriver=driver_path, chromedriver_source=driver_source)
+        try:
+            self.driver = webdriver.Chrome(service=Service(executable_path=driver_path), options=chrome_options)
+        except Exception as e:
+            if driver_source != 'cache':
+                raise
+            # e.g. SessionNotCreatedException after a Chrome update the signature check missed
+            logger.warning("⚠️ Cached chromedriver %s failed to start (%s); rediscovering", driver_path, e)
+            driver_path, driver_source = resolve_chromedriver(refresh=True)
+            current_span().set(chromedriver=driver_path, chromedriver_source=driver_source)
+            self.driver = webdriver.Chrome(service=Service(executable_path=driver_path), options=chrome_options)
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        if self.profile is not None:
+            # Keep the cached assets but not the last run's session / UI language, so login starts from the form
+            clear_session_state(self.driver, [self.login_url, self.trade_trends_url])
+        
+        if self.perf_trace:
+            try:
+                self.perf = ChromePerfRecorder(self.driver)
+                logger.info("🧭 Chrome performance trace enabled")
+            except Exception as e:
+                logger.warning("⚠️ Chrome performance trace unavailable: %s", e)
+    
+    def record_perf_stage(self, stage):
+        """Performance.getMetrics snapshot for a finished stage; its summary goes on the stage's span"""
+        try:
+            snapshot = self.perf.snapshot(stage)
+            summary = self.perf.summary(snapshot)
+            current_span().set(**summary)
+            logger.debug("🧭 %s: %s", stage, summary)
+        except Exception as e:
+            logger.debug("Performance snapshot for %s failed: %s", stage, e)
+    
+    def save_perf_artifacts(self, trace_path=None):
+        """Write the compressed trace / DevTools log / metrics next to the run's span trace; returns the directory"""
+        if self.perf is None:
+            return None
+        try:
+            output_dir = perf_output_dir(trace_path)
+            self.perf.save(output_dir)
+            logger.info("🧭 Chrome performance artifacts saved to: %s", output_dir)
+            return output_dir
+        except Exception as e:
+            logger.warning("⚠️ Could not save Chrome performance artifacts: %s", e)
+            return None
+    
+    def capture_debug_artifacts(self, stage, error=None, reason='failure'):
+        """Store the current DOM + screenshot (see automation/debug_artifacts.py); returns the capture id"""
+        span = current_span()
+        capture_id = self.debug_artifacts.capture(self.driver, stage, reason=reason, error=error,
+                                                  trace_id=getattr(span, 'trace_id', None))
+        if capture_id:
+            span.set(debug_capture=capture_id)
+        return capture_id
+    
+    def sample_debug_artifacts(self, stage):
+        """Capture a healthy page for TRADETREND_DEBUG_SAMPLE of the runs"""
+        if self.debug_artifacts.should_sample():
+            return self.capture_debug_artifacts(stage, reason='sampled')
+        return None
      
         
+    @traced('login_and_setup')
+    @perf_stage('login_and_setup')
     def login_and_setup(self):
-        """Complete login and language setup process"""
+        """Complete login (and optional language switch) process"""
         # Navigate to login page
-        print("🌐 Navigating to login page...")
-        self.driver.get(self.login_url)
-        time.sleep(1)  # Reduced from 3 to 1
+        logger.info("🌐 Navigating to login page...")
+        with span('open_login_page', url=self.login_url):
+            self.driver.get(self.login_url)
+            time.sleep(1)  # Reduced from 3 to 1
         
         # Login with credentials
-        print("🔐 Logging in...")
-        username_field = self.driver.find_element(By.CSS_SELECTOR, "input[type='text']")
-        password_field = self.driver.find_element(By.NAME, "password")
-        login_button = self.driver.find_element(By.XPATH, "//span[contains(text(), '登录')]/parent::button")
-        
-        username_field.send_keys(self.username)
-        password_field.send_keys(self.password)
-        login_button.click()
+        logger.info("🔐 Logging in...")
+        with span('submit_login'):
+            username_field = self.driver.find_element(By.CSS_SELECTOR, "input[type='text']")
+            password_field = self.driver.find_element(By.NAME, "password")
+            login_button = self.driver.find_element(By.XPATH, "//span[contains(text(), '登录')]/parent::button")
+            
+            username_field.send_keys(self.username)
+            password_field.send_keys(self.password)
+            login_button.click()
         
         # Wait for dashboard to load
-        print("⏳ Waiting for dashboard to load...")
-        time.sleep(5)  # Reduced from 10 to 5
+        logger.info("⏳ Waiting for dashboard to load...")
+        with span('wait_dashboard', sleep_s=5):
+            time.sleep(5)  # Reduced from 10 to 5
         
-        # Change language to English
-        print("🌐 Changing language to English...")
-        try:
-            location_icons = self.driver.find_elements(By.CSS_SELECTOR, "i.anticon.anticon-environment-o")
-            if location_icons:
-                location_icons[0].click()
-                time.sleep(1)  # Reduced from 2 to 1
+        # Change language to English (only when configured; parsing is language-independent)
+        if self.switch_to_english:
+            logger.info("🌐 Changing language to English...")
+            try:
+                location_icons = self.driver.find_elements(By.CSS_SELECTOR, "i.anticon.anticon-environment-o")
+                if location_icons:
+                    location_icons[0].click()
+                    time.sleep(1)  # Reduced from 2 to 1
                 
-                english_elements = self.driver.find_elements(By.XPATH, "//a[contains(text(), 'English')]")
-                if english_elements:
-                    english_elements[0].click()
-                    time.sleep(1)  # Reduced from 3 to 1
-                    print("✅ Language changed to English")
+                    english_elements = self.driver.find_elements(By.XPATH, "//a[contains(text(), 'English')]")
+                    if english_elements:
+                        english_elements[0].click()
+                        time.sleep(1)  # Reduced from 3 to 1
+                        logger.info("✅ Language changed to English")
+                    else:
+                        logger.warning("⚠️  English option not found, continuing...")
                 else:
-                    print("⚠️  English option not found, continuing...")
-            else:
-                print("⚠️  Location icon not found, continuing...")
-        except Exception as e:
-            print(f"⚠️  Language change had issues: {e}, continuing...")
+                    logger.warning("⚠️  Location icon not found, continuing...")
+            except Exception as e:
+                logger.warning("⚠️  Language change had issues: %s, continuing...", e)
         
         # Navigate to Trade Trends dashboard
-        print(f"🎯 Navigating to Trade Trends dashboard...")
-        self.driver.get(self.trade_trends_url)
-        time.sleep(2)  # Reduced from 3 to 2
+        logger.info("🎯 Navigating to Trade Trends dashboard...")
+        with span('open_trade_trends_page', url=self.trade_trends_url):
+            self.driver.get(self.trade_trends_url)
+            time.sleep(2)  # Reduced from 3 to 2
         
-        print(f"📍 Current URL: {self.driver.current_url}")
-        print(f"📄 Page Title: {self.driver.title}")
+        logger.info("📍 Current URL: %s", self.driver.current_url)
+        logger.info("📄 Page Title: %s", self.driver.title)
         
         return True
     
+    @traced('click_trade_trends')
+    @perf_stage('click_trade_trends')
     def click_trade_trends(self):
         """Find and click on Trade Trends element"""
-        print("🔍 Looking for Trade Trends...")
+        logger.info("🔍 Looking for Trade Trends...")
         
         trade_trends_selectors = [
             "//span[contains(text(), 'Trade Trends')]",
             "//div[contains(text(), 'Trade Trends')]",
             "//*[contains(text(), 'Trade Trends')]",
+            "//*[contains(text(), '交易趋势')]",
         ]
         
         for selector in trade_trends_selectors:
             try:
-                print(f"🔍 Trying selector: {selector}")
+                logger.debug("🔍 Trying selector: %s", selector)
                 elements = self.driver.find_elements(By.XPATH, selector)
                 
                 for element in elements:
                     if element.is_displayed() and element.is_enabled():
                         element_text = element.text.strip()
-                        print(f"✅ Found element: '{element_text}'")
+                        logger.debug("✅ Found element: '%s'", element_text)
                         
-                        if 'trade trends' in element_text.lower():
-                            print(f"🎯 Clicking on Trade Trends: '{element_text}'")
+                        if 'trade trends' in element_text.lower() or '交易趋势' in element_text:
+                            logger.info("🎯 Clicking on Trade Trends: '%s'", element_text)
                             
                             # Scroll to element and click
                             self.driver.execute_script("arguments[0].scrollIntoView(true);", element)
@@ -137,60 +285,41 @@ class TradeTrendsAutomation:
                             element.click()
                             time.sleep(2)  # Reduced from 3 to 2
                             
-                            print("✅ Clicked Trade Trends successfully!")
+                            logger.info("✅ Clicked Trade Trends successfully!")
+                            current_span().set(selector=selector, element_text=element_text)
                             return True
                             
             except Exception as e:
-                print(f"❌ Error with selector {selector}: {e}")
+                logger.debug("❌ Error with selector %s: %s", selector, e)
                 continue
         
-        print("❌ Trade Trends not found")
+        logger.error("❌ Trade Trends not found")
+        current_span().fail("Trade Trends not found")
         return False
     
+    @traced('set_time_range')
+    @perf_stage('set_time_range')
     def set_time_range(self, time_range_str):
         """Set the time range for Trade Trends based on input string"""
-        from datetime import datetime
-        
         if not time_range_str:
-            print("⏰ No time range specified, using default")
+            logger.info("⏰ No time range specified, using default")
             return True
         
         try:
-            # Parse time range input
+            start_dt, end_dt = parse_time_range(time_range_str)
+            start_date = start_dt.strftime("%Y-%m-%d")
+            start_time = start_dt.strftime("%H:%M:%S")
+            end_date = end_dt.strftime("%Y-%m-%d")
+            end_time = end_dt.strftime("%H:%M:%S")
+            
             if time_range_str.lower() == "today":
-                # Use today's date from 00:00:00 to 23:59:59
-                today = datetime.now()
-                start_date = today.strftime("%Y-%m-%d")
-                start_time = "00:00:00"
-                end_date = today.strftime("%Y-%m-%d")
-                end_time = "23:59:59"
-                print(f"⏰ Using today's range: {start_date} {start_time} to {end_date} {end_time}")
+                logger.info("⏰ Using today's range: %s %s to %s %s", start_date, start_time, end_date, end_time)
             else:
-                # Parse custom range: "2025-11-05 00:00:00,2025-11-05 23:59:59"
-                parts = time_range_str.split(',')
-                if len(parts) != 2:
-                    print("❌ Invalid time range format. Use: '2025-11-05 00:00:00,2025-11-05 23:59:59'")
-                    return False
-                
-                start_datetime_str = parts[0].strip()
-                end_datetime_str = parts[1].strip()
-                
-                # Parse start datetime
-                start_dt = datetime.strptime(start_datetime_str, "%Y-%m-%d %H:%M:%S")
-                start_date = start_dt.strftime("%Y-%m-%d")
-                start_time = start_dt.strftime("%H:%M:%S")
-                
-                # Parse end datetime
-                end_dt = datetime.strptime(end_datetime_str, "%Y-%m-%d %H:%M:%S")
-                end_date = end_dt.strftime("%Y-%m-%d")
-                end_time = end_dt.strftime("%H:%M:%S")
-                
-                # Validate: end must be after start
-                if end_dt <= start_dt:
-                    print("❌ End time must be after start time")
-                    return False
-                
-                print(f"⏰ Using custom range: {start_date} {start_time} to {end_date} {end_time}")
+                logger.info("⏰ Using custom range: %s %s to %s %s", start_date, start_time, end_date, end_time)
+            
+            # Remember the data window so saved TPS records can be compared period-over-period
+            self.time_range = (start_dt, end_dt)
+            current_span().set(start=start_dt.isoformat(), end=end_dt.isoformat())
             
             # Wait for page to load
             time.sleep(1)  # Reduced from 3 to 1
@@ -201,9 +330,9 @@ class TradeTrendsAutomation:
                     "//input[contains(@ng-model, 'timeInputs.startTime') and contains(@date-format, 'yyyy-MM-dd')]")
                 start_date_input.clear()
                 start_date_input.send_keys(start_date)
-                print(f"  ✅ Set start date: {start_date}")
+                logger.info("  ✅ Set start date: %s", start_date)
             except Exception as e:
-                print(f"  ⚠️ Could not set start date: {e}")
+                logger.warning("  ⚠️ Could not set start date: %s", e)
             
             # Set start time
             try:
@@ -211,9 +340,9 @@ class TradeTrendsAutomation:
                     "//input[contains(@ng-model, 'timeInputs.startTime') and contains(@time-format, 'HH:mm:ss')]")
                 start_time_input.clear()
                 start_time_input.send_keys(start_time)
-                print(f"  ✅ Set start time: {start_time}")
+                logger.info("  ✅ Set start time: %s", start_time)
             except Exception as e:
-                print(f"  ⚠️ Could not set start time: {e}")
+                logger.warning("  ⚠️ Could not set start time: %s", e)
             
             # Set end date
             try:
@@ -221,9 +350,9 @@ class TradeTrendsAutomation:
                     "//input[contains(@ng-model, 'timeInputs.endTime') and contains(@date-format, 'yyyy-MM-dd')]")
                 end_date_input.clear()
                 end_date_input.send_keys(end_date)
-                print(f"  ✅ Set end date: {end_date}")
+                logger.info("  ✅ Set end date: %s", end_date)
             except Exception as e:
-                print(f"  ⚠️ Could not set end date: {e}")
+                logger.warning("  ⚠️ Could not set end date: %s", e)
             
             # Set end time
             try:
@@ -231,33 +360,37 @@ class TradeTrendsAutomation:
                     "//input[contains(@ng-model, 'timeInputs.endTime') and contains(@time-format, 'HH:mm:ss')]")
                 end_time_input.clear()
                 end_time_input.send_keys(end_time)
-                print(f"  ✅ Set end time: {end_time}")
+                logger.info("  ✅ Set end time: %s", end_time)
             except Exception as e:
-                print(f"  ⚠️ Could not set end time: {e}")
+                logger.warning("  ⚠️ Could not set end time: %s", e)
             
             # Click Query button to apply the time range
             try:
                 query_button = self.driver.find_element(By.XPATH, 
                     "//button[@ng-click='query()']")
                 query_button.click()
-                print("  ✅ Clicked Query button")
+                logger.info("  ✅ Clicked Query button")
                 time.sleep(2)  # Reduced from 3 to 2 - Wait for chart to update
             except Exception as e:
-                print(f"  ⚠️ Could not click Query button: {e}")
+                logger.warning("  ⚠️ Could not click Query button: %s", e)
             
             return True
             
         except ValueError as e:
-            print(f"❌ Invalid date/time format: {e}")
-            print("   Use format: YYYY-MM-DD HH:MM:SS")
+            current_span().fail(e)
+            logger.error("❌ Invalid time range: %s", e)
+            logger.info("   Use: 'today' or 'YYYY-MM-DD HH:MM:SS,YYYY-MM-DD HH:MM:SS'")
             return False
         except Exception as e:
-            print(f"❌ Error setting time range: {e}")
+            current_span().fail(e)
+            logger.error("❌ Error setting time range: %s", e)
             return False
     
+    @traced('capture_chart_only')
+    @perf_stage('capture_chart_only')
     def capture_chart_only(self):
         """Capture Trade Trends chart with time range form"""
-        print("📸 Capturing Trade Trends chart with time range...")
+        logger.info("📸 Capturing Trade Trends chart with time range...")
         
         time.sleep(2)  # Reduced from 3 to 2 - Wait for chart to load
         
@@ -268,43 +401,51 @@ class TradeTrendsAutomation:
                 # Find the container that has both the form and chart
                 container_element = self.driver.find_element(By.XPATH, 
                     "//div[contains(@class, 'xf-pop-up-container')]")
-                print("  ✅ Found full container (form + chart)")
+                current_span().set(selector="//div[contains(@class, 'xf-pop-up-container')]")
+                logger.debug("  ✅ Found full container (form + chart)")
             except:
                 # Fallback to just the chart if the form container isn't found
                 container_element = self.driver.find_element(By.XPATH, 
                     "//div[@class='jr xf-chart' and @chart-title='Trade Trends']")
-                print("  ℹ️ Using chart only (form container not found)")
+                current_span().set(selector="//div[@class='jr xf-chart' and @chart-title='Trade Trends']")
+                logger.debug("  ℹ️ Using chart only (form container not found)")
             
             # Generate filename
             timestamp = int(time.time())
             filename = f"trade_trends_chart_{timestamp}.png"
-            # Use absolute path to screenshots directory
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            filepath = os.path.join(project_root, "screenshots", filename)
+            filepath = os.path.join(screenshot_dir(), filename)
             
             # Scroll to element and capture
             self.driver.execute_script("arguments[0].scrollIntoView(true);", container_element)
             time.sleep(1)  # Reduced from 2 to 1
-            container_element.screenshot(filepath)
+            with span('screenshot', target='chart') as shot:
+                container_element.screenshot(filepath)
+                shot.set(bytes=os.path.getsize(filepath))
+            register_screenshot(filepath)
             
-            print(f"✅ Chart captured: {filename}")
-            print(f"📐 Captured area: {container_element.size['width']}x{container_element.size['height']}")
+            logger.info("✅ Chart captured: %s", filename)
+            logger.info("📐 Captured area: %sx%s", container_element.size['width'], container_element.size['height'])
             
             return filepath
             
         except Exception as e:
-            print(f"❌ Chart capture failed: {e}")
+            current_span().fail(e)
+            logger.error("❌ Chart capture failed: %s", e)
             return None
     
     
+    @traced('capture_statistics_info')
+    @perf_stage('capture_statistics_info')
     def capture_statistics_info(self):
         """Capture the Statistics Info table specifically"""
-        print("📊 Looking for Statistics Info icon to click...")
+        logger.info("📊 Looking for Statistics Info icon to click...")
         
         try:
             # Wait a bit for the interface to load completely
             time.sleep(2)  # Reduced from 3 to 2
             
+            self.sample_debug_artifacts('before_statistics')
+            
             # First, try to click the Statistics Info icon to open the popup
             statistics_icon_clicked = False
             
@@ -320,7 +461,7 @@ class TradeTrendsAutomation:
             
             for selector in icon_selectors:
                 try:
-                    print(f"🔍 Trying icon selector: {selector}")
+                    logger.debug("🔍 Trying icon selector: %s", selector)
                     
                     # Use WebDriverWait to find element reliably
                     try:
@@ -328,16 +469,16 @@ class TradeTrendsAutomation:
                             EC.presence_of_all_elements_located((By.XPATH, selector))
                         )
                     except TimeoutException:
-                        print(f"⚠️ Timeout finding elements with: {selector}")
+                        logger.debug("⚠️ Timeout finding elements with: %s", selector)
                         icon_elements = []
                     
-                    print(f"   Found {len(icon_elements)} elements with this selector")
+                    logger.debug("   Found %s elements with this selector", len(icon_elements))
                     
                     for i, icon in enumerate(icon_elements):
                         if icon.is_displayed():
                             # Try to click this icon
                             try:
-                                print(f"   Trying to click icon {i+1}...")
+                                logger.debug("   Trying to click icon %s...", i+1)
                                 
                                 # Scroll to element
                                 self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", icon)
@@ -349,65 +490,68 @@ class TradeTrendsAutomation:
                                 # Method 1: Direct click
                                 try:
                                     icon.click()
-                                    print(f"   ✅ Direct click succeeded on icon {i+1}")
+                                    logger.debug("   ✅ Direct click succeeded on icon %s", i+1)
                                     click_success = True
                                 except Exception as e:
-                                    print(f"   ❌ Direct click failed: {e}")
+                                    logger.debug("   ❌ Direct click failed: %s", e)
                                 
                                 # Method 2: JavaScript click
                                 if not click_success:
                                     try:
                                         self.driver.execute_script("arguments[0].click();", icon)
-                                        print(f"   ✅ JavaScript click succeeded on icon {i+1}")
+                                        logger.debug("   ✅ JavaScript click succeeded on icon %s", i+1)
                                         click_success = True
                                     except Exception as e:
-                                        print(f"   ❌ JavaScript click failed: {e}")
+                                        logger.debug("   ❌ JavaScript click failed: %s", e)
                                 
                                 # Method 3: Click parent element
                                 if not click_success:
                                     try:
                                         parent = icon.find_element(By.XPATH, "..")
                                         parent.click()
-                                        print(f"   ✅ Parent click succeeded on icon {i+1}")
+                                        logger.debug("   ✅ Parent click succeeded on icon %s", i+1)
                                         click_success = True
                                     except Exception as e:
-                                        print(f"   ❌ Parent click failed: {e}")
+                                        logger.debug("   ❌ Parent click failed: %s", e)
                                 
                                 if click_success:
                                     statistics_icon_clicked = True
+                                    current_span().set(icon_selector=selector, icon_index=i + 1)
                                     
                                     # Wait for popup to appear
-                                    print("⏳ Waiting for statistics popup to appear...")
-                                    time.sleep(3)  # Reduced from 8 to 3
+                                    logger.info("⏳ Waiting for statistics popup to appear...")
+                                    with span('wait_statistics_popup', sleep_s=3):
+                                        time.sleep(3)  # Reduced from 8 to 3
                                     
                                     # Check if popup appeared by looking for the table
                                     popup_check = self.driver.find_elements(By.XPATH, "//div[contains(@class, 'xf-line-chart-stat-wrapper')]")
                                     if popup_check and popup_check[0].is_displayed():
-                                        print(f"✅ Statistics popup appeared after clicking icon {i+1}!")
+                                        logger.info("✅ Statistics popup appeared after clicking icon %s!", i+1)
                                         break
                                     else:
-                                        print(f"❌ No popup appeared after clicking icon {i+1}, trying next...")
+                                        logger.warning("⚠️ No popup appeared after clicking icon %s, trying next...", i+1)
                                         statistics_icon_clicked = False
                                         continue
                                         
                             except Exception as e:
-                                print(f"   ❌ Failed to click icon {i+1}: {e}")
+                                logger.warning("   ⚠️ Failed to click icon %s: %s", i+1, e)
                                 continue
                     
                     if statistics_icon_clicked:
                         break
                         
                 except Exception as e:
-                    print(f"⚠️ Selector failed: {e}")
+                    logger.debug("⚠️ Selector failed: %s", e)
                     continue
             
             # If no icon was clicked successfully, return None
             if not statistics_icon_clicked:
-                print("❌ Could not click any statistics icon!")
+                current_span().fail("statistics icon not clickable")
+                logger.error("❌ Could not click any statistics icon!")
                 return None
             
             # Now try to find the statistics popup that should have appeared
-            print("🔍 Looking for Statistics Info popup...")
+            logger.info("🔍 Looking for Statistics Info popup...")
             
             # Try different selectors to find the statistics popup
             statistics_selectors = [
@@ -417,6 +561,7 @@ class TradeTrendsAutomation:
                 "//h3[contains(text(), 'Statistics Info')]", 
                 "//span[contains(text(), 'Statistics Info')]",
                 "//*[contains(text(), 'Statistics Info')]",
+                "//*[contains(text(), '统计信息')]",
                 "//table[contains(@class, 'xf-table')]",
                 "//div[contains(@class, 'xf-pop-up')]//table",
                 "//div[@class='table-responsive']//table",
@@ -427,19 +572,18 @@ class TradeTrendsAutomation:
             
             for selector in statistics_selectors:
                 try:
-                    print(f"🔍 Trying statistics selector: {selector}")
+                    logger.debug("🔍 Trying statistics selector: %s", selector)
                     elements = self.driver.find_elements(By.XPATH, selector)
                     
                     for element in elements:
                         if element.is_displayed():
                             element_text = element.text.strip()
-                            print(f"✅ Found element with text: '{element_text[:100]}...'")
+                            logger.debug("✅ Found element with text: '%s...'", element_text[:100])
                             
                             # Check if this looks like statistics info
-                            if any(keyword in element_text.lower() for keyword in 
-                                  ['statistics', 'column', 'max', 'min', 'average', 'total', 'count',
-                                   'create order', 'payment apply', 'cashier consult', 'trade success']):
-                                print(f"🎯 Found Statistics Info element!")
+                            if any(keyword in element_text.lower() for keyword in STATISTICS_KEYWORDS):
+                                logger.info("🎯 Found Statistics Info element!")
+                                current_span().set(statistics_selector=selector)
                                 statistics_element = element
                                 break
                                 
@@ -447,42 +591,48 @@ class TradeTrendsAutomation:
                         break
                         
                 except Exception as e:
-                    print(f"⚠️ Selector {selector} failed: {e}")
+                    logger.debug("⚠️ Selector %s failed: %s", selector, e)
                     continue
 
             if not statistics_element:
-                print("❌ Statistics Info section not found, trying to find any table...")
+                logger.error("❌ Statistics Info section not found, trying to find any table...")
                 # Fallback: look for any table
                 try:
                     tables = self.driver.find_elements(By.TAG_NAME, "table")
                     for table in tables:
                         if table.is_displayed() and table.size['height'] > 100:
                             statistics_element = table
-                            print("✅ Found table element as fallback")
+                            current_span().set(statistics_selector="table (fallback)")
+                            logger.info("✅ Found table element as fallback")
                             break
                 except Exception as e:
-                    print(f"❌ Table fallback failed: {e}")
+                    logger.error("❌ Table fallback failed: %s", e)
 
             if statistics_element:
                 # Extract and parse statistics data first
                 try:
-                    print("📊 Extracting statistics data...")
+                    logger.info("📊 Extracting statistics data...")
                     statistics_text = statistics_element.text
-                    print(f"📝 Raw statistics text:\n{statistics_text}")
+                    logger.debug("📝 Raw statistics text:\n%s", statistics_text)
                     
                     # Parse the statistics data and calculate TPS
                     tps_data = self.extract_statistics_and_calculate_tps(statistics_text)
+                    
+                    # Per-bucket series gives the real bucket width and sustained-load percentiles
+                    self.chart_series = self.extract_chart_series()
+                    tps_data = self.apply_series_statistics(tps_data)
                     if tps_data:
-                        print("📈 TPS Calculation Results:")
+                        logger.info("📈 TPS Calculation Results:")
                         for item in tps_data:
-                            print(f"   📊 {item['metric']}: Max={item['max']}, TPS={item['tps']:.2f}")
+                            percentiles = f", p95={item['tps_p95']:.2f}" if 'tps_p95' in item else ""
+                            logger.info("   📊 %s: Max=%s, TPS=%.2f%s", item['metric'], item['max'], item['tps'], percentiles)
                         
                         # Save TPS data to file
                         self.save_tps_data(tps_data)
                     else:
-                        print("⚠️ No TPS data could be extracted")
+                        logger.warning("⚠️ No TPS data could be extracted")
                 except Exception as e:
-                    print(f"⚠️ Data extraction failed: {e}")
+                    logger.warning("⚠️ Data extraction failed: %s", e)
                 
                 # Scroll to the element to ensure it's visible
                 self.driver.execute_script("arguments[0].scrollIntoView(true);", statistics_element)
@@ -491,104 +641,106 @@ class TradeTrendsAutomation:
                 # Generate filename for statistics screenshot
                 timestamp = int(time.time())
                 filename = f"statistics_info_{timestamp}.png"
-                project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                filepath = os.path.join(project_root, "screenshots", filename)
+                filepath = os.path.join(screenshot_dir(), filename)
 
                 # Take screenshot of the statistics element
-                statistics_element.screenshot(filepath)
+                with span('screenshot', target='statistics') as shot:
+                    statistics_element.screenshot(filepath)
+                    shot.set(bytes=os.path.getsize(filepath))
+                register_screenshot(filepath)
 
-                print(f"✅ Statistics Info captured: {filename}")
-                print(f"📐 Captured area: {statistics_element.size['width']}x{statistics_element.size['height']}")
+                logger.info("✅ Statistics Info captured: %s", filename)
+                logger.info("📐 Captured area: %sx%s", statistics_element.size['width'], statistics_element.size['height'])
 
                 return filepath,statistics_text
             else:
-                print("❌ Could not find Statistics Info section")
+                current_span().fail("Statistics Info section not found")
+                logger.error("❌ Could not find Statistics Info section")
                 return None
 
         except Exception as e:
-            print(f"❌ Statistics Info capture failed: {e}")
+            current_span().fail(e)
+            logger.error("❌ Statistics Info capture failed: %s", e)
+            return None
+    
+    @traced('extract_chart_series')
+    def extract_chart_series(self):
+        """Read the per-bucket series behind the Trade Trends chart (Highcharts) via JavaScript"""
+        script = """
+            var charts = (window.Highcharts && window.Highcharts.charts) || [];
+            var scope = document.querySelector("div.xf-pop-up-container")
+                     || document.querySelector("div.xf-chart[chart-title='Trade Trends']");
+            var out = {};
+            charts.forEach(function (chart) {
+                if (!chart || (scope && chart.renderTo && !scope.contains(chart.renderTo))) { return; }
+                chart.series.forEach(function (s) {
+                    var xs = s.xData || [], ys = s.yData || [];
+                    if (!xs.length) {
+                        xs = s.data.map(function (p) { return p.x; });
+                        ys = s.data.map(function (p) { return p.y; });
+                    }
+                    out[s.name] = xs.map(function (x, i) { return [x, ys[i]]; });
+                });
+            });
+            return out;
+        """
+        try:
+            series = self.driver.execute_script(script)
+            current_span().set(series=len(series or {}), buckets=sum(len(v) for v in (series or {}).values()))
+            if series:
+                logger.info("📈 Chart series found: %s", ', '.join(f'{k} ({len(v)} buckets)' for k, v in series.items()))
+            else:
+                logger.info("ℹ️ No chart series available, using 60s buckets")
+            return series or None
+        except Exception as e:
+            logger.warning("⚠️ Could not read chart series: %s", e)
             return None
     
-    def extract_statistics_and_calculate_tps(self, statistics_text):
+    def apply_series_statistics(self, tps_data):
+        """Add detected bucket width and p50/p95/p99 TPS from the captured chart series"""
+        if not tps_data or not self.chart_series:
+            return tps_data
+        try:
+            from tps_statistics import apply_series_statistics
+            return apply_series_statistics(tps_data, self.chart_series)
+        except Exception as e:
+            logger.warning("⚠️ Series statistics skipped: %s", e)
+            return tps_data
+    
+    @traced('parse_statistics')
+    def extract_statistics_and_calculate_tps(self, statistics_text, bucket_seconds=60):
         """
         Extract statistics data from the popup text and calculate TPS
-        TPS = Max Trade Success / 60
+        TPS = Max / bucket_seconds (the dashboard's 1-minute buckets unless a series says otherwise)
+        Parsing itself lives in statistics_parser.py
         """
         try:
-            import re
-            
-            # Split the text into lines and process
-            lines = statistics_text.strip().split('\n')
-            tps_data = []
-            
-            print("🔍 Parsing statistics data:")
-            for line in lines:
-                print(f"   📝 Line: {line}")
-            
-            # Look for data patterns - the format appears to be:
-            # Column Max Min Average Total Count
-            # metric_name max_value min_value avg_value total_value count_value
-            
-            data_started = False
-            for i, line in enumerate(lines):
-                # Skip header lines until we find actual data
-                if 'Column' in line and 'Max' in line and 'Min' in line:
-                    print(f"   📊 Found header at line {i}: {line}")
-                    data_started = True
-                    continue
-                    
-                if data_started and line.strip():
-                    # Enhanced parsing for multi-word metrics
-                    # Pattern: "Metric Name number.nn number.nn number.nn number.nn number"
-                    # Use regex to capture metric name and numbers
-                    pattern = r'^(.+?)\s+(\d+\.?\d*)\s+(\d+\.?\d*)\s+(\d+\.?\d*)\s+(\d+\.?\d*)\s+(\d+)$'
-                    match = re.match(pattern, line.strip())
-                    
-                    if match:
-                        metric_name = match.group(1).strip()
-                        max_value = float(match.group(2))
-                        min_value = float(match.group(3))
-                        avg_value = float(match.group(4))
-                        total_value = float(match.group(5))
-                        count_value = int(match.group(6))
-                        
-                        # Calculate TPS: max / 60
-                        tps = max_value / 60
-                        
-                        result = {
-                            'metric': metric_name,
-                            'max': max_value,
-                            'min': min_value,
-                            'average': avg_value,
-                            'total': total_value,
-                            'count': count_value,
-                            'tps': tps,
-                            'raw_data': line.strip()
-                        }
-                        tps_data.append(result)
-                        
-                        print(f"   ✅ Parsed {metric_name}: Max={max_value}, TPS={tps:.2f}")
-                    else:
-                        print(f"   ⚠️ Could not parse line pattern: {line}")
-            
-            # Special handling for "Trade Success" metric for primary TPS calculation
-            trade_success_tps = None
-            for item in tps_data:
-                if 'Trade Success' in item['metric']:
-                    trade_success_tps = item['tps']
-                    print(f"🎯 Primary TPS (Trade Success): {trade_success_tps:.2f}")
-                    break
+            skipped = []
+            rows = parse_statistics(statistics_text, bucket_seconds, skipped)
+            if skipped:
+                logger.warning("⚠️ %d statistics line(s) could not be parsed (--verbose lists them)", len(skipped))
+            
+            tps_data = [row.to_dict() for row in rows]
+            current_span().set(chars=len(statistics_text), rows=len(rows), skipped=len(skipped))
+            # Per-line output only at DEBUG; skip the loops entirely otherwise
+            if logger.isEnabledFor(logging.DEBUG):
+                for line in skipped:
+                    logger.debug("   ⚠️ Could not parse line pattern: %s", line)
+                for item in tps_data:
+                    tps = "-" if item['tps'] is None else f"{item['tps']:.2f}"
+                    logger.debug("   ✅ Parsed %s: Max=%s, TPS=%s", item['metric'], item['max'], tps)
             
             return tps_data if tps_data else None
             
         except Exception as e:
-            print(f"❌ TPS calculation failed: {e}")
+            current_span().fail(e)
+            logger.error("❌ TPS calculation failed: %s", e)
             return None
     
+    @traced('history_write')
     def save_tps_data(self, tps_data):
         """Save TPS data to a JSON file with timestamp"""
         try:
-            import json
             from datetime import datetime
             
             # Create data structure with timestamp
@@ -598,40 +750,30 @@ class TradeTrendsAutomation:
                 'capture_time': timestamp,
                 'tps_calculations': tps_data
             }
+            if self.time_range:
+                data_to_save['time_range'] = {
+                    'start': self.time_range[0].isoformat(),
+                    'end': self.time_range[1].isoformat()
+                }
             
-            # Save to TPS data file
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            tps_file = os.path.join(project_root, "tps_data.json")
+            # Save to TPS data file (locked + atomic, safe for parallel runs)
+            from history_store import append_tps_record, DEFAULT_TPS_FILE
+            tps_file = DEFAULT_TPS_FILE
+            record_count = append_tps_record(data_to_save, tps_file)
+            current_span().set(metrics=len(tps_data), records=record_count)
             
-            # Load existing data if file exists
-            existing_data = []
-            if os.path.exists(tps_file):
-                try:
-                    with open(tps_file, 'r') as f:
-                        existing_data = json.load(f)
-                except:
-                    existing_data = []
-            
-            # Append new data
-            existing_data.append(data_to_save)
-            
-            # Keep only last 100 entries to prevent file from getting too large
-            if len(existing_data) > 100:
-                existing_data = existing_data[-100:]
-            
-            # Save updated data
-            with open(tps_file, 'w') as f:
-                json.dump(existing_data, f, indent=2)
-            
-            print(f"💾 TPS data saved to: {tps_file}")
-            print(f"📊 Total TPS records: {len(existing_data)}")
+            logger.info("💾 TPS data saved to: %s", tps_file)
+            logger.info("📊 Total TPS records: %s", record_count)
             
         except Exception as e:
-            print(f"❌ Failed to save TPS data: {e}")
+            current_span().fail(e)
+            logger.error("❌ Failed to save TPS data: %s", e)
     
+    @traced('capture_full_interface')
+    @perf_stage('capture_full_interface')
     def capture_full_interface(self):
         """Capture Trade Trends chart with time range controls"""
-        print("📸 Capturing Trade Trends with time range controls...")
+        logger.info("📸 Capturing Trade Trends with time range controls...")
         
         time.sleep(3)  # Wait for interface to load
         
@@ -639,57 +781,61 @@ class TradeTrendsAutomation:
         try:
             container_element = self.driver.find_element(By.XPATH, "//div[contains(@class, 'xf-pop-up-container')]")
             
-            # Verify it has the components we want
-            has_date_inputs = len(container_element.find_elements(By.XPATH, ".//input[@placeholder='Date']")) > 0
-            has_trade_trends = len(container_element.find_elements(By.XPATH, ".//span[contains(text(), 'Trade Trends')]")) > 0
+            # Verify it has the components we want - by attributes / both UI languages, since
+            # the English switch is opt-in (the Chinese UI has no 'Date' placeholder)
+            has_date_inputs = len(container_element.find_elements(
+                By.XPATH, ".//input[contains(@ng-model, 'timeInputs.startTime') and contains(@date-format, 'yyyy-MM-dd')]")) > 0
+            has_trade_trends = len(container_element.find_elements(
+                By.XPATH, ".//*[contains(text(), 'Trade Trends') or contains(text(), '交易趋势')]")) > 0
             
             if has_date_inputs and has_trade_trends:
                 # Generate filename
                 timestamp = int(time.time())
                 filename = f"trade_trends_with_timerange_{timestamp}.png"
-                # Use absolute path to screenshots directory
-                project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                filepath = os.path.join(project_root, "screenshots", filename)
+                filepath = os.path.join(screenshot_dir(), filename)
                 
                 # Scroll to element and capture
                 self.driver.execute_script("arguments[0].scrollIntoView(true);", container_element)
                 time.sleep(2)
                 container_element.screenshot(filepath)
+                current_span().set(bytes=os.path.getsize(filepath))
+                register_screenshot(filepath)
                 
-                print(f"✅ Full interface captured: {filename}")
-                print(f"📐 Captured area: {container_element.size['width']}x{container_element.size['height']}")
+                logger.info("✅ Full interface captured: %s", filename)
+                logger.info("📐 Captured area: %sx%s", container_element.size['width'], container_element.size['height'])
                 
                 return filepath
             else:
-                print("⚠️  Container doesn't have expected components")
+                logger.warning("⚠️  Container doesn't have expected components")
                 return None
                 
         except Exception as e:
-            print(f"❌ Full interface capture failed: {e}")
+            logger.error("❌ Full interface capture failed: %s", e)
             return None
     
     def run_automation(self, chart_only=False, statistics_only=False):
         """Execute the complete automation workflow"""
         try:
-            print("📊 Trade Trends Dashboard Automation")
-            print("=" * 50)
+            logger.info("📊 Trade Trends Dashboard Automation")
             
             # Setup browser
             self.setup_driver()
             
             # Login and setup
             if not self.login_and_setup():
-                print("❌ Login failed")
+                logger.error("❌ Login failed")
+                self.capture_debug_artifacts('login')
                 return None
             
-            print("✅ Login and setup successful")
+            logger.info("✅ Login and setup successful")
             
             # Click Trade Trends
             if not self.click_trade_trends():
-                print("❌ Could not access Trade Trends")
+                logger.error("❌ Could not access Trade Trends")
+                self.capture_debug_artifacts('trade_trends')
                 return None
                 
-            print("✅ Trade Trends accessed successfully")
+            logger.info("✅ Trade Trends accessed successfully")
             
             # Capture based on user preference
             if statistics_only:
@@ -703,26 +849,39 @@ class TradeTrendsAutomation:
                 capture_type = "full interface with time range"
                 
             if screenshot_path:
-                print(f"\n🎉 SUCCESS!")
-                print(f"📸 Trade Trends {capture_type} captured successfully!")
-                print(f"📁 File: {screenshot_path}")
+                logger.info("🎉 SUCCESS!")
+                logger.info("📸 Trade Trends %s captured successfully!", capture_type)
+                logger.info("📁 File: %s", screenshot_path)
                 return screenshot_path
             else:
-                print(f"❌ {capture_type} capture failed")
+                logger.error("❌ %s capture failed", capture_type)
+                self.capture_debug_artifacts('capture')
                 return None
                 
         except Exception as e:
-            print(f"❌ Automation failed: {e}")
+            logger.error("❌ Automation failed: %s", e)
+            self.capture_debug_artifacts('exception', error=e)
             return None
         
         finally:
             self.cleanup()
     
+    def release_profile(self):
+        """Prune and unlock the Chrome profile; call once the browser has quit"""
+        if self.profile is not None:
+            try:
+                self.profile.release()
+            except Exception as e:
+                logger.warning("⚠️ Chrome profile not released cleanly: %s", e)
+            self.profile = None
+    
     def cleanup(self):
         """Close browser and cleanup"""
         if self.driver:
+            self.save_perf_artifacts()
             self.driver.quit()
-            print("🔄 Browser closed")
+            logger.info("🔄 Browser closed")
+        self.release_profile()
 
 def main():
     """Main execution function with command line arguments"""
@@ -745,54 +904,56 @@ def main():
                        help='Run browser in background (default: visible)')
     parser.add_argument('--time-range', type=str, default=None,
                        help='Time range: "today" for current day, or "2025-11-05 00:00:00,2025-11-05 23:59:59" for specific range')
+    add_logging_arguments(parser)
     
     args = parser.parse_args()
+    configure_from_args(args)
+    enforce_retention()
     
     # Create automation instance
     automation = TradeTrendsAutomation(headless=args.headless)
     
     if args.tps_report:
         # Complete TPS reporting workflow
-        print("🚀 Starting Complete TPS Reporting...")
-        print("=" * 50)
+        logger.info("🚀 Starting Complete TPS Reporting...")
         
         # Initialize driver ONCE and keep it open for both captures
         automation.setup_driver()
         
         try:
             if not automation.login_and_setup():
-                print("❌ Login failed")
+                logger.error("❌ Login failed")
                 return
             
             if not automation.click_trade_trends():
-                print("❌ Could not access Trade Trends")
+                logger.error("❌ Could not access Trade Trends")
                 return
             
             # Set time range if provided
             if args.time_range:
                 if not automation.set_time_range(args.time_range):
-                    print("❌ Failed to set time range")
+                    logger.error("❌ Failed to set time range")
                     return
             
             # Step 1: Capture trade trends chart
-            print("📈 Step 1: Capturing Trade Trends chart...")
+            logger.info("📈 Step 1: Capturing Trade Trends chart...")
             chart_result = automation.capture_chart_only()
             
             if not chart_result:
-                print("❌ Failed to capture trade trends chart")
+                logger.error("❌ Failed to capture trade trends chart")
                 return
             
-            print(f"✅ Chart captured: {chart_result}")
+            logger.info("✅ Chart captured: %s", chart_result)
             
             # Step 2: Capture statistics and calculate TPS (same browser session)
-            print("\n📊 Step 2: Capturing Statistics and calculating TPS...")
+            logger.info("📊 Step 2: Capturing Statistics and calculating TPS...")
             
             # Instead of complex clicking, just reload the page and get statistics directly
             # Or better: use run_automation with statistics_only to properly capture
             stats_result = automation.run_automation(chart_only=False, statistics_only=True)
             
             if not stats_result:
-                print("❌ Failed to capture statistics")
+                logger.error("❌ Failed to capture statistics")
                 return
             
             # Handle both tuple and non-tuple returns
@@ -802,10 +963,10 @@ def main():
                 stats_result = stats_result
                 statistics_text = None
                 
-            print(f"✅ Statistics captured: {stats_result}")
+            logger.info("✅ Statistics captured: %s", stats_result)
             
             # Step 3: Load TPS data
-            print("\n📈 Step 3: Loading TPS data...")
+            logger.info("📈 Step 3: Loading TPS data...")
             tps_data = None
             tps_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tps_data.json")
             
@@ -815,12 +976,12 @@ def main():
                         data = json.load(f)
                     if data:
                         tps_data = data[-1]['tps_calculations']  # Get latest TPS data
-                        print(f"✅ TPS data loaded: {len(tps_data)} metrics")
+                        logger.info("✅ TPS data loaded: %s metrics", len(tps_data))
                 except Exception as e:
-                    print(f"⚠️ Could not load TPS data: {e}")
+                    logger.warning("⚠️ Could not load TPS data: %s", e)
             
             # Step 4: Send to DingTalk
-            print("\n📤 Step 4: Sending TPS report to DingTalk...")
+            logger.info("📤 Step 4: Sending TPS report to DingTalk...")
             try:
                 # Import DingTalk sender
                 sys.path.append(os.path.dirname(__file__))
@@ -830,50 +991,50 @@ def main():
                 success = sender.send_tps_report(chart_result, stats_result, tps_data)
                 
                 if success:
-                    print("🎉 Complete TPS Report sent to DingTalk successfully!")
+                    logger.info("🎉 Complete TPS Report sent to DingTalk successfully!")
                 else:
-                    print("❌ Failed to send TPS Report to DingTalk")
+                    logger.error("❌ Failed to send TPS Report to DingTalk")
                     
             except ImportError as e:
-                print(f"❌ Could not import DingTalk sender: {e}")
+                logger.error("❌ Could not import DingTalk sender: %s", e)
             except Exception as e:
-                print(f"❌ Error sending to DingTalk: {e}")
+                logger.error("❌ Error sending to DingTalk: %s", e)
             
-            print("🔄 Automation completed")
+            logger.info("🔄 Automation completed")
             
         finally:
             # Close browser properly
             if automation.driver:
                 automation.driver.quit()
-                print("🔄 Browser closed")
+                logger.info("🔄 Browser closed")
+            automation.release_profile()
         
     elif args.tps_actioncard:
         # ActionCard TPS reporting workflow
-        print("🚀 Starting ActionCard TPS Reporting...")
-        print("=" * 50)
+        logger.info("🚀 Starting ActionCard TPS Reporting...")
         
         # Step 1: Capture trade trends chart
-        print("📈 Step 1: Capturing Trade Trends chart...")
+        logger.info("📈 Step 1: Capturing Trade Trends chart...")
         chart_result = automation.run_automation(chart_only=False, statistics_only=False)
         
         if not chart_result:
-            print("❌ Failed to capture trade trends chart")
+            logger.error("❌ Failed to capture trade trends chart")
             return
         
-        print(f"✅ Chart captured: {chart_result}")
+        logger.info("✅ Chart captured: %s", chart_result)
         
         # Step 2: Capture statistics and calculate TPS  
-        print("\n📊 Step 2: Capturing Statistics and calculating TPS...")
+        logger.info("📊 Step 2: Capturing Statistics and calculating TPS...")
         stats_result = automation.run_automation(chart_only=False, statistics_only=True)
         
         if not stats_result:
-            print("❌ Failed to capture statistics")
+            logger.error("❌ Failed to capture statistics")
             return
             
-        print(f"✅ Statistics captured: {stats_result}")
+        logger.info("✅ Statistics captured: %s", stats_result)
         
         # Step 3: Load TPS data
-        print("\n📈 Step 3: Loading TPS data...")
+        logger.info("📈 Step 3: Loading TPS data...")
         tps_data = None
         tps_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tps_data.json")
         
@@ -883,12 +1044,12 @@ def main():
                     data = json.load(f)
                 if data:
                     tps_data = data[-1]['tps_calculations']  # Get latest TPS data
-                    print(f"✅ TPS data loaded: {len(tps_data)} metrics")
+                    logger.info("✅ TPS data loaded: %s metrics", len(tps_data))
             except Exception as e:
-                print(f"⚠️ Could not load TPS data: {e}")
+                logger.warning("⚠️ Could not load TPS data: %s", e)
         
         # Step 4: Send ActionCard to DingTalk
-        print("\n📤 Step 4: Sending ActionCard TPS report to DingTalk...")
+        logger.info("📤 Step 4: Sending ActionCard TPS report to DingTalk...")
         try:
             # Import DingTalk sender
             sys.path.append(os.path.dirname(__file__))
@@ -898,34 +1059,33 @@ def main():
             success = sender.send_tps_actioncard_report(chart_result, stats_result, tps_data)
             
             if success:
-                print("🎉 ActionCard TPS Report sent to DingTalk successfully!")
+                logger.info("🎉 ActionCard TPS Report sent to DingTalk successfully!")
             else:
-                print("❌ Failed to send ActionCard TPS Report to DingTalk")
+                logger.error("❌ Failed to send ActionCard TPS Report to DingTalk")
                 
         except ImportError as e:
-            print(f"❌ Could not import DingTalk sender: {e}")
+            logger.error("❌ Could not import DingTalk sender: %s", e)
         except Exception as e:
-            print(f"❌ Error sending ActionCard to DingTalk: {e}")
+            logger.error("❌ Error sending ActionCard to DingTalk: %s", e)
         
-        print("🔄 ActionCard automation completed")
+        logger.info("🔄 ActionCard automation completed")
         
     elif args.chart_actioncard:
         # Chart-only ActionCard workflow
-        print("🚀 Starting Chart-only ActionCard...")
-        print("=" * 50)
+        logger.info("🚀 Starting Chart-only ActionCard...")
         
         # Capture trade trends chart
-        print("📈 Capturing Trade Trends chart...")
+        logger.info("📈 Capturing Trade Trends chart...")
         chart_result = automation.run_automation(chart_only=False, statistics_only=False)
         
         if not chart_result:
-            print("❌ Failed to capture trade trends chart")
+            logger.error("❌ Failed to capture trade trends chart")
             return
         
-        print(f"✅ Chart captured: {chart_result}")
+        logger.info("✅ Chart captured: %s", chart_result)
         
         # Send Chart ActionCard to DingTalk
-        print("\n📤 Sending Chart ActionCard to DingTalk...")
+        logger.info("📤 Sending Chart ActionCard to DingTalk...")
         try:
             # Import DingTalk sender
             sys.path.append(os.path.dirname(__file__))
@@ -935,34 +1095,33 @@ def main():
             success = sender.send_chart_actioncard(chart_result)
             
             if success:
-                print("🎉 Chart ActionCard sent to DingTalk successfully!")
+                logger.info("🎉 Chart ActionCard sent to DingTalk successfully!")
             else:
-                print("❌ Failed to send Chart ActionCard to DingTalk")
+                logger.error("❌ Failed to send Chart ActionCard to DingTalk")
                 
         except ImportError as e:
-            print(f"❌ Could not import DingTalk sender: {e}")
+            logger.error("❌ Could not import DingTalk sender: %s", e)
         except Exception as e:
-            print(f"❌ Error sending Chart ActionCard to DingTalk: {e}")
+            logger.error("❌ Error sending Chart ActionCard to DingTalk: %s", e)
         
-        print("🔄 Chart ActionCard automation completed")
+        logger.info("🔄 Chart ActionCard automation completed")
         
     elif args.chart_image:
         # Chart as actual image workflow
-        print("🚀 Starting Chart Image Upload...")
-        print("=" * 50)
+        logger.info("🚀 Starting Chart Image Upload...")
         
         # Capture trade trends chart
-        print("📈 Capturing Trade Trends chart...")
+        logger.info("📈 Capturing Trade Trends chart...")
         chart_result = automation.run_automation(chart_only=False, statistics_only=False)
         
         if not chart_result:
-            print("❌ Failed to capture trade trends chart")
+            logger.error("❌ Failed to capture trade trends chart")
             return
         
-        print(f"✅ Chart captured: {chart_result}")
+        logger.info("✅ Chart captured: %s", chart_result)
         
         # Send Chart as Image to DingTalk
-        print("\n📤 Sending Chart as Image to DingTalk...")
+        logger.info("📤 Sending Chart as Image to DingTalk...")
         try:
             # Import DingTalk sender
             sys.path.append(os.path.dirname(__file__))
@@ -972,34 +1131,33 @@ def main():
             success = sender.send_chart_with_image(chart_result)
             
             if success:
-                print("🎉 Chart Image sent to DingTalk successfully!")
+                logger.info("🎉 Chart Image sent to DingTalk successfully!")
             else:
-                print("❌ Failed to send Chart Image to DingTalk")
+                logger.error("❌ Failed to send Chart Image to DingTalk")
                 
         except ImportError as e:
-            print(f"❌ Could not import DingTalk sender: {e}")
+            logger.error("❌ Could not import DingTalk sender: %s", e)
         except Exception as e:
-            print(f"❌ Error sending Chart Image to DingTalk: {e}")
+            logger.error("❌ Error sending Chart Image to DingTalk: %s", e)
         
-        print("🔄 Chart Image automation completed")
+        logger.info("🔄 Chart Image automation completed")
         
     elif args.chart_static:
         # Chart with static image URL in ActionCard workflow
-        print("🚀 Starting Chart Static Image ActionCard...")
-        print("=" * 50)
+        logger.info("🚀 Starting Chart Static Image ActionCard...")
         
         # Capture trade trends chart
-        print("📈 Capturing Trade Trends chart...")
+        logger.info("📈 Capturing Trade Trends chart...")
         chart_result = automation.run_automation(chart_only=False, statistics_only=False)
         
         if not chart_result:
-            print("❌ Failed to capture trade trends chart")
+            logger.error("❌ Failed to capture trade trends chart")
             return
         
-        print(f"✅ Chart captured: {chart_result}")
+        logger.info("✅ Chart captured: %s", chart_result)
         
         # Send Chart with Static Image URL to DingTalk
-        print("\n📤 Sending ActionCard with Static Image URL to DingTalk...")
+        logger.info("📤 Sending ActionCard with Static Image URL to DingTalk...")
         try:
             # Import DingTalk sender
             sys.path.append(os.path.dirname(__file__))
@@ -1009,16 +1167,16 @@ def main():
             success = sender.send_actioncard_with_static_image(chart_result)
             
             if success:
-                print("🎉 ActionCard with Static Image sent to DingTalk successfully!")
+                logger.info("🎉 ActionCard with Static Image sent to DingTalk successfully!")
             else:
-                print("❌ Failed to send ActionCard with Static Image to DingTalk")
+                logger.error("❌ Failed to send ActionCard with Static Image to DingTalk")
                 
         except ImportError as e:
-            print(f"❌ Could not import DingTalk sender: {e}")
+            logger.error("❌ Could not import DingTalk sender: %s", e)
         except Exception as e:
-            print(f"❌ Error sending ActionCard with Static Image to DingTalk: {e}")
+            logger.error("❌ Error sending ActionCard with Static Image to DingTalk: %s", e)
         
-        print("🔄 Chart Static Image ActionCard automation completed")
+        logger.info("🔄 Chart Static Image ActionCard automation completed")
         
     else:
         # Original single capture workflow
@@ -1031,9 +1189,9 @@ def main():
                 capture_type = "chart"
             else:
                 capture_type = "full interface"
-            print(f"\n✅ Success! Trade Trends {capture_type} captured at: {result}")
+            logger.info("✅ Success! Trade Trends %s captured at: %s", capture_type, result)
         else:
-            print("\n❌ Failed to capture Trade Trends dashboard")
+            logger.error("❌ Failed to capture Trade Trends dashboard")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+DingTalk Sender Load Driver
+Drives our sender configurations against benchmarks/mock_dingtalk.py and
+reports messages per second and p50/p95/p99 send latency.
+
+Configurations:
+  webhook   run_automation.send_to_dingtalk (the production report message)
+  sender    config/dingtalk_sender.DingTalkSender.send_webhook_message
+  complete  XFlushCompleteAutomation.send_webhook_message
+  report    full report path: gettoken + media/upload + robot/send + media/delete
+
+Usage:
+  python3 benchmarks/dingtalk_load.py --messages 500 --concurrency 8 --latency 40
+  python3 benchmarks/dingtalk_load.py --config webhook --rate-limit 20   # observe throttling
+"""
+
+import io
+import os
+import sys
+import glob
+import time
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "benchmarks"))
+sys.path.insert(0, os.path.join(project_root, "automation"))
+sys.path.insert(0, os.path.join(project_root, "credentials"))
+sys.path.insert(0, os.path.join(project_root, "config"))
+sys.path.insert(0, project_root)
+
+import mock_dingtalk
+
+SAMPLE_TPS = [
+    {'metric': 'Trade Success', 'tps': 794.5, 'max': 47673.0},
+    {'metric': 'Payment Apply', 'tps': 1008.4, 'max': 60503.0},
+]
+
+
+def _sample_image():
+    images = sorted(glob.glob(os.path.join(project_root, "screenshots", "*.png")))
+    return images[0] if images else None
+
+
+def build_senders():
+    """name -> zero-argument callable returning True on success (imported after the base URL is set)"""
+    senders = {}
+
+    try:
+        from run_automation import send_to_dingtalk
+        senders['webhook'] = lambda: send_to_dingtalk("https://example.invalid/chart.png", SAMPLE_TPS, anomalies=[])
+    except ImportError as e:
+        print(f"⚠️ webhook sender unavailable: {e}")
+
+    try:
+        from dingtalk_sender import DingTalkSender
+        config_sender = DingTalkSender()
+        senders['sender'] = lambda: config_sender.send_webhook_message("TRADE TRENDS REPORT", media_id="@lADPload")
+    except ImportError as e:
+        print(f"⚠️ config/dingtalk_sender unavailable: {e}")
+
+    try:
+        from complete_automation import XFlushCompleteAutomation
+        sender = XFlushCompleteAutomation()
+        payload = {'msgtype': 'markdown', 'markdown': {'title': 'Load test', 'text': 'TRADE TRENDS REPORT'}}
+        senders['complete'] = lambda: sender.send_webhook_message(payload).get('errcode') == 0
+
+        image_path = _sample_image()
+        if image_path:
+            def report():
+                token = sender.get_access_token()
+                media_id = sender.upload_media(image_path, token)
+                sent = sender.send_clean_image(image_path, token, media_id)
+                sender.delete_media(media_id, token)
+                return sent
+            senders['report'] = report
+    except ImportError as e:
+        print(f"⚠️ complete_automation senders unavailable: {e}")
+
+    return senders
+
+
+def run_load(send, messages, concurrency):
+    """Call send() `messages` times on `concurrency` threads; returns latencies (s), failures, wall time"""
+    def one(_):
+        started = time.perf_counter()
+        try:
+            ok = bool(send())
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(one, range(messages)))
+    elapsed = time.perf_counter() - started
+    latencies = np.array([latency for latency, _ in results])
+    failures = sum(1 for _, ok in results if not ok)
+    return latencies, failures, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load driver for the DingTalk senders')
+    parser.add_argument('--config', action='append', help='Sender configuration(s) to run (default: all)')
+    parser.add_argument('--messages', type=int, default=200, help='Messages per configuration')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent senders')
+    parser.add_argument('--latency', type=float, default=0, metavar='MS', help='Mock latency per request')
+    parser.add_argument('--jitter', type=float, default=0, metavar='MS', help='Mock latency jitter')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Mock injected error rate')
+    parser.add_argument('--rate-limit', type=int, default=0, help='Robot messages per minute (0: unlimited)')
+    args = parser.parse_args()
+
+    server, base_url = mock_dingtalk.start_in_thread(export_env=True, rate_limit=args.rate_limit,
+                                                      latency_ms=args.latency, jitter_ms=args.jitter,
+                                                      error_rate=args.error_rate)
+    senders = build_senders()
+    selected = args.config or list(senders)
+
+    print(f"🤖 Mock DingTalk at {base_url}: latency {args.latency:.0f}±{args.jitter:.0f} ms, "
+          f"error rate {args.error_rate:.0%}, rate limit {args.rate_limit or 'off'}")
+    print(f"{'config':<10} {'msgs':>6} {'fail':>5} {'msgs/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in selected:
+        if name not in senders:
+            print(f"{name:<10} unavailable")
+            continue
+        latencies, failures, elapsed = run_load(senders[name], args.messages, args.concurrency)
+        p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+        print(f"{name:<10} {args.messages:>6} {failures:>5} {args.messages / elapsed:>9.1f} "
+              f"{p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+
+    errors = {key: count for key, count in server.mock.stats.items() if not key.endswith(' 0')}
+    if errors:
+        print("📊 Mock error codes: " + ", ".join(f"{key}: {count}" for key, count in sorted(errors.items())))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+End-to-End Latency Benchmark
+Runs the full pipeline (run_automation.main) N times against the offline
+stand-ins - benchmarks/replay_server.py for XFlush and benchmarks/mock_dingtalk.py
+for DingTalk - and records per-stage and total latency distributions plus the
+peak RSS of the Python process and the peak PSS of Chrome/chromedriver. Results are compared
+with the committed baseline in benchmarks/baselines/e2e.json.
+
+Each run is a fresh `python3` process (cold imports, new Chrome) working on a
+scratch copy of tps_data.json / tps_history / metrics and its own screenshots
+directory, so the real history and screenshots/ are never touched. The runs share one scratch Chrome profile: the first loads the
+dashboard cold, later ones from its cache. Stage timings come from the run's span trace (automation/tracing.py).
+
+Every run sets the dashboard time range (--time-range, default 'today') so the
+set_time_range stage is measured too. Without a committed baseline the benchmark
+fails: record one on the CI image first.
+
+Usage:
+  python3 benchmarks/e2e_benchmark.py --runs 5                    # run and compare
+  python3 benchmarks/e2e_benchmark.py --runs 10 --update-baseline  # record new baseline
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, "benchmarks"))
+sys.path.insert(0, os.path.join(project_root, "automation"))
+sys.path.insert(0, os.path.join(project_root, "credentials"))
+
+BASELINE_FILE = os.path.join(project_root, "benchmarks", "baselines", "e2e.json")
+TPS_FILE = os.path.join(project_root, "tps_data.json")
+HISTORY_DIR = os.path.join(project_root, "tps_history")
+
+# A stage regresses when it is slower than baseline by this fraction AND by MIN_REGRESSION_S,
+# so sub-second stages do not fail on scheduler noise
+DEFAULT_TOLERANCE = 0.20
+DEFAULT_TIME_RANGE = "today"
+MIN_REGRESSION_S = 0.25
+RSS_SAMPLE_INTERVAL = 0.2
+
+STAGES = ("setup_driver", "login_and_setup", "click_trade_trends", "set_time_range", "capture_chart_only",
+          "capture_statistics_info", "extract_chart_series", "parse_statistics", "history_write",
+          "anomaly_detection", "dingtalk_token", "dingtalk_upload", "dingtalk_webhook", "driver_quit")
+
+
+# --- memory sampling (Linux /proc)
+
+def _parent_map():
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                stat = f.read()
+            # comm may contain spaces; ppid is the second field after the closing paren
+            parents[int(entry)] = int(stat[stat.rindex(')') + 2:].split()[1])
+        except (OSError, ValueError):
+            continue
+    return parents
+
+
+def descendants(pid):
+    parents = _parent_map()
+    found, frontier = set(), {pid}
+    while frontier:
+        frontier = {child for child, parent in parents.items() if parent in frontier} - found
+        found |= frontier
+    return found
+
+
+def status_bytes(pid, field='VmRSS'):
+    """A /proc/<pid>/status memory field (VmRSS, VmHWM = peak RSS) in bytes, 0 once the process is gone"""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def pss_bytes(pid):
+    """
+    Proportional set size from /proc/<pid>/smaps_rollup: pages shared by N processes count 1/N each,
+    so the sum over Chrome's processes does not count shared libraries and shared memory repeatedly.
+    Falls back to VmRSS (an upper bound) where smaps_rollup is unavailable; 0 once the process is gone.
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) * 1024
+    except FileNotFoundError:
+        return status_bytes(pid)
+    except OSError:
+        pass
+    return 0
+
+
+class MemorySampler(threading.Thread):
+    """Peak RSS of process `pid` itself and peak summed PSS of its descendants (chromedriver + Chrome)"""
+
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.own_peak = 0
+        self.descendants_peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.own_peak = max(self.own_peak, status_bytes(self.pid, 'VmHWM'))
+            self.descendants_peak = max(self.descendants_peak,
+                                        sum(pss_bytes(child) for child in descendants(self.pid)))
+            self._stop_event.wait(RSS_SAMPLE_INTERVAL)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# --- one pipeline run (child process)
+
+def run_once(workdir, xflush_base_url, time_range=None):
+    """Child: point every store at `workdir`, then run the real pipeline once"""
+    import debug_artifacts
+    import chrome_profile
+    import run_automation
+
+    # History, result / media caches, metrics textfile and screenshots (with their retention index)
+    run_automation.use_scratch_stores(workdir)
+    run_automation.DEFAULT_TRACE_DIR = os.path.join(workdir, "traces")
+    debug_artifacts.DEFAULT_DEBUG_DIR = os.path.join(workdir, "debug")
+    # Shared by the runs of one benchmark, so run 1 is cold and later runs warm, as in production
+    chrome_profile.DEFAULT_PROFILE_ROOT = os.path.join(os.path.dirname(workdir), "chrome_profile")
+    run_automation.BROWSER_HEADLESS = True
+
+    return 0 if run_automation.main(time_range=time_range, xflush_base_url=xflush_base_url) else 1
+
+
+def _prepare_workdir(root, index):
+    workdir = os.path.join(root, f"run_{index:03d}")
+    os.makedirs(workdir)
+    if os.path.exists(TPS_FILE):
+        shutil.copyfile(TPS_FILE, os.path.join(workdir, "tps_data.json"))
+    if os.path.isdir(HISTORY_DIR):
+        shutil.copytree(HISTORY_DIR, os.path.join(workdir, "tps_history"))
+    return workdir
+
+
+def _stage_durations(workdir):
+    """{span name: seconds} summed per name, plus 'total' from the root span"""
+    traces = os.path.join(workdir, "traces")
+    files = sorted(os.listdir(traces)) if os.path.isdir(traces) else []
+    durations = {}
+    if not files:
+        return durations
+    with open(os.path.join(traces, files[-1]), 'r') as f:
+        for line in f:
+            span = json.loads(line)
+            name = 'total' if span['depth'] == 0 else span['name']
+            durations[name] = durations.get(name, 0.0) + span['duration_ms'] / 1000.0
+    return durations
+
+
+def run_benchmark(runs, xflush_base_url, dingtalk_base_url, keep=False, time_range=DEFAULT_TIME_RANGE):
+    """Run the pipeline `runs` times; returns per-run samples"""
+    scratch = tempfile.mkdtemp(prefix="e2e_benchmark_")
+    env = dict(os.environ, DINGTALK_API_BASE_URL=dingtalk_base_url, TRADETREND_LOG_LEVEL="WARNING")
+    samples = []
+    try:
+        for index in range(runs):
+            workdir = _prepare_workdir(scratch, index)
+            started = time.perf_counter()
+            command = [sys.executable, os.path.abspath(__file__), '--run-once', workdir,
+                       '--xflush-base-url', xflush_base_url]
+            if time_range:
+                command += ['--time-range', time_range]
+            child = subprocess.Popen(command, cwd=project_root, env=env)
+            sampler = MemorySampler(child.pid)
+            sampler.start()
+            child.wait()
+            sampler.stop()
+            samples.append({
+                'ok': child.returncode == 0,
+                'wall_s': time.perf_counter() - started,
+                'stages': _stage_durations(workdir),
+                'python_peak_rss_mb': sampler.own_peak / 2 ** 20,
+                'browser_peak_pss_mb': sampler.descendants_peak / 2 ** 20,
+            })
+            sample = samples[-1]
+            print(f"   run {index + 1}/{runs}: {'ok' if sample['ok'] else 'FAILED'} "
+                  f"{sample['stages'].get('total', sample['wall_s']):.2f}s, "
+                  f"python {sample['python_peak_rss_mb']:.0f} MB RSS, browser {sample['browser_peak_pss_mb']:.0f} MB PSS")
+    finally:
+        if keep:
+            print(f"📁 Run directories kept in {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+    return samples
+
+
+def summarize(samples):
+    """Latency distributions per stage (p50/p95/max) and peak memory"""
+    ok = [s for s in samples if s['ok']]
+    names = [name for name in STAGES + ('total',) if any(name in s['stages'] for s in ok)]
+    stages = {}
+    for name in names:
+        values = np.array([s['stages'].get(name, 0.0) for s in ok])
+        stages[name] = {'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95)),
+                        'max': float(values.max())}
+    memory = {}
+    for key in ('python_peak_rss_mb', 'browser_peak_pss_mb'):
+        values = [s[key] for s in ok]
+        memory[key] = float(max(values)) if values else 0.0
+    return {'runs': len(samples), 'failed_runs': len(samples) - len(ok), 'stages': stages, 'memory': memory}
+
+
+def compare(results, baseline, tolerance):
+    """Readable diff against the baseline; returns (lines, regressed)"""
+    lines = [f"   {'stage':<26} {'base p50':>9} {'p50':>8} {'base p95':>9} {'p95':>8}  change"]
+    regressed = False
+    base_stages = baseline.get('results', {}).get('stages', {})
+    for name, current in results['stages'].items():
+        old = base_stages.get(name)
+        if old is None:
+            lines.append(f"   {name:<26} {'-':>9} {current['p50']:>8.2f} {'-':>9} {current['p95']:>8.2f}  (no baseline)")
+            continue
+        bad = any(current[q] > old[q] * (1 + tolerance) and current[q] - old[q] > MIN_REGRESSION_S
+                  for q in ('p50', 'p95'))
+        change = (current['p50'] - old['p50']) / old['p50'] if old['p50'] else 0.0
+        lines.append(f"   {name:<26} {old['p50']:>9.2f} {current['p50']:>8.2f} {old['p95']:>9.2f} "
+                     f"{current['p95']:>8.2f}  {change:+.0%}{'  ❌ slower' if bad else ''}")
+        regressed = regressed or bad
+    for name in base_stages:
+        if name not in results['stages']:
+            lines.append(f"   {name:<26} missing from this run")
+
+    base_memory = baseline.get('results', {}).get('memory', {})
+    for key, value in results['memory'].items():
+        old = base_memory.get(key)
+        if not old:
+            lines.append(f"   {key:<26} {value:>8.0f} MB (no baseline)")
+            continue
+        bad = value > old * (1 + tolerance)
+        lines.append(f"   {key:<26} {old:>8.0f} MB -> {value:.0f} MB  {(value - old) / old:+.0%}"
+                     f"{'  ❌ heavier' if bad else ''}")
+        regressed = regressed or bad
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end pipeline latency benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Pipeline runs')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown / memory growth before failing (fraction)')
+    parser.add_argument('--latency', type=float, default=0, metavar='MS', help='Added latency per stand-in request')
+    parser.add_argument('--keep', action='store_true', help='Keep the per-run directories (traces, history copies)')
+    parser.add_argument('--time-range', default=DEFAULT_TIME_RANGE,
+                        help='Time range every run sets on the dashboard (run_automation --time-range syntax; '
+                             '"" for the dashboard default, which skips set_time_range)')
+    parser.add_argument('--run-once', metavar='WORKDIR', help=argparse.SUPPRESS)
+    parser.add_argument('--xflush-base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_once:
+        return run_once(args.run_once, args.xflush_base_url, args.time_range or None)
+
+    try:
+        import selenium  # noqa: F401 - the pipeline needs it; fail early with a clear message
+    except ImportError:
+        print("❌ selenium is not installed; the end-to-end benchmark needs the full browser environment")
+        return 2
+
+    import replay_server
+    import mock_dingtalk
+    replay, xflush_base_url = replay_server.start_in_thread(port=0, latency_ms=args.latency)
+    dingtalk, dingtalk_base_url = mock_dingtalk.start_in_thread(latency_ms=args.latency, rate_limit=0)
+
+    print(f"⏱️  Running the pipeline {args.runs}x against {xflush_base_url} (replay) and {dingtalk_base_url} (DingTalk)...")
+    try:
+        samples = run_benchmark(args.runs, xflush_base_url, dingtalk_base_url, args.keep, args.time_range)
+    finally:
+        replay.shutdown()
+        dingtalk.shutdown()
+    results = summarize(samples)
+    if results['failed_runs']:
+        print(f"❌ {results['failed_runs']} of {results['runs']} runs failed")
+    if not results['stages']:
+        return 1
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump({
+                'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'time_range': args.time_range or None,
+                'results': results,
+            }, f, indent=2)
+            f.write('\n')
+        print(f"💾 Baseline written to {BASELINE_FILE}")
+        return 0 if not results['failed_runs'] else 1
+
+    if not os.path.exists(BASELINE_FILE):
+        for name, stats in results['stages'].items():
+            print(f"   {name:<26} p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s  max {stats['max']:.2f}s")
+        print(f"❌ No baseline in {BASELINE_FILE}: record one on the CI image with --update-baseline")
+        return 1
+
+    with open(BASELINE_FILE, 'r') as f:
+        baseline = json.load(f)
+    print(f"📊 Against baseline from {baseline.get('recorded_at')} (python {baseline.get('python')}):")
+    if baseline.get('time_range', DEFAULT_TIME_RANGE) != (args.time_range or None):
+        print(f"⚠️ Baseline was recorded with --time-range {baseline.get('time_range')!r}, "
+              f"this run used {args.time_range!r}")
+    lines, regressed = compare(results, baseline, args.tolerance)
+    print("\n".join(lines))
+
+    ok = not regressed and not results['failed_runs']
+    print("✅ End-to-end benchmark passed" if ok else "❌ End-to-end benchmark failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Mock DingTalk Open API
+Local stand-in for oapi.dingtalk.com for throughput and latency benchmarks:
+
+  GET  /gettoken             appkey/appsecret checked against credentials
+  POST /media/upload         multipart image upload, size-limited
+  GET  /media/downloadFile   returns the uploaded bytes
+  POST /media/delete
+  POST /robot/send           webhook: access_token, timestamp and HMAC sign validated,
+                             per-robot rate limit (DingTalk: 20 messages / minute)
+  GET  /_stats               request counts and error codes served
+
+Latency (mean + jitter) and an error rate can be injected. Point the senders at
+it with DINGTALK_API_BASE_URL=http://127.0.0.1:8090.
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "credentials"))
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8090
+
+# DingTalk limits and error codes
+ROBOT_MESSAGES_PER_MINUTE = 20
+SIGN_MAX_SKEW_MS = 60 * 60 * 1000
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+TOKEN_EXPIRES_IN = 7200
+
+ERR_BUSY = (-1, "系统繁忙")
+ERR_INVALID_CREDENTIAL = (40089, "不合法的corpid或corpsecret")
+ERR_INVALID_TOKEN = (40014, "不合法的access_token")
+ERR_MISSING_MEDIA = (40006, "不合法的文件大小")
+ERR_UNKNOWN_MEDIA = (40007, "不合法的媒体文件id")
+ERR_BAD_PAYLOAD = (40035, "缺少参数 json")
+ERR_SIGN = (310000, "sign not match")
+ERR_TOO_FAST = (410100, "send too fast, exceed 20 times per minute")
+
+
+def expected_sign(timestamp, secret):
+    """base64(HMAC-SHA256(secret, '<timestamp>\\n<secret>')) as the robot webhook expects"""
+    digest = hmac.new(secret.encode('utf-8'), f"{timestamp}\n{secret}".encode('utf-8'), hashlib.sha256).digest()
+    return base64.b64encode(digest).decode('utf-8')
+
+
+def _multipart_media(content_type, body):
+    """Bytes of the 'media' part of a multipart/form-data body, or None"""
+    if 'boundary=' not in content_type:
+        return None
+    boundary = content_type.split('boundary=', 1)[1].strip().strip('"').encode('utf-8')
+    for part in body.split(b'--' + boundary):
+        head, _, data = part.partition(b'\r\n\r\n')
+        if b'name="media"' in head:
+            return data[:-2] if data.endswith(b'\r\n') else data
+    return None
+
+
+class MockDingTalk:
+    """State shared by all handler threads"""
+
+    def __init__(self, app_key, app_secret, robot_token, robot_secret, rate_limit=ROBOT_MESSAGES_PER_MINUTE,
+                 latency_ms=0, jitter_ms=0, error_rate=0.0, max_image_bytes=MAX_IMAGE_BYTES, seed=None):
+        self.app_key = app_key
+        self.app_secret = app_secret
+        self.robot_token = robot_token
+        self.robot_secret = robot_secret
+        self.rate_limit = rate_limit
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.max_image_bytes = max_image_bytes
+        self.random = random.Random(seed)
+        self.tokens = {}
+        self.media = {}
+        self.messages = []
+        self.sent = deque()
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def count(self, path, errcode):
+        with self.lock:
+            key = f"{path} {errcode}"
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def delay(self):
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            inject_error = self.random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return inject_error
+
+    def valid_token(self, token):
+        with self.lock:
+            expires = self.tokens.get(token)
+        return expires is not None and expires > time.time()
+
+    def issue_token(self):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens[token] = time.time() + TOKEN_EXPIRES_IN
+        return token
+
+    def allow_robot_message(self):
+        """Sliding one-minute window per robot"""
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            while self.sent and now - self.sent[0] > 60:
+                self.sent.popleft()
+            if len(self.sent) >= self.rate_limit:
+                return False
+            self.sent.append(now)
+            return True
+
+
+class MockDingTalkHandler(BaseHTTPRequestHandler):
+    server_version = "MockDingTalk/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        mock = self.server.mock
+
+        if url.path == '/_stats':
+            self._json(200, {'stats': mock.stats, 'messages': len(mock.messages), 'media': len(mock.media)})
+            return
+
+        handler = {
+            ('GET', '/gettoken'): self._gettoken,
+            ('POST', '/media/upload'): self._upload,
+            ('GET', '/media/downloadFile'): self._download,
+            ('POST', '/media/delete'): self._delete,
+            ('POST', '/robot/send'): self._robot_send,
+        }.get((method, url.path))
+        if handler is None:
+            self._json(404, {'errcode': 404, 'errmsg': 'not found'})
+            return
+
+        if mock.delay():
+            self._error(url.path, ERR_BUSY)
+            return
+        handler(url.path, params, body)
+
+    # --- endpoints
+
+    def _gettoken(self, path, params, body):
+        mock = self.server.mock
+        if params.get('appkey') != mock.app_key or params.get('appsecret') != mock.app_secret:
+            self._error(path, ERR_INVALID_CREDENTIAL)
+            return
+        self._ok(path, {'access_token': mock.issue_token(), 'expires_in': TOKEN_EXPIRES_IN})
+
+    def _upload(self, path, params, body):
+        mock = self.server.mock
+        if not mock.valid_token(params.get('access_token')):
+            self._error(path, ERR_INVALID_TOKEN)
+            return
+        data = _multipart_media(self.headers.get('Content-Type', ''), body)
+        if not data or len(data) > mock.max_image_bytes:
+            self._error(path, ERR_MISSING_MEDIA)
+            return
+        media_id = '@lA' + base64.urlsafe_b64encode(uuid.uuid4().bytes).decode('utf-8').rstrip('=')
+        with mock.lock:
+            mock.media[media_id] = data
+        self._ok(path, {'type': params.get('type', 'image'), 'media_id': media_id, 'created_at': int(time.time() * 1000)})
+
+    def _download(self, path, params, body):
+        mock = self.server.mock
+        data = mock.media.get(params.get('media_id', ''))
+        if not mock.valid_token(params.get('access_token')) or data is None:
+            self._error(path, ERR_UNKNOWN_MEDIA)
+            return
+        self.server.mock.count(path, 0)
+        self._send(200, data, 'image/png')
+
+    def _delete(self, path, params, body):
+        mock = self.server.mock
+        if not mock.valid_token(params.get('access_token')):
+            self._error(path, ERR_INVALID_TOKEN)
+            return
+        with mock.lock:
+            removed = mock.media.pop(params.get('media_id', ''), None)
+        if removed is None:
+            self._error(path, ERR_UNKNOWN_MEDIA)
+            return
+        self._ok(path, {})
+
+    def _robot_send(self, path, params, body):
+        mock = self.server.mock
+        if params.get('access_token') != mock.robot_token:
+            self._error(path, ERR_INVALID_TOKEN)
+            return
+        if mock.robot_secret:
+            # parse_qs already URL-decoded the sign
+            timestamp = params.get('timestamp', '')
+            skew_ok = timestamp.isdigit() and abs(time.time() * 1000 - int(timestamp)) <= SIGN_MAX_SKEW_MS
+            sign_ok = hmac.compare_digest(params.get('sign', ''), expected_sign(timestamp, mock.robot_secret))
+            if not (skew_ok and sign_ok):
+                self._error(path, ERR_SIGN)
+                return
+        try:
+            payload = json.loads(body or b'{}')
+            msgtype = payload['msgtype']
+            if msgtype not in payload or (msgtype == 'markdown' and not payload['markdown'].get('text')):
+                raise KeyError(msgtype)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self._error(path, ERR_BAD_PAYLOAD)
+            return
+        if not mock.allow_robot_message():
+            self._error(path, ERR_TOO_FAST)
+            return
+        with mock.lock:
+            mock.messages.append(payload)
+        self._ok(path, {})
+
+    # --- responses
+
+    def _ok(self, path, fields):
+        self.server.mock.count(path, 0)
+        self._json(200, dict({'errcode': 0, 'errmsg': 'ok'}, **fields))
+
+    def _error(self, path, error):
+        errcode, errmsg = error
+        self.server.mock.count(path, errcode)
+        self._json(200, {'errcode': errcode, 'errmsg': errmsg})
+
+    def _json(self, status, data):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json;charset=UTF-8')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def mock_from_credentials(**kwargs):
+    """MockDingTalk that accepts the configured app key/secret and robot token/secret"""
+    import dingtalk_credentials as creds
+    robot_token = parse_qs(urlparse(creds.DINGTALK_WEBHOOK_URL).query).get('access_token', [''])[0]
+    return MockDingTalk(creds.DINGTALK_CLIENT_ID, creds.DINGTALK_CLIENT_SECRET,
+                        robot_token, creds.DINGTALK_WEBHOOK_SECRET, **kwargs)
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, mock=None, verbose=False):
+    server = ThreadingHTTPServer((host, port), MockDingTalkHandler)
+    server.daemon_threads = True
+    server.mock = mock
+    server.verbose = verbose
+    return server
+
+
+def start_in_thread(host=DEFAULT_HOST, port=0, export_env=False, **kwargs):
+    """
+    Start a mock on a background thread; returns (server, base_url)
+    export_env sets DINGTALK_API_BASE_URL before dingtalk_credentials is first imported,
+    so senders imported afterwards talk to the mock
+    """
+    server = create_server(host, port)
+    base_url = f"http://{host}:{server.server_address[1]}"
+    if export_env:
+        os.environ['DINGTALK_API_BASE_URL'] = base_url
+    server.mock = mock_from_credentials(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock DingTalk Open API')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Bind address')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Listen port')
+    parser.add_argument('--latency', type=float, default=0, metavar='MS', help='Mean added latency per request')
+    parser.add_argument('--jitter', type=float, default=0, metavar='MS', help='Uniform +/- latency jitter')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with errcode -1')
+    parser.add_argument('--rate-limit', type=int, default=ROBOT_MESSAGES_PER_MINUTE,
+                        help='Robot messages per minute (0 disables)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    mock = mock_from_credentials(rate_limit=args.rate_limit, latency_ms=args.latency,
+                                 jitter_ms=args.jitter, error_rate=args.error_rate)
+    server = create_server(args.host, args.port, mock, args.verbose)
+    print(f"🤖 Mock DingTalk on http://{args.host}:{args.port} (latency {args.latency:.0f}±{args.jitter:.0f} ms, "
+          f"error rate {args.error_rate:.0%}, {args.rate_limit or 'no'} msgs/min limit)")
+    print(f"   DINGTALK_API_BASE_URL=http://{args.host}:{args.port} python3 run_automation.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("🔄 Mock DingTalk stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Statistics Parser Benchmark + Fuzz Suite
+Throughput of automation/statistics_parser.py on recorded fixtures, plus a
+seeded property-based fuzz of the statistics text. Numbers are compared with
+the committed baseline in benchmarks/baselines/parser.json.
+
+Fixtures:
+  tps_data.json raw_data rows         real statistics popup lines
+  screenshots/debug_before_stat_*.html  full dashboard snapshots (~1.3 MB each)
+                                        whose other tables must not produce rows
+
+Usage:
+  python3 benchmarks/parser_benchmark.py                    # run and compare
+  python3 benchmarks/parser_benchmark.py --update-baseline  # record new baseline
+"""
+
+import os
+import sys
+import json
+import glob
+import math
+import time
+import random
+import platform
+import argparse
+from html.parser import HTMLParser
+
+# Add paths
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, "automation"))
+
+from statistics_parser import parse_statistics, parse_row, METRIC_ALIASES
+
+BASELINE_FILE = os.path.join(project_root, "benchmarks", "baselines", "parser.json")
+TPS_FILE = os.path.join(project_root, "tps_data.json")
+SNAPSHOT_GLOB = os.path.join(project_root, "screenshots", "debug_before_stat_*.html")
+
+HEADER = "Column\tMax\tMin\tAverage\tTotal\tCount"
+# A run is a regression when throughput drops below baseline by more than this fraction
+DEFAULT_TOLERANCE = 0.30
+
+
+class _TableText(HTMLParser):
+    """Approximates element.text for a page: one line per <tr>, cells joined by tabs"""
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self._cells = None
+        self._cell = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+        elif tag == 'tr':
+            self._cells = []
+        elif tag in ('td', 'th'):
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skip = max(0, self._skip - 1)
+        elif tag in ('td', 'th') and self._cells is not None:
+            self._cells.append(' '.join(''.join(self._cell).split()))
+        elif tag == 'tr' and self._cells is not None:
+            self.lines.append('\t'.join(self._cells))
+            self._cells = None
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._cells is not None:
+            self._cell.append(data)
+        elif data.strip():
+            self.lines.append(' '.join(data.split()))
+
+
+def load_raw_rows():
+    with open(TPS_FILE, 'r') as f:
+        records = json.load(f)
+    return [item['raw_data'] for record in records for item in record.get('tps_calculations') or []
+            if item.get('raw_data')]
+
+
+def load_snapshot_texts():
+    texts = []
+    for path in sorted(glob.glob(SNAPSHOT_GLOB)):
+        parser = _TableText()
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            parser.feed(f.read())
+        texts.append((os.path.basename(path), '\n'.join(parser.lines)))
+    return texts
+
+
+def _time(fn, repeat):
+    """Best-of-`repeat` wall time of fn()"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmarks(repeat=5, scale=100_000):
+    raw_rows = load_raw_rows()
+    results = {}
+
+    real_text = HEADER + "\n" + "\n".join(raw_rows)
+    elapsed = _time(lambda: parse_statistics(real_text), repeat * 20)
+    results['real_rows'] = {'rows': len(raw_rows), 'rows_per_sec': len(raw_rows) / elapsed}
+
+    large_rows = (raw_rows * (scale // len(raw_rows) + 1))[:scale]
+    large_text = HEADER + "\n" + "\n".join(large_rows)
+    parsed = len(parse_statistics(large_text))
+    elapsed = _time(lambda: parse_statistics(large_text), repeat)
+    results['large_table'] = {'rows': parsed, 'rows_per_sec': parsed / elapsed}
+
+    snapshots = load_snapshot_texts()
+    if snapshots:
+        lines = sum(text.count('\n') + 1 for _, text in snapshots)
+        size = sum(len(text.encode('utf-8')) for _, text in snapshots)
+        accepted = sum(len(parse_statistics(text)) for _, text in snapshots)
+        elapsed = _time(lambda: [parse_statistics(text) for _, text in snapshots], repeat)
+        results['snapshot_pages'] = {
+            'pages': len(snapshots), 'lines': lines, 'false_positive_rows': accepted,
+            'lines_per_sec': lines / elapsed, 'mb_per_sec': size / 1024 / 1024 / elapsed,
+        }
+    return results
+
+
+# ---------------------------------------------------------------- fuzzing
+
+ASCII_NAMES = ['Trade Success', 'Payment Apply', 'Create Order', 'Cashier Consult', 'Refund Query']
+CJK_NAMES = list(METRIC_ALIASES) + ['退款查询', '支付 回调', 'Trade 交易']
+BLANKS = ['-', '--', 'N/A', '']
+
+
+def _format_number(rng, value, integer=False):
+    """Render a number the way a dashboard might: plain, grouped, exponent, signed"""
+    style = rng.choice(['plain', 'grouped', 'exponent', 'fixed'] if not integer else ['plain', 'grouped'])
+    if integer:
+        text = f"{int(value):,}" if style == 'grouped' else str(int(value))
+    elif style == 'grouped':
+        text = f"{value:,.2f}"
+    elif style == 'exponent':
+        text = f"{value:.6e}"
+    elif style == 'fixed':
+        text = f"{value:.2f}"
+    else:
+        text = repr(value)
+    return text, float(text.replace(',', ''))
+
+
+def _random_value(rng, integer=False):
+    if rng.random() < 0.02:
+        # Beyond float range: the parser must treat it as an unknown cell, not raise or store inf
+        return rng.choice(['1e400', '-2.5E+999', '9' * 400]), None
+    magnitude = rng.choice([0, 1, 3, 6, 12, 18, 30, 300])
+    value = rng.random() * 10 ** magnitude
+    if integer:
+        value = float(rng.randrange(0, 10 ** rng.choice([1, 3, 6, 15])))
+    elif rng.random() < 0.2:
+        value = -value
+    return _format_number(rng, value, integer)
+
+
+def _separator(rng):
+    return rng.choice([' ', '  ', '   ', '\t', ' \t ', ' ', '　'])
+
+
+def fuzz_case(rng):
+    """(line, metric name, expected field values or None when the line must be rejected)"""
+    name = rng.choice(ASCII_NAMES + CJK_NAMES)
+    kind = rng.choice(['valid', 'valid', 'valid', 'blank', 'missing', 'garbage'])
+
+    cells, expected = [], {}
+    for field in ('max', 'min', 'average', 'total', 'count'):
+        if kind == 'blank' and rng.random() < 0.4:
+            cells.append(rng.choice(BLANKS))
+            expected[field] = None
+        else:
+            text, value = _random_value(rng, integer=field == 'count')
+            cells.append(text)
+            expected[field] = value
+
+    if '' in cells:
+        # An empty cell is only representable when cells are tab-separated
+        separator = '\t'
+    else:
+        separator = _separator(rng)
+    if kind == 'missing':
+        del cells[rng.randrange(len(cells))]
+        expected = None
+    elif kind == 'garbage':
+        cells[rng.randrange(len(cells))] = rng.choice(['abc', '1.2.3', '12%', '1e', '$5', '#'])
+        expected = None
+
+    line = (rng.choice(['', ' ', '\t']) + name + separator + separator.join(cells) + rng.choice(['', ' ', '\r']))
+    return line, name, expected
+
+
+def _close(a, b):
+    if a is None or b is None:
+        return a is b
+    if math.isinf(a) or math.isinf(b):
+        return a == b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-12)
+
+
+def run_fuzz(cases=20_000, seed=1234):
+    """Properties: never raises, valid rows round-trip, malformed rows are rejected"""
+    rng = random.Random(seed)
+    failures = []
+    for i in range(cases):
+        line, name, expected = fuzz_case(rng)
+        try:
+            row = parse_row(line)
+        except Exception as e:
+            failures.append({'case': i, 'line': line, 'error': repr(e)})
+            continue
+
+        if expected is None:
+            if row is not None:
+                failures.append({'case': i, 'line': line, 'error': 'malformed row was accepted'})
+            continue
+        if row is None:
+            failures.append({'case': i, 'line': line, 'error': 'valid row was rejected'})
+            continue
+
+        expected_name = METRIC_ALIASES.get(' '.join(name.split()), ' '.join(name.split()))
+        if ' '.join(row.metric.split()) != expected_name:
+            failures.append({'case': i, 'line': line, 'error': f'metric {row.metric!r} != {expected_name!r}'})
+        for field, value in expected.items():
+            parsed = getattr(row, field)
+            if field == 'count' and value is not None:
+                value = int(value)
+            if not _close(parsed, value):
+                failures.append({'case': i, 'line': line, 'error': f'{field} {parsed!r} != {value!r}'})
+                break
+        json.dumps(row.to_dict())
+    return {'cases': cases, 'seed': seed, 'failures': len(failures), 'examples': failures[:10]}
+
+
+# ---------------------------------------------------------------- baseline
+
+def compare(results, baseline, tolerance):
+    """Human-readable diff against the baseline; returns (lines, regressed)"""
+    lines, regressed = [], False
+    for name, metrics in results.items():
+        for key, value in metrics.items():
+            if not key.endswith('_per_sec') and key != 'false_positive_rows':
+                continue
+            old = baseline.get('results', {}).get(name, {}).get(key)
+            if old is None:
+                lines.append(f"   {name}.{key}: {value:,.0f} (no baseline)")
+                continue
+            if key == 'false_positive_rows':
+                bad = value > old
+                lines.append(f"   {name}.{key}: {value} (baseline {old}){'  ❌' if bad else ''}")
+            else:
+                change = (value - old) / old if old else 0.0
+                bad = change < -tolerance
+                lines.append(f"   {name}.{key}: {value:,.0f} (baseline {old:,.0f}, {change:+.0%}){'  ❌' if bad else ''}")
+            regressed = regressed or bad
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Statistics parser benchmark and fuzz suite')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed throughput drop before failing (fraction)')
+    parser.add_argument('--fuzz-cases', type=int, default=20_000, help='Number of fuzz cases')
+    parser.add_argument('--seed', type=int, default=1234, help='Fuzz seed')
+    parser.add_argument('--scale', type=int, default=100_000, help='Rows in the large synthetic table')
+    args = parser.parse_args()
+
+    print("⏱️  Benchmarking statistics parser...")
+    results = run_benchmarks(scale=args.scale)
+    for name, metrics in results.items():
+        print(f"   {name}: " + ", ".join(f"{k}={v:,.0f}" if isinstance(v, float) else f"{k}={v}"
+                                         for k, v in metrics.items()))
+
+    print(f"🎲 Fuzzing {args.fuzz_cases} cases (seed {args.seed})...")
+    fuzz = run_fuzz(args.fuzz_cases, args.seed)
+    for failure in fuzz['examples']:
+        print(f"   ❌ case {failure['case']}: {failure['error']}  {failure['line']!r}")
+    print(f"   {fuzz['failures']} failures")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump({
+                'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            }, f, indent=2)
+            f.write('\n')
+        print(f"💾 Baseline written to {BASELINE_FILE}")
+        return 0 if fuzz['failures'] == 0 else 1
+
+    regressed = False
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r') as f:
+            baseline = json.load(f)
+        print(f"📊 Against baseline from {baseline.get('recorded_at')} (python {baseline.get('python')}):")
+        lines, regressed = compare(results, baseline, args.tolerance)
+        print("\n".join(lines))
+    else:
+        print("ℹ️ No baseline yet, run with --update-baseline")
+
+    ok = not regressed and fuzz['failures'] == 0
+    print("✅ Parser benchmark passed" if ok else "❌ Parser benchmark failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Offline Replay Server
+Local stand-in for auth.paas / monitor.paas so the Selenium flow can be run,
+benchmarked and profiled without network access.
+
+  GET  /login          login form with the same selectors as the real page
+  POST /login          accepts any credentials, redirects to /trade-trends
+  GET  /trade-trends   recorded debug_before_stat_*.html snapshot, scripts and
+                       external resources stripped, plus a small shim that opens
+                       the statistics popup (recorded tps_data.json rows) when
+                       the xf-cms-icon-sangang icon is clicked and exposes the
+                       chart series as window.Highcharts.charts
+
+Point the automation at it with:
+  python3 run_automation.py --xflush-base-url http://127.0.0.1:8089
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_GLOB = os.path.join(project_root, "screenshots", "debug_before_stat_*.html")
+TPS_FILE = os.path.join(project_root, "tps_data.json")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8089
+
+_SCRIPT = re.compile(r'<script\b[^>]*>.*?</script\s*>', re.IGNORECASE | re.DOTALL)
+_EXTERNAL_LINK = re.compile(r'<link\b[^>]*\bhref="https?://[^"]*"[^>]*>', re.IGNORECASE)
+_EXTERNAL_ATTR = re.compile(r'\b(src|href)="(?:https?:)?//[^"]*"', re.IGNORECASE)
+_EXTERNAL_CSS_URL = re.compile(r'url\(\s*[\'"]?(?:https?:)?//[^)]*\)', re.IGNORECASE)
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Login (replay)</title></head>
+<body>
+  <form method="post" action="/login">
+    <input type="text" name="username" placeholder="Account">
+    <input type="password" name="password" placeholder="Password">
+    <button type="submit"><span>登录</span></button>
+  </form>
+</body></html>
+"""
+
+SHIM = """
+<style>
+  .ng-hide { display: none !important; }
+  i[class*="xf-cms-icon-"] { display: inline-block; width: 14px; height: 14px; background: #999; cursor: pointer; }
+  .xf-line-chart-stat-wrapper { border: 1px solid #ccc; padding: 8px; background: #fff; }
+  .xf-line-chart-stat-wrapper td, .xf-line-chart-stat-wrapper th { padding: 2px 8px; }
+</style>
+<script>
+(function () {
+  var REPLAY = %(replay)s;
+  function chartScope() {
+    return document.querySelector("div.xf-pop-up-container")
+        || document.querySelector("div.xf-chart[chart-title='Trade Trends']")
+        || document.body;
+  }
+  function renderStatistics(anchor) {
+    if (document.querySelector(".xf-line-chart-stat-wrapper")) { return; }
+    var wrapper = document.createElement("div");
+    wrapper.className = "xf-line-chart-stat-wrapper";
+    var html = "<h3>Statistics Info</h3><table class='xf-table'><thead><tr>";
+    REPLAY.header.forEach(function (h) { html += "<th>" + h + "</th>"; });
+    html += "</tr></thead><tbody>";
+    REPLAY.rows.forEach(function (row) {
+      html += "<tr>" + row.map(function (c) { return "<td>" + c + "</td>"; }).join("") + "</tr>";
+    });
+    wrapper.innerHTML = html + "</tbody></table>";
+    (anchor.closest(".xf-chart") || chartScope()).appendChild(wrapper);
+  }
+  document.addEventListener("click", function (event) {
+    var icon = event.target.closest && event.target.closest("[class*='xf-cms-icon-sangang'], a.line-chart-stat");
+    if (icon) { setTimeout(function () { renderStatistics(icon); }, REPLAY.popupDelayMs); }
+  }, true);
+  document.addEventListener("DOMContentLoaded", function () {
+    var renderTo = chartScope();
+    window.Highcharts = { charts: [{
+      renderTo: renderTo,
+      series: Object.keys(REPLAY.series).map(function (name) {
+        var points = REPLAY.series[name];
+        return { name: name, xData: points.map(function (p) { return p[0]; }),
+                 yData: points.map(function (p) { return p[1]; }), data: [] };
+      })
+    }] };
+  });
+})();
+</script>
+"""
+
+
+def latest_snapshot():
+    snapshots = sorted(glob.glob(SNAPSHOT_GLOB))
+    if not snapshots:
+        raise FileNotFoundError(f"No snapshots matching {SNAPSHOT_GLOB}")
+    return snapshots[-1]
+
+
+def load_statistics_record(tps_file=TPS_FILE, index=-1):
+    """One recorded capture: (header cells, row cells, capture timestamp, tps_calculations)"""
+    with open(tps_file, 'r') as f:
+        records = json.load(f)
+    record = records[index]
+    items = record['tps_calculations']
+    rows = []
+    for item in items:
+        # raw_data keeps the exact text the dashboard rendered; fall back to the parsed values
+        raw = item.get('raw_data')
+        if raw:
+            cells = raw.split()
+            rows.append([' '.join(cells[:-5])] + cells[-5:])
+        else:
+            rows.append([item['metric']] + [f"{item[k]:.2f}" for k in ('max', 'min', 'average', 'total')]
+                        + [str(item['count'])])
+    header = ['Column', 'Max', 'Min', 'Average', 'Total', 'Count']
+    return header, rows, datetime.fromisoformat(record['timestamp']), items
+
+
+def synthesize_series(items, end_time, bucket_seconds=60, seed=0):
+    """Per-bucket series consistent with the recorded max/min/average/count of each metric"""
+    rng = random.Random(seed)
+    end_ms = int(end_time.timestamp()) // bucket_seconds * bucket_seconds * 1000
+    series = {}
+    for item in items:
+        count = max(int(item.get('count') or 0), 2)
+        low, high, mean = item['min'], item['max'], item['average']
+        values = [min(high, max(low, rng.gauss(mean, (high - low) / 4 or 1))) for _ in range(count)]
+        values[rng.randrange(count)] = high
+        values[rng.randrange(count)] = low
+        start_ms = end_ms - (count - 1) * bucket_seconds * 1000
+        series[item['metric']] = [[start_ms + i * bucket_seconds * 1000, round(v, 2)] for i, v in enumerate(values)]
+    return series
+
+
+def prepare_page(snapshot_html, header, rows, series, popup_delay_ms=0):
+    """Strip scripts and external resources, then inject the replay shim before </head>"""
+    html = _SCRIPT.sub('', snapshot_html)
+    html = _EXTERNAL_LINK.sub('', html)
+    html = _EXTERNAL_ATTR.sub(lambda m: f'{m.group(1)}="data:,"', html)
+    html = _EXTERNAL_CSS_URL.sub('none', html)
+    replay = json.dumps({'header': header, 'rows': rows, 'series': series, 'popupDelayMs': popup_delay_ms},
+                        ensure_ascii=False).replace('</', '<\\/')
+    shim = SHIM % {'replay': replay}
+    if re.search(r'</head>', html, re.IGNORECASE):
+        return re.sub(r'</head>', lambda m: shim + m.group(0), html, count=1, flags=re.IGNORECASE)
+    return shim + html
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    server_version = "XFlushReplay/1.0"
+
+    def _delay(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def _count(self, path):
+        with self.server.stats_lock:
+            self.server.stats[path] = self.server.stats.get(path, 0) + 1
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        self._count(path)
+        self._delay()
+        if path == '/login':
+            self._send(200, LOGIN_PAGE.encode('utf-8'), 'text/html; charset=utf-8')
+        elif path == '/trade-trends':
+            self._send(200, self.server.page, 'text/html; charset=utf-8')
+        elif path == '/health':
+            self._send(200, json.dumps(self.server.stats).encode('utf-8'), 'application/json')
+        else:
+            # Relative styles/scripts from the snapshot: answer fast so pages never hang
+            self._send(404, b'', 'text/plain')
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        self._count(path)
+        self._delay()
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        if path == '/login':
+            self.send_response(302)
+            self.send_header('Location', '/trade-trends')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            self._send(404, b'', 'text/plain')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, snapshot=None, tps_file=TPS_FILE, record=-1,
+                  latency_ms=0, popup_delay_ms=0, verbose=False):
+    snapshot = snapshot or latest_snapshot()
+    with open(snapshot, 'r', encoding='utf-8', errors='replace') as f:
+        snapshot_html = f.read()
+    header, rows, captured_at, items = load_statistics_record(tps_file, record)
+    series = synthesize_series(items, captured_at)
+
+    server = ThreadingHTTPServer((host, port), ReplayRequestHandler)
+    server.page = prepare_page(snapshot_html, header, rows, series, popup_delay_ms).encode('utf-8')
+    server.latency = latency_ms / 1000.0
+    server.verbose = verbose
+    server.stats = {}
+    server.stats_lock = threading.Lock()
+    server.snapshot = snapshot
+    server.expected_rows = items
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Start a replay server on a background thread; returns (server, base_url)"""
+    server = create_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline replay of the XFlush dashboard')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Bind address')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Listen port')
+    parser.add_argument('--snapshot', default=None, help='Snapshot HTML (default: newest debug_before_stat_*.html)')
+    parser.add_argument('--record', type=int, default=-1, help='tps_data.json record to replay (default: last)')
+    parser.add_argument('--latency', type=float, default=0, metavar='MS', help='Added latency per request')
+    parser.add_argument('--popup-delay', type=float, default=0, metavar='MS',
+                        help='Delay before the statistics popup appears after clicking its icon')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.snapshot, TPS_FILE, args.record,
+                           args.latency, args.popup_delay, args.verbose)
+    base_url = f"http://{args.host}:{args.port}"
+    print(f"🎞️  Replaying {os.path.basename(server.snapshot)} on {base_url} "
+          f"(latency {args.latency:.0f} ms, popup delay {args.popup_delay:.0f} ms)")
+    print(f"   python3 run_automation.py --xflush-base-url {base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("🔄 Replay server stopped")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Startup / Import-Time Benchmark
+Wall time of the browser-free entry points (each in a fresh interpreter),
+minus bare interpreter startup, compared with the committed baseline in
+benchmarks/baselines/startup.json. Also fails when importing run_automation
+or trade_trends_final pulls in a heavy module (Selenium, requests, numpy,
+Pillow) - those belong to the stages that use them - or when importing
+complete_automation loads Selenium.
+
+Usage:
+  python3 benchmarks/startup_benchmark.py                    # run and compare
+  python3 benchmarks/startup_benchmark.py --update-baseline  # record new baseline
+  python3 benchmarks/startup_benchmark.py --top 15           # slowest imports of run_automation
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(project_root, "benchmarks", "baselines", "startup.json")
+TPS_FILE = os.path.join(project_root, "tps_data.json")
+
+HEAVY_MODULES = ("selenium", "requests", "urllib3", "numpy", "PIL")
+# module -> (directory, heavy modules it may load); complete_automation's --test mode needs requests
+IMPORT_CHECKS = {
+    'run_automation': (".", ()),
+    'trade_trends_final': ("automation", ()),
+    'complete_automation': ("automation", ("requests", "urllib3")),
+}
+# A command regresses when its median overhead grows by more than this fraction AND this many ms
+DEFAULT_TOLERANCE = 0.30
+MIN_REGRESSION_MS = 15.0
+
+
+def _python(args):
+    return [sys.executable] + args
+
+
+def _time_command(args, runs, stdin_text=None):
+    """Median / min wall time in ms of `python3 args` over `runs` fresh processes"""
+    samples = []
+    env = dict(os.environ, TRADETREND_LOG_LEVEL="WARNING")
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(_python(args), cwd=project_root, input=stdin_text, text=True, env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - started) * 1000)
+    return float(np.median(samples)), float(min(samples))
+
+
+def _import_snippet(module, directory):
+    return (f"import sys, json; sys.path[:0] = [{os.path.join(project_root, directory)!r}, "
+            f"{os.path.join(project_root, 'automation')!r}, {os.path.join(project_root, 'credentials')!r}]; "
+            f"import {module}; "
+            f"print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & {set(HEAVY_MODULES)!r})))")
+
+
+def heavy_imports():
+    """{module: [disallowed heavy modules it loaded]}; a module that fails to import reports its error instead"""
+    found = {}
+    for module, (directory, allowed) in IMPORT_CHECKS.items():
+        result = subprocess.run(_python(["-c", _import_snippet(module, directory)]), cwd=project_root,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            found[module] = [result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed"]
+        else:
+            found[module] = [name for name in json.loads(result.stdout.strip().splitlines()[-1]) if name not in allowed]
+    return found
+
+
+def slowest_imports(top=10):
+    """[(cumulative ms, module)] from -X importtime for `import run_automation`"""
+    result = subprocess.run(_python(["-X", "importtime", "-c", _import_snippet("run_automation", ".")]),
+                            cwd=project_root, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].rstrip()
+            # top-level imports of run_automation and its project modules only
+            if len(name) - len(name.lstrip()) <= 3:
+                rows.append((int(parts[1]) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def run_benchmarks(runs=7):
+    with open(TPS_FILE, 'r') as f:
+        latest = json.load(f)[-1]
+    statistics_text = "\n".join(item['raw_data'] for item in latest['tps_calculations'])
+
+    commands = {
+        'interpreter': ["-c", "pass"],
+        'help': ["run_automation.py", "--help"],
+        'parse_only': ["run_automation.py", "--parse-only", "-"],
+        'history': ["run_automation.py", "--history", "1"],
+        'import_run_automation': ["-c", _import_snippet("run_automation", ".")],
+    }
+    results = {}
+    for name, args in commands.items():
+        median, fastest = _time_command(args, runs, statistics_text if name == 'parse_only' else None)
+        results[name] = {'median_ms': round(median, 1), 'min_ms': round(fastest, 1)}
+    interpreter = results['interpreter']['median_ms']
+    for name, metrics in results.items():
+        if name != 'interpreter':
+            metrics['overhead_ms'] = round(max(metrics['median_ms'] - interpreter, 0.0), 1)
+    return results
+
+
+# ---------------------------------------------------------------- baseline
+
+def compare(results, baseline, tolerance):
+    """Human-readable diff against the baseline; returns (lines, regressed)"""
+    lines, regressed = [], False
+    for name, metrics in results.items():
+        if 'overhead_ms' not in metrics:
+            continue
+        value = metrics['overhead_ms']
+        old = baseline.get('results', {}).get(name, {}).get('overhead_ms')
+        if old is None:
+            lines.append(f"   {name}: +{value:.1f} ms (no baseline)")
+            continue
+        bad = value > old * (1 + tolerance) and value - old > MIN_REGRESSION_MS
+        lines.append(f"   {name}: +{value:.1f} ms (baseline +{old:.1f} ms){'  ❌' if bad else ''}")
+        regressed = regressed or bad
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup / import-time benchmark of the browser-free commands')
+    parser.add_argument('--runs', type=int, default=7, help='Fresh processes per command')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed overhead growth before failing (fraction)')
+    parser.add_argument('--top', type=int, default=0, metavar='N', help='Also list the N slowest imports')
+    args = parser.parse_args()
+
+    print("🔍 Checking that entry points do not import heavy modules...")
+    leaks = heavy_imports()
+    for module, heavy in leaks.items():
+        print(f"   {module}: {', '.join(heavy) if heavy else 'clean'}{'  ❌' if heavy else ''}")
+
+    print(f"⏱️  Timing commands ({args.runs} fresh processes each)...")
+    results = run_benchmarks(args.runs)
+    for name, metrics in results.items():
+        overhead = f", +{metrics['overhead_ms']:.1f} ms over the interpreter" if 'overhead_ms' in metrics else ""
+        print(f"   {name}: median {metrics['median_ms']:.1f} ms, min {metrics['min_ms']:.1f} ms{overhead}")
+
+    if args.top:
+        print(f"🐢 Slowest imports under run_automation:")
+        for ms, module in slowest_imports(args.top):
+            print(f"   {ms:8.1f} ms  {module}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump({
+                'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            }, f, indent=2)
+            f.write('\n')
+        print(f"💾 Baseline written to {BASELINE_FILE}")
+        return 0 if not any(leaks.values()) else 1
+
+    regressed = False
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r') as f:
+            baseline = json.load(f)
+        print(f"📊 Against baseline from {baseline.get('recorded_at')} (python {baseline.get('python')}):")
+        lines, regressed = compare(results, baseline, args.tolerance)
+        print("\n".join(lines))
+    else:
+        print("ℹ️ No baseline yet, run with --update-baseline")
+
+    ok = not regressed and not any(leaks.values())
+    print("✅ Startup benchmark passed" if ok else "❌ Startup benchmark failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,18 +5,24 @@ import hmac
 import time
 import os
 import sys
+from urllib.parse import quote_plus
 
-# Add credentials path
+# Add credentials and automation (pipeline_logging) paths
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'credentials'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'automation'))
+from pipeline_logging import get_logger
+
+logger = get_logger(__name__)
+
 try:
     from dingtalk_credentials import *
 except ImportError:
-    print("❌ Could not import DingTalk credentials")
+    logger.error("❌ Could not import DingTalk credentials")
     sys.exit(1)
 
 class DingTalkSender:
-    def send_webhook_message(self, message):
-        """Send a simple text message to DingTalk via webhook"""
+    def send_webhook_message(self, message, media_id=None, width=None, height=None):
+        """Send a markdown message to DingTalk via webhook; an uploaded image (media_id) is appended when given"""
         timestamp = str(round(time.time() * 1000))
         string_to_sign = f"{timestamp}\n{DINGTALK_WEBHOOK_SECRET}"
         hmac_code = hmac.new(
@@ -24,27 +30,31 @@ class DingTalkSender:
             string_to_sign.encode('utf-8'),
             hashlib.sha256
         ).digest()
-        sign = base64.b64encode(hmac_code)
-        final_url = f"{DINGTALK_WEBHOOK_URL}&timestamp={timestamp}&sign={sign.decode()}"
-        clean_media_id = media_id.replace('@', '') if media_id.startswith('@') else media_id
-        static_url = f"https://static.dingtalk.com/media/{clean_media_id}_{width}_{height}.png"
-        
+        sign = quote_plus(base64.b64encode(hmac_code))
+        final_url = f"{DINGTALK_WEBHOOK_URL}&timestamp={timestamp}&sign={sign}"
+        text = message
+        if media_id:
+            clean_media_id = media_id.replace('@', '') if media_id.startswith('@') else media_id
+            size = f"_{width}_{height}" if width and height else ""
+            static_url = f"https://static.dingtalk.com/media/{clean_media_id}{size}.png"
+            text += f"\n\n![]({static_url})\n"
+
         payload = {
             "msgtype": "markdown",
-            "text": {
-                "📊 TRADE TRENDS TPS REPORT\n==============================\n🕐 Time: 2025-11-03 14:00:00\n\n🎯 TPS CALCULATIONS:\n📈 Trade Success: 250.00 TPS (Max: 15000)\n📈 Payment Apply: 180.00 TPS (Max: 10800)\n📈 Cashier Consult: 120.00 TPS (Max: 7200)\n\n🎯 PRIMARY TPS: 250.00\n📊 Trade Success Max: 15000\n\n📸 Screenshots:\n✅ Trade Trends Chart: Uploaded\n✅ Statistics Table: Uploaded" +
-                f"![]({static_url})\n"
+            "markdown": {
+                "title": "TRADE TRENDS TPS REPORT",
+                "text": text
             }
         }
         try:
             response = requests.post(final_url, json=payload)
             result = response.json()
             if result.get('errcode') == 0:
-                print("✅ Webhook message sent successfully!")
+                logger.info("✅ Webhook message sent successfully!")
                 return True
             else:
-                print(f"❌ Failed to send webhook message: {result}")
+                logger.error("❌ Failed to send webhook message: %s", result)
                 return False
         except Exception as e:
-            print(f"❌ Error sending webhook message: {e}")
+            logger.error("❌ Error sending webhook message: %s", e)
             return False
\ No newline at end of file
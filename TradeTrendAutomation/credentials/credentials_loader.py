@@ -29,8 +29,11 @@ def load_credentials():
                 'agent_id': dingtalk_credentials.DINGTALK_AGENT_ID,
                 'webhook_url': dingtalk_credentials.DINGTALK_WEBHOOK_URL,
                 'webhook_secret': dingtalk_credentials.DINGTALK_WEBHOOK_SECRET,
+                'api_base_url': dingtalk_credentials.DINGTALK_API_BASE_URL,
                 'token_url': dingtalk_credentials.DINGTALK_TOKEN_URL,
                 'media_upload_url': dingtalk_credentials.DINGTALK_MEDIA_UPLOAD_URL,
+                'media_delete_url': dingtalk_credentials.DINGTALK_MEDIA_DELETE_URL,
+                'media_download_url': dingtalk_credentials.DINGTALK_MEDIA_DOWNLOAD_URL,
                 'send_message_url': dingtalk_credentials.DINGTALK_SEND_MESSAGE_URL
             },
             'xflush': {
@@ -42,7 +45,8 @@ def load_credentials():
                 'workspace_name': xflush_credentials.XFLUSH_WORKSPACE_NAME,
                 'browser_window_size': xflush_credentials.BROWSER_WINDOW_SIZE,
                 'browser_wait_timeout': xflush_credentials.BROWSER_WAIT_TIMEOUT,
-                'screenshot_wait_time': xflush_credentials.SCREENSHOT_WAIT_TIME
+                'screenshot_wait_time': xflush_credentials.SCREENSHOT_WAIT_TIME,
+                'switch_to_english': getattr(xflush_credentials, 'XFLUSH_SWITCH_TO_ENGLISH', False)
             }
         }
         
@@ -57,9 +61,19 @@ def get_dingtalk_credentials():
     """Get only DingTalk credentials"""
     return load_credentials()['dingtalk']
 
-def get_xflush_credentials():
-    """Get only XFlush credentials"""
-    return load_credentials()['xflush']
+def get_xflush_credentials(base_url=None):
+    """
+    Get only XFlush credentials
+    base_url (or XFLUSH_BASE_URL) points login and Trade Trends at another host,
+    e.g. the offline replay server in benchmarks/replay_server.py
+    """
+    credentials = load_credentials()['xflush']
+    base_url = base_url or os.environ.get('XFLUSH_BASE_URL')
+    if base_url:
+        base_url = base_url.rstrip('/')
+        credentials['login_url'] = f"{base_url}/login"
+        credentials['trade_trends_url'] = f"{base_url}/trade-trends"
+    return credentials
 
 # For testing purposes
 if __name__ == "__main__":
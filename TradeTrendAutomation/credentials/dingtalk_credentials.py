@@ -4,6 +4,12 @@ DingTalk Credentials Configuration
 Store all DingTalk-related credentials here
 """
 
+import os
+
+# API host; DINGTALK_API_BASE_URL points every sender at another host (e.g. benchmarks/mock_dingtalk.py)
+DINGTALK_PRODUCTION_BASE_URL = "https://oapi.dingtalk.com"
+DINGTALK_API_BASE_URL = os.environ.get("DINGTALK_API_BASE_URL", DINGTALK_PRODUCTION_BASE_URL).rstrip("/")
+
 # Enterprise Application Credentials
 DINGTALK_CLIENT_ID = "dingih5yqjdxxw8ghaqe"
 DINGTALK_CLIENT_SECRET = "oGhCniLiOI-pZL9kVlQ-c68Td_0BgncdUGtx3c8etIUkss7E0U3x4HRClnvuh0J6"
@@ -14,13 +20,15 @@ DINGTALK_APP_KEY = DINGTALK_CLIENT_ID
 DINGTALK_APP_SECRET = DINGTALK_CLIENT_SECRET
 
 # Group Robot Webhook Credentials
-DINGTALK_WEBHOOK_URL = "https://oapi.dingtalk.com/robot/send?access_token=5c1dab8b7961ac2bea8e34b97163b7e4dd3fdf7aa0c2d7b835b4761d5ca87aa8"
+DINGTALK_WEBHOOK_URL = f"{DINGTALK_API_BASE_URL}/robot/send?access_token=5c1dab8b7961ac2bea8e34b97163b7e4dd3fdf7aa0c2d7b835b4761d5ca87aa8"
 DINGTALK_WEBHOOK_SECRET = "SECf2758173f7b221078c66b5fb5a8d6059173f72bd55923cf6dcae9fdc43864955"
 
 # API Endpoints
-DINGTALK_TOKEN_URL = "https://oapi.dingtalk.com/gettoken"
-DINGTALK_MEDIA_UPLOAD_URL = "https://oapi.dingtalk.com/media/upload"
-DINGTALK_SEND_MESSAGE_URL = "https://oapi.dingtalk.com/topapi/message/corpconversation/asyncsend_v2"
+DINGTALK_TOKEN_URL = f"{DINGTALK_API_BASE_URL}/gettoken"
+DINGTALK_MEDIA_UPLOAD_URL = f"{DINGTALK_API_BASE_URL}/media/upload"
+DINGTALK_MEDIA_DELETE_URL = f"{DINGTALK_API_BASE_URL}/media/delete"
+DINGTALK_MEDIA_DOWNLOAD_URL = f"{DINGTALK_API_BASE_URL}/media/downloadFile"
+DINGTALK_SEND_MESSAGE_URL = f"{DINGTALK_API_BASE_URL}/topapi/message/corpconversation/asyncsend_v2"
 
 # Browser Settings
 BROWSER_HEADLESS = True  # Set to True for headless mode (no browser window), False to see browser
\ No newline at end of file
@@ -19,4 +19,8 @@ XFLUSH_WORKSPACE_NAME = "prod"
 # Browser Configuration
 BROWSER_WINDOW_SIZE = "1920,1080"
 BROWSER_WAIT_TIMEOUT = 5
-SCREENSHOT_WAIT_TIME = 2
\ No newline at end of file
+SCREENSHOT_WAIT_TIME = 2
+
+# UI Language
+# The statistics parser reads both the English and Chinese UI; switching costs two clicks and waits per run
+XFLUSH_SWITCH_TO_ENGLISH = False
\ No newline at end of file
@@ -2,12 +2,24 @@
 """
 Simplified Trade Trends Automation - Single Flow
 Login -> Trade Trends -> Screenshot -> Statistics -> TPS Data -> Send to DingTalk
+
+Browser-free commands (Selenium, requests, numpy and Pillow are imported only
+by the stages that use them, so these start in tens of milliseconds):
+  --send-only CHART   resend an existing chart with the latest recorded TPS data
+  --parse-only FILE   parse statistics popup text into TPS rows
+  --history [N]       print the last N recorded captures
+
+Runs against another XFlush host (--xflush-base-url / XFLUSH_BASE_URL, e.g.
+the offline replay server) keep their history, result / media caches,
+metrics and screenshots in replay/ unless --persist is given, so replayed
+data never mixes with production's. They also refuse to report to the real
+DingTalk unless DINGTALK_API_BASE_URL points elsewhere (e.g. the mock) or
+--live-dingtalk is given.
 """
 
 import sys
 import os
 import time
-import requests
 import json
 import base64
 import hashlib
@@ -24,11 +36,32 @@ credentials_dir = os.path.join(project_root, "credentials")
 sys.path.insert(0, automation_dir)
 sys.path.insert(0, credentials_dir)
 
-from trade_trends_final import TradeTrendsAutomation
-from dingtalk_credentials import DINGTALK_WEBHOOK_URL, DINGTALK_WEBHOOK_SECRET, BROWSER_HEADLESS
+from trade_trends_final import TradeTrendsAutomation, parse_time_range
+from result_cache import ResultCache
+from metrics_exporter import REGISTRY, STEP_DURATION, CAPTURE_FAILURES, DINGTALK_SEND, MEDIA_UPLOADS, record_tps
+from tracing import TRACER, DEFAULT_TRACE_DIR, span
+from pipeline_logging import get_logger, add_logging_arguments, configure_from_args
+from screenshot_retention import enforce_retention, forget_screenshot
+from credentials_loader import get_xflush_credentials
+from dingtalk_credentials import (DINGTALK_WEBHOOK_URL, DINGTALK_WEBHOOK_SECRET, BROWSER_HEADLESS,
+                                  DINGTALK_CLIENT_ID, DINGTALK_CLIENT_SECRET, DINGTALK_TOKEN_URL,
+                                  DINGTALK_MEDIA_UPLOAD_URL, DINGTALK_MEDIA_DOWNLOAD_URL,
+                                  DINGTALK_API_BASE_URL, DINGTALK_PRODUCTION_BASE_URL)
+
+logger = get_logger(__name__)
+
+# Stores of runs against a non-production XFlush host (see use_scratch_stores)
+REPLAY_DIR = os.path.join(project_root, "replay")
 
-def send_to_dingtalk(image_url, tps_data, time_range=None):
-    """Send TPS report with image to DingTalk"""
+# On-call person @-mentioned when the report needs attention
+ONCALL_MOBILE = "+62-82165825841"
+
+def send_to_dingtalk(image_url, tps_data, time_range=None, anomalies=None):
+    """
+    Send TPS report with image to DingTalk
+    anomalies: result of tps_anomaly.detect_anomalies(); None means analysis did not run,
+    in which case the report falls back to asking for a manual recheck
+    """
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     is_default_time = False
     
@@ -46,11 +79,33 @@ def send_to_dingtalk(image_url, tps_data, time_range=None):
     # Format TPS data for message
     tps_text = ""
     if tps_data:
+        from tps_compare import format_deltas
+        from tps_statistics import format_percentiles
         for item in tps_data:
             metric = item.get('metric', 'Unknown')
-            tps = item.get('tps', 0)
-            max_val = item.get('max', 0)
-            tps_text += f"TPS {metric}: {tps:.0f}  (Max: {max_val:.0f})\n\n"
+            tps = item.get('tps') or 0
+            max_val = item.get('max') or 0
+            flag = " ⚠️" if item.get('anomaly', {}).get('is_anomaly') else ""
+            deltas = f"  {format_deltas(item['deltas'])}" if item.get('deltas') else ""
+            percentiles = f"  {format_percentiles(item)}" if 'tps_p50' in item else ""
+            tps_text += f"TPS {metric}: {tps:.0f}  (Max: {max_val:.0f}){percentiles}{deltas}{flag}\n\n"
+    
+    # Anomaly section: only mention the on-call person when something is actually off
+    if anomalies is None:
+        note_text = (
+            f"<font color=\"red\">**NOTE : IR Team please recheck again if there are anomalies.**</font>\n"
+            f"@{ONCALL_MOBILE}\n"
+        )
+        mention = True
+    elif anomalies:
+        note_text = "<font color=\"red\">**ANOMALIES DETECTED:**</font>\n\n"
+        for anomaly in anomalies:
+            note_text += f"- {anomaly['metric']}: {'; '.join(anomaly['reasons'])}\n"
+        note_text += f"\n@{ONCALL_MOBILE}\n"
+        mention = True
+    else:
+        note_text = "✅ No anomalies detected against historical baselines.\n"
+        mention = False
     
     # Build payload
     payload = {
@@ -64,14 +119,13 @@ def send_to_dingtalk(image_url, tps_data, time_range=None):
                 f"![]({image_url})\n\n"
                 f"📈 TPS CALCULATIONS:\n\n"
                 f"{tps_text}\n\n\n"
-                f"<font color=\"red\">**NOTE : IR Team please recheck again if there are anomalies.**</font>\n"
-                f"@+62-82165825841\n"
+                f"{note_text}"
                 f"[For more details, click here](https://monitor.paas.dana.id/optimus/#/STZEYPCN/prod/business/product/cms/preview/354)."
             )
         },
         "at": {
             "isAtAll": False,
-            "atMobiles": ["+62-82165825841"]
+            "atMobiles": [ONCALL_MOBILE] if mention else []
         }
     }
     
@@ -88,188 +142,441 @@ def send_to_dingtalk(image_url, tps_data, time_range=None):
     final_url = f"{DINGTALK_WEBHOOK_URL}&timestamp={timestamp}&sign={sign}"
     
     try:
-        response = requests.post(final_url, json=payload)
-        result = response.json()
+        import requests
+        with span('dingtalk_webhook', bytes=len(json.dumps(payload))) as webhook_span, \
+                DINGTALK_SEND.time(endpoint='robot/send'):
+            response = requests.post(final_url, json=payload)
+            result = response.json()
+            webhook_span.set(http_status=response.status_code, errcode=result.get('errcode'))
+            if result.get('errcode') != 0:
+                webhook_span.fail(result.get('errmsg'))
         
         if result.get('errcode') == 0:
-            print("✅ Message sent to DingTalk successfully!")
+            logger.info("✅ Message sent to DingTalk successfully!")
             return True
         else:
-            print(f"❌ Failed to send message: {result}")
+            logger.error("❌ Failed to send message: %s", result)
             return False
     except Exception as e:
-        print(f"❌ Error sending to DingTalk: {e}")
+        logger.error("❌ Error sending to DingTalk: %s", e)
         return False
 
-def main(time_range=None):
-    """Main automation flow"""
-    print("🚀 Starting Trade Trends Automation...")
-    print("=" * 50)
+def upload_chart(chart_path, access_token):
+    """Upload the chart PNG as DingTalk media; returns the media_id or None"""
+    import requests
+    
+    upload_url = DINGTALK_MEDIA_UPLOAD_URL
+    upload_params = {'access_token': access_token, 'type': 'image'}
+    
+    with open(chart_path, 'rb') as f:
+        file_data = f.read()
+    
+    boundary = '----WebKitFormBoundary' + str(int(time.time()))
+    form_data = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="type"\r\n\r\n'
+        f'image\r\n'
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="media"; filename="chart.png"\r\n'
+        f'Content-Type: image/png\r\n\r\n'
+    ).encode('utf-8') + file_data + f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    
+    headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+    with span('dingtalk_upload', bytes=len(form_data), image_bytes=len(file_data)) as upload_span, \
+            DINGTALK_SEND.time(endpoint='media/upload'):
+        response = requests.post(upload_url, params=upload_params, data=form_data, headers=headers)
+        upload_result = response.json()
+        upload_span.set(http_status=response.status_code, errcode=upload_result.get('errcode'))
+        if upload_result.get('errcode') != 0:
+            upload_span.fail(upload_result.get('errmsg'))
+    
+    if upload_result.get('errcode') != 0:
+        logger.error("❌ Upload failed: %s", upload_result)
+        return None
+    
+    media_id = upload_result['media_id']
+    logger.info("✅ Image uploaded! Media ID: %s", media_id)
+    return media_id
+
+def deliver_report(chart_path, tps_data, time_range=None, anomalies=None, reuse_media=True):
+    """Steps 6-7: upload (or reuse) the chart and send the report; returns True once DingTalk accepted it"""
+    # Step 6: Upload screenshot to DingTalk
+    logger.info("📤 Step 6: Uploading screenshot to DingTalk...")
+    
+    # Get access token
+    import requests
+    url = DINGTALK_TOKEN_URL
+    params = {
+        'appkey': DINGTALK_CLIENT_ID,
+        'appsecret': DINGTALK_CLIENT_SECRET
+    }
+    with span('dingtalk_token') as token_span, DINGTALK_SEND.time(endpoint='gettoken'):
+        response = requests.get(url, params=params)
+        result = response.json()
+        token_span.set(http_status=response.status_code, errcode=result.get('errcode'))
+        if result.get('errcode') != 0:
+            token_span.fail(result.get('errmsg'))
+    
+    if result.get('errcode') != 0:
+        logger.error("❌ Failed to get access token: %s", result)
+        CAPTURE_FAILURES.inc(stage='dingtalk_token')
+        return False
+    
+    access_token = result['access_token']
+    
+    # A chart that looks the same as one uploaded recently reuses its media_id
+    from media_reuse import MediaReuseCache
+    media_cache, fingerprint, media_id = MediaReuseCache(), None, None
+    if reuse_media:
+        try:
+            with span('media_reuse_lookup') as reuse_span:
+                fingerprint = media_cache.fingerprint(chart_path)
+                match = media_cache.lookup(fingerprint)
+                reuse_span.set(phash=fingerprint['phash'], reused=bool(match))
+                if match:
+                    reuse_span.set(distance=match['distance'], pixel_delta=match['pixel_delta'])
+            if match:
+                media_id = match['media_id']
+                logger.info("♻️ Chart unchanged since a recent upload (pHash distance %s, pixel delta %s), "
+                            "reusing Media ID: %s", match['distance'], match['pixel_delta'], media_id)
+                MEDIA_UPLOADS.inc(result='reused')
+        except Exception as e:
+            logger.warning("⚠️ Media reuse check skipped: %s", e)
+    
+    if media_id is None:
+        media_id = upload_chart(chart_path, access_token)
+        if media_id is None:
+            CAPTURE_FAILURES.inc(stage='dingtalk_upload')
+            return False
+        MEDIA_UPLOADS.inc(result='uploaded')
+        if fingerprint:
+            try:
+                media_cache.record(fingerprint, media_id)
+            except OSError as e:
+                logger.warning("⚠️ Media reuse cache not updated: %s", e)
+    
+    # Step 7: Generate download URL and send to DingTalk
+    logger.info("📨 Step 7: Sending report to DingTalk...")
+    download_url = f"{DINGTALK_MEDIA_DOWNLOAD_URL}?access_token={access_token}&media_id={media_id}"
     
+    with STEP_DURATION.time(step='send'):
+        success = send_to_dingtalk(download_url, tps_data, time_range, anomalies)
+    if not success:
+        CAPTURE_FAILURES.inc(stage='dingtalk_send')
+    return success
+
+def send_only(chart_path, time_range=None, reuse_media=True):
+    """Resend an existing chart with the latest TPS record from tps_data.json - no browser"""
+    if not os.path.exists(chart_path):
+        logger.error("❌ Chart not found: %s", chart_path)
+        return False
+    from history_store import load_records, DEFAULT_TPS_FILE
+    records = load_records(DEFAULT_TPS_FILE)
+    latest = records[-1] if records else {}
+    if not latest:
+        logger.warning("⚠️ No recorded TPS data, sending the chart alone")
+    recorded_range = latest.get('time_range')
+    if time_range is None and recorded_range:
+        time_range = f"{recorded_range['start'].replace('T', ' ')},{recorded_range['end'].replace('T', ' ')}"
+    logger.info("📤 Resending %s with the TPS record from %s", os.path.basename(chart_path),
+                latest.get('capture_time', '-'))
+    return deliver_report(chart_path, latest.get('tps_calculations'), time_range, reuse_media=reuse_media)
+
+def parse_only(path):
+    """Print the TPS rows parsed from statistics popup text ('-' reads stdin)"""
+    from statistics_parser import parse_statistics
+    text = sys.stdin.read() if path == '-' else open(path, encoding='utf-8').read()
+    skipped = []
+    rows = parse_statistics(text, skipped=skipped)
+    for row in rows:
+        tps = "-" if row.tps is None else f"{row.tps:.2f}"
+        print(f"📊 {row.metric}: Max={row.max}, Count={row.count}, TPS={tps}")
+    for line in skipped:
+        print(f"⚠️ Could not parse: {line}")
+    return bool(rows)
+
+def show_history(limit=5):
+    """Print the last `limit` captures from tps_data.json"""
+    from history_store import load_records, DEFAULT_TPS_FILE
+    records = load_records(DEFAULT_TPS_FILE)
+    for record in records[-limit:]:
+        recorded_range = record.get('time_range')
+        suffix = f"  ({recorded_range['start']} to {recorded_range['end']})" if recorded_range else ""
+        print(f"🕐 {record.get('capture_time', record.get('timestamp'))}{suffix}")
+        for item in record.get('tps_calculations') or []:
+            tps = "-" if item.get('tps') is None else f"{item['tps']:.2f}"
+            print(f"   {item.get('metric')}: Max={item.get('max')}, TPS={tps}")
+    print(f"🗂️  {len(records)} records in {DEFAULT_TPS_FILE}")
+    return True
+
+def capture_dashboard(automation, time_range=None):
+    """
+    Browser part of the flow (steps 1-5)
+    Returns dict with chart_path, stats_path, statistics_text, tps_data and capture_started, or None
+    """
+    # Step 1: Setup browser
+    logger.info("� Step 1: Setting up browser...")
+    with STEP_DURATION.time(step='setup_driver'):
+        automation.setup_driver()
+    
+    # Step 2: Login
+    logger.info("🔐 Step 2: Login to XFlush...")
+    with STEP_DURATION.time(step='login'):
+        logged_in = automation.login_and_setup()
+    if not logged_in:
+        logger.error("❌ Login failed")
+        CAPTURE_FAILURES.inc(stage='login')
+        automation.capture_debug_artifacts('login')
+        return None
+    
+    # Step 3: Navigate to Trade Trends
+    logger.info("📊 Step 3: Navigating to Trade Trends...")
+    with STEP_DURATION.time(step='trade_trends'):
+        opened = automation.click_trade_trends()
+    if not opened:
+        logger.error("❌ Could not access Trade Trends")
+        CAPTURE_FAILURES.inc(stage='trade_trends')
+        automation.capture_debug_artifacts('trade_trends')
+        return None
+    
+    #time.sleep(3)  # Wait for page to load
+    
+    # Step 3.5: Set time range if provided
     if time_range:
-        print(f"⏰ Time range: {time_range}")
+        logger.info("⏰ Step 3.5: Setting time range to '%s'...", time_range)
+        with STEP_DURATION.time(step='time_range'):
+            range_set = automation.set_time_range(time_range)
+        if not range_set:
+            logger.error("❌ Failed to set time range")
+            CAPTURE_FAILURES.inc(stage='time_range')
+            automation.capture_debug_artifacts('time_range')
+            return None
+        logger.info("✅ Time range set successfully")
+        #time.sleep(2)  # Wait for chart to update
+    
+    # Step 4: Capture chart screenshot
+    logger.info("📈 Step 4: Capturing Trade Trends chart...")
+    with STEP_DURATION.time(step='chart'):
+        chart_path = automation.capture_chart_only()
+    if not chart_path:
+        logger.error("❌ Failed to capture chart")
+        CAPTURE_FAILURES.inc(stage='chart')
+        automation.capture_debug_artifacts('chart')
+        return None
+    logger.info("✅ Chart captured: %s", chart_path)
+    
+    # Step 5: Capture statistics screenshot and extract TPS data
+    logger.info("📊 Step 5: Capturing statistics and extracting TPS data...")
+    capture_started = datetime.now()
+    with STEP_DURATION.time(step='statistics'):
+        stats_capture = automation.capture_statistics_info()
+    
+    if not stats_capture:
+        logger.error("❌ Failed to capture statistics")
+        CAPTURE_FAILURES.inc(stage='statistics')
+        automation.capture_debug_artifacts('statistics')
+        return None
+    
+    # Handle return value (could be tuple or single value)
+    if isinstance(stats_capture, tuple):
+        stats_path, statistics_text = stats_capture
+    else:
+        stats_path = stats_capture
+        statistics_text = None
+    
+    logger.info("✅ Statistics captured: %s", stats_path)
+    
+    # Extract TPS data
+    tps_data = None
+    if statistics_text:
+        with STEP_DURATION.time(step='parse'):
+            tps_data = automation.extract_statistics_and_calculate_tps(statistics_text)
+            tps_data = automation.apply_series_statistics(tps_data)
+        logger.info("✅ TPS data extracted: %s metrics", len(tps_data) if tps_data else 0)
+    else:
+        # Try loading from file as fallback
+        tps_file = os.path.join(project_root, "tps_data.json")
+        if os.path.exists(tps_file):
+            try:
+                with open(tps_file, 'r') as f:
+                    data = json.load(f)
+                if data:
+                    tps_data = data[-1].get('tps_calculations', [])
+                    logger.info("✅ TPS data loaded from file: %s metrics", len(tps_data))
+            except Exception as e:
+                logger.warning("⚠️ Could not load TPS data from file: %s", e)
+    
+    return {
+        'chart_path': chart_path,
+        'stats_path': stats_path,
+        'statistics_text': statistics_text,
+        'tps_data': tps_data,
+        'capture_started': capture_started,
+    }
+
+def use_scratch_stores(workdir):
+    """Point the TPS history, result / media caches, metrics textfile and screenshots at `workdir`"""
+    import history_store
+    import tps_retention
+    import result_cache
+    import media_reuse
+    import metrics_exporter
+    import screenshot_retention
+
+    history_store.DEFAULT_TPS_FILE = os.path.join(workdir, "tps_data.json")
+    tps_retention.HISTORY_ROOT = os.path.join(workdir, "tps_history")
+    result_cache.DEFAULT_CACHE_DIR = os.path.join(workdir, "cache", "results")
+    media_reuse.DEFAULT_CACHE_FILE = os.path.join(workdir, "cache", "media_reuse.json")
+    metrics_exporter.DEFAULT_TEXTFILE = os.path.join(workdir, "metrics", "tradetrend.prom")
+    screenshot_retention.use_screenshot_dir(os.path.join(workdir, "screenshots"))
+
+
+def main(time_range=None, xflush_base_url=None, trace=True, perf_trace=False, reuse_media=True,
+         persistent_profile=True):
+    """
+    Main automation flow, traced as one 'run' span (see automation/tracing.py)
+    xflush_base_url: run against another XFlush host (e.g. benchmarks/replay_server.py)
+    trace: write spans to traces/run_<timestamp>.jsonl (the summary table is always logged)
+    perf_trace: also save a Chrome DevTools trace and per-stage metrics (automation/chrome_perf.py)
+    reuse_media: skip the upload when the chart looks like a recent one (automation/media_reuse.py)
+    persistent_profile: start Chrome from the cached profile in chrome_profile/ (automation/chrome_profile.py)
+    """
+    TRACER.start_run(trace_dir=DEFAULT_TRACE_DIR if trace else None)
+    enforce_retention()
+    try:
+        with span('run', time_range=time_range or 'default') as run_span:
+            success = run_pipeline(time_range, xflush_base_url, perf_trace, reuse_media, persistent_profile)
+            if not success:
+                run_span.fail()
+            return success
+    finally:
+        TRACER.finish()
+
+def run_pipeline(time_range=None, xflush_base_url=None, perf_trace=False, reuse_media=True,
+                 persistent_profile=True):
+    """Steps 1-7; main() wraps this in the run span"""
+    logger.info("🚀 Starting Trade Trends Automation...")
+    
+    if time_range:
+        logger.info("⏰ Time range: %s", time_range)
     
     # Initialize automation with headless setting from credentials
-    automation = TradeTrendsAutomation(headless=BROWSER_HEADLESS)
+    automation = TradeTrendsAutomation(headless=BROWSER_HEADLESS,
+                                       credentials=get_xflush_credentials(xflush_base_url),
+                                       perf_trace=perf_trace,
+                                       persistent_profile=persistent_profile)
     
     try:
-        # Step 1: Setup browser
-        print("\n� Step 1: Setting up browser...")
-        automation.setup_driver()
-        
-        # Step 2: Login
-        print("🔐 Step 2: Login to XFlush...")
-        if not automation.login_and_setup():
-            print("❌ Login failed")
-            return False
-        
-        # Step 3: Navigate to Trade Trends
-        print("📊 Step 3: Navigating to Trade Trends...")
-        if not automation.click_trade_trends():
-            print("❌ Could not access Trade Trends")
-            return False
-        
-        #time.sleep(3)  # Wait for page to load
-        
-        # Step 3.5: Set time range if provided
+        # Closed historical ranges can be served from the result cache without a browser
+        cache, cache_key, capture = ResultCache(), None, None
         if time_range:
-            print(f"⏰ Step 3.5: Setting time range to '{time_range}'...")
-            if not automation.set_time_range(time_range):
-                print("❌ Failed to set time range")
+            try:
+                requested_range = parse_time_range(time_range)
+                if cache.is_cacheable(requested_range):
+                    cache_key = cache.key_for(automation.trade_trends_url, requested_range)
+                    cached = cache.get(cache_key)
+                    if cached:
+                        logger.info("⚡ Closed time range found in result cache, skipping browser capture")
+                        automation.time_range = requested_range
+                        capture = {
+                            'chart_path': cached['chart_path'],
+                            'stats_path': cached['statistics_path'],
+                            'statistics_text': cached.get('statistics_text'),
+                            'tps_data': cached['tps_data'],
+                            'capture_started': datetime.fromisoformat(cached['capture_started']),
+                        }
+            except ValueError:
+                pass  # set_time_range() reports the invalid format
+        
+        if capture is None:
+            with span('capture_dashboard'):
+                capture = capture_dashboard(automation, time_range)
+            if not capture:
                 return False
-            print("✅ Time range set successfully")
-            #time.sleep(2)  # Wait for chart to update
+            if cache_key and capture['tps_data']:
+                cache.put(cache_key, capture['chart_path'], capture['stats_path'], capture['tps_data'],
+                          capture['statistics_text'],
+                          meta={'capture_started': capture['capture_started'].isoformat()})
         
-        # Step 4: Capture chart screenshot
-        print("📈 Step 4: Capturing Trade Trends chart...")
-        chart_path = automation.capture_chart_only()
+        chart_path = capture['chart_path']
+        stats_path = capture['stats_path']
+        tps_data = capture['tps_data']
+        capture_started = capture['capture_started']
+        record_tps(tps_data, capture_started.timestamp())
         if not chart_path:
-            print("❌ Failed to capture chart")
-            return False
-        print(f"✅ Chart captured: {chart_path}")
-        
-        # Step 5: Capture statistics screenshot and extract TPS data
-        print("📊 Step 5: Capturing statistics and extracting TPS data...")
-        stats_capture = automation.capture_statistics_info()
-        
-        if not stats_capture:
-            print("❌ Failed to capture statistics")
-            return False
-        
-        # Handle return value (could be tuple or single value)
-        if isinstance(stats_capture, tuple):
-            stats_path, statistics_text = stats_capture
-        else:
-            stats_path = stats_capture
-            statistics_text = None
-        
-        print(f"✅ Statistics captured: {stats_path}")
-        
-        # Extract TPS data
-        tps_data = None
-        if statistics_text:
-            tps_data = automation.extract_statistics_and_calculate_tps(statistics_text)
-            print(f"✅ TPS data extracted: {len(tps_data) if tps_data else 0} metrics")
-        else:
-            # Try loading from file as fallback
-            tps_file = os.path.join(project_root, "tps_data.json")
-            if os.path.exists(tps_file):
-                try:
-                    with open(tps_file, 'r') as f:
-                        data = json.load(f)
-                    if data:
-                        tps_data = data[-1].get('tps_calculations', [])
-                        print(f"✅ TPS data loaded from file: {len(tps_data)} metrics")
-                except Exception as e:
-                    print(f"⚠️ Could not load TPS data from file: {e}")
-        
-        # Step 6: Upload screenshot to DingTalk
-        print("📤 Step 6: Uploading screenshot to DingTalk...")
-        
-        # Get access token
-        url = "https://oapi.dingtalk.com/gettoken"
-        params = {
-            'appkey': 'dingih5yqjdxxw8ghaqe',
-            'appsecret': 'oGhCniLiOI-pZL9kVlQ-c68Td_0BgncdUGtx3c8etIUkss7E0U3x4HRClnvuh0J6'
-        }
-        response = requests.get(url, params=params)
-        result = response.json()
-        
-        if result.get('errcode') != 0:
-            print(f"❌ Failed to get access token: {result}")
+            logger.error("❌ Cached result has no chart screenshot")
             return False
         
-        access_token = result['access_token']
-        
-        # Upload image
-        upload_url = "https://oapi.dingtalk.com/media/upload"
-        upload_params = {'access_token': access_token, 'type': 'image'}
-        
-        with open(chart_path, 'rb') as f:
-            file_data = f.read()
-        
-        boundary = '----WebKitFormBoundary' + str(int(time.time()))
-        form_data = (
-            f'--{boundary}\r\n'
-            f'Content-Disposition: form-data; name="type"\r\n\r\n'
-            f'image\r\n'
-            f'--{boundary}\r\n'
-            f'Content-Disposition: form-data; name="media"; filename="chart.png"\r\n'
-            f'Content-Type: image/png\r\n\r\n'
-        ).encode('utf-8') + file_data + f'\r\n--{boundary}--\r\n'.encode('utf-8')
-        
-        headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
-        response = requests.post(upload_url, params=upload_params, data=form_data, headers=headers)
-        
-        upload_result = response.json()
-        if upload_result.get('errcode') != 0:
-            print(f"❌ Upload failed: {upload_result}")
-            return False
-        
-        media_id = upload_result['media_id']
-        print(f"✅ Image uploaded! Media ID: {media_id}")
-        
-        # Step 7: Generate download URL and send to DingTalk
-        print("📨 Step 7: Sending report to DingTalk...")
-        download_url = f"https://oapi.dingtalk.com/media/downloadFile?access_token={access_token}&media_id={media_id}"
+        # Step 5.5: Compare against stored history before reporting
+        anomalies = None
+        if tps_data:
+            logger.info("🔎 Step 5.5: Checking TPS against historical baselines...")
+            try:
+                from tps_anomaly import detect_anomalies
+                with span('anomaly_detection') as anomaly_span:
+                    anomalies = detect_anomalies(tps_data, now=capture_started)
+                    anomaly_span.set(anomalies=None if anomalies is None else len(anomalies))
+                if anomalies is None:
+                    logger.info("   ℹ️ Not enough history for a baseline yet")
+                elif anomalies:
+                    for anomaly in anomalies:
+                        logger.warning("   🚨 %s: %s", anomaly['metric'], '; '.join(anomaly['reasons']))
+                else:
+                    logger.info("   ✅ No anomalies detected")
+            except Exception as e:
+                logger.warning("   ⚠️ Anomaly detection skipped: %s", e)
         
-        success = send_to_dingtalk(download_url, tps_data, time_range)
+        # Step 5.6: Day-over-day / week-over-week deltas from stored history (no extra capture)
+        if tps_data:
+            try:
+                from tps_compare import add_period_deltas
+                add_period_deltas(tps_data, capture_started, automation.time_range)
+            except Exception as e:
+                logger.warning("   ⚠️ Period deltas skipped: %s", e)
         
-        if success:
+        if deliver_report(chart_path, tps_data, time_range, anomalies, reuse_media):
             # Delete screenshot files after successful send
-            print("🗑️  Cleaning up screenshots...")
+            logger.info("🗑️  Cleaning up screenshots...")
             try:
                 if os.path.exists(chart_path):
                     os.remove(chart_path)
-                    print(f"   ✅ Deleted: {os.path.basename(chart_path)}")
+                    forget_screenshot(chart_path)
+                    logger.info("   ✅ Deleted: %s", os.path.basename(chart_path))
                 
                 if stats_path and os.path.exists(stats_path):
                     os.remove(stats_path)
-                    print(f"   ✅ Deleted: {os.path.basename(stats_path)}")
+                    forget_screenshot(stats_path)
+                    logger.info("   ✅ Deleted: %s", os.path.basename(stats_path))
             except Exception as e:
-                print(f"   ⚠️  Failed to delete some files: {e}")
+                logger.warning("   ⚠️  Failed to delete some files: %s", e)
             
-            print("\n" + "=" * 50)
-            print("🎉 AUTOMATION COMPLETED SUCCESSFULLY!")
-            print("=" * 50)
+            logger.info("🎉 AUTOMATION COMPLETED SUCCESSFULLY!")
             return True
-        else:
-            return False
+        return False
             
     except Exception as e:
-        print(f"💥 Automation error: {e}")
-        import traceback
-        traceback.print_exc()
+        CAPTURE_FAILURES.inc(stage='exception')
+        logger.exception("💥 Automation error: %s", e)
+        automation.capture_debug_artifacts('exception', error=e)
         return False
     
     finally:
-        # Close browser
+        # Close browser (saving the Chrome performance trace first, while the driver is alive)
         try:
             if automation.driver:
-                automation.driver.quit()
-                print("🔄 Browser closed")
+                automation.save_perf_artifacts(TRACER.path)
+                with span('driver_quit'):
+                    automation.driver.quit()
+                logger.info("🔄 Browser closed")
         except:
             pass
+        automation.release_profile()
+        
+        # Textfile-collector output for node_exporter; counters accumulate across runs
+        try:
+            REGISTRY.persist()
+        except Exception as e:
+            logger.warning("⚠️ Metrics not written: %s", e)
 
 if __name__ == "__main__":
     # Parse command line arguments
@@ -279,7 +586,69 @@ if __name__ == "__main__":
                         help='Time range for the report. Use "today" for current day (00:00:00 to 23:59:59), '
                              'or specify custom range as "YYYY-MM-DD HH:MM:SS,YYYY-MM-DD HH:MM:SS"')
     
+    parser.add_argument('--xflush-base-url',
+                        type=str,
+                        help='Use another XFlush host, e.g. the offline replay server (benchmarks/replay_server.py); '
+                             f'history, caches and metrics then go to {os.path.relpath(REPLAY_DIR, project_root)}/')
+    
+    parser.add_argument('--persist',
+                        action='store_true',
+                        help='With --xflush-base-url, still write the real tps_data.json, tps_history/, caches and metrics')
+    
+    parser.add_argument('--live-dingtalk',
+                        action='store_true',
+                        help='With --xflush-base-url, send the report to the production DingTalk group anyway '
+                             '(by default DINGTALK_API_BASE_URL must point at another host, e.g. mock_dingtalk.py)')
+    
+    parser.add_argument('--no-trace',
+                        action='store_true',
+                        help='Do not write the span trace to traces/ (the summary table is still logged)')
+    
+    parser.add_argument('--perf-trace',
+                        action='store_true',
+                        help='Save a Chrome DevTools trace and per-stage Performance.getMetrics next to the span trace')
+    
+    parser.add_argument('--no-media-reuse',
+                        action='store_true',
+                        help='Always upload the chart, even when it looks the same as a recent upload')
+    
+    parser.add_argument('--no-profile',
+                        action='store_true',
+                        help='Start Chrome with an empty profile instead of the cached one in chrome_profile/')
+    
+    commands = parser.add_mutually_exclusive_group()
+    commands.add_argument('--send-only',
+                          metavar='CHART',
+                          help='Resend an existing chart PNG with the latest recorded TPS data (no browser)')
+    commands.add_argument('--parse-only',
+                          metavar='FILE',
+                          help='Parse statistics popup text ("-" for stdin) and print TPS rows (no browser)')
+    commands.add_argument('--history',
+                          nargs='?', type=int, const=5, metavar='N',
+                          help='Print the last N recorded captures (default 5)')
+    
+    add_logging_arguments(parser)
+    
     args = parser.parse_args()
+    configure_from_args(args)
+    
+    if args.send_only:
+        sys.exit(0 if send_only(args.send_only, args.time_range, reuse_media=not args.no_media_reuse) else 1)
+    if args.parse_only:
+        sys.exit(0 if parse_only(args.parse_only) else 1)
+    if args.history is not None:
+        sys.exit(0 if show_history(args.history) else 1)
+    
+    if args.xflush_base_url or os.environ.get('XFLUSH_BASE_URL'):
+        if DINGTALK_API_BASE_URL == DINGTALK_PRODUCTION_BASE_URL and not args.live_dingtalk:
+            logger.error("❌ Replay host with the production DingTalk: the report would reach the real group. "
+                         "Set DINGTALK_API_BASE_URL (e.g. benchmarks/mock_dingtalk.py) or pass --live-dingtalk")
+            sys.exit(2)
+        if not args.persist:
+            use_scratch_stores(REPLAY_DIR)
+            logger.info("🧪 Replay host: history, caches and metrics go to %s (--persist to keep them)", REPLAY_DIR)
     
-    success = main(time_range=args.time_range)
+    success = main(time_range=args.time_range, xflush_base_url=args.xflush_base_url, trace=not args.no_trace,
+                   perf_trace=args.perf_trace, reuse_media=not args.no_media_reuse,
+                   persistent_profile=not args.no_profile)
     sys.exit(0 if success else 1)
\ No newline at end of file